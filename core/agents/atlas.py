@@ -1,6 +1,8 @@
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.messages import SystemMessage, HumanMessage
 
+from core.prompt_cache import with_volatile_suffix
+
 ATLAS_SYSTEM_PROMPT = """You are Atlas, the Architect and Strategist of the "Trinity" system.
 Your goal: Understand user intent and optimize resource allocation.
 
@@ -38,15 +40,20 @@ Responsibilities:
 - Fail early if blocked and explain why in [VOICE].
 """
 
+ATLAS_VISION_STRATEGY = "1. Prefer 'enhanced_vision_analysis' for UI changes.\n2. Use context summaries to avoid redundant captures."
+
+# System prompts stay byte-identical across turns (cacheable prefix); per-turn
+# content such as vision context goes after the task in the human message.
+
 def get_atlas_prompt(task_description: str, preferred_language: str = "en", vision_context: str = ""):
     formatted_prompt = ATLAS_SYSTEM_PROMPT.format(preferred_language=preferred_language)
-    if vision_context:
-        formatted_prompt += f"\n\nCURRENT VISION CONTEXT:\n{vision_context}\n"
-        formatted_prompt += "\nVISION STRATEGY:\n1. Prefer 'enhanced_vision_analysis' for UI changes.\n2. Use context summaries to avoid redundant captures.\n"
-
     return ChatPromptTemplate.from_messages([
         SystemMessage(content=formatted_prompt),
-        HumanMessage(content=task_description),
+        HumanMessage(content=with_volatile_suffix(
+            task_description,
+            current_vision_context=vision_context,
+            vision_strategy=ATLAS_VISION_STRATEGY if vision_context else "",
+        )),
     ])
 
 def get_atlas_vision_prompt(task_description: str, tools_desc: str, vision_context: str = ""):
@@ -61,10 +68,8 @@ VISION STRATEGY:
 3. Use diff data for efficient processing.
 
 AVAILABLE TOOLS:
-{tools_desc}
-
-CONTEXT: {vision_context}"""),
-        HumanMessage(content=task_description)
+{tools_desc}"""),
+        HumanMessage(content=with_volatile_suffix(task_description, context=vision_context))
     ])
 
 
@@ -138,9 +143,7 @@ Output format (JSON):
   ]
 }}
 
-FORBIDDEN ACTIONS (FATAL ERROR IF REPEATED):
-{forbidden_actions}
-
+FORBIDDEN ACTIONS are listed after the task when present (FATAL ERROR IF REPEATED).
 """
 
 def get_meta_planner_prompt(task_context: str, preferred_language: str = "en"):
@@ -154,17 +157,18 @@ def get_atlas_plan_prompt(task_description: str, tools_desc: str = "", context:
     formatted_prompt = ATLAS_PLANNING_PROMPT.format(
         preferred_language=preferred_language,
         tools_desc=tools_desc,
-        forbidden_actions=forbidden_actions or "None"
     )
-    if vision_context:
-        formatted_prompt += f"\n\nVISION CONTEXT SUMMARY:\n{vision_context}\n"
 
     msg = f"Task: {task_description}"
     if context:
         msg += f"\n\nContext/RAG: {context}"
     return ChatPromptTemplate.from_messages([
         SystemMessage(content=formatted_prompt),
-        HumanMessage(content=msg),
+        HumanMessage(content=with_volatile_suffix(
+            msg,
+            forbidden_actions=forbidden_actions,
+            vision_context_summary=vision_context,
+        )),
     ])
 
 # Placeholder for actual LLM call logic if needed separately
@@ -1,6 +1,8 @@
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.messages import SystemMessage, HumanMessage
 
+from core.prompt_cache import with_volatile_suffix
+
 GRISHA_SYSTEM_PROMPT = """You are Grisha, the Verification Officer of "Trinity". Your goal: Objective verification of results.
 
 🔍 VERIFICATION RULES:
@@ -22,19 +24,18 @@ GRISHA_SYSTEM_PROMPT = """You are Grisha, the Verification Officer of "Trinity".
 Available tools:
 {tools_desc}
 
-[VISION CONTEXT]: {vision_context}
-
-VERIFICATION STRATEGY:
+VERIFICATION STRATEGY (the current vision context, if any, follows the step to verify):
 1. Favor 'enhanced_vision_analysis' to get specific diff/OCR data.
 2. Compare Tetyana's report with visual evidence in context.
 3. Look for 'Significant changes' in context to confirm action effects.
 """
 
 def get_grisha_prompt(context: str, tools_desc: str = "", preferred_language: str = "en", vision_context: str = ""):
-    formatted_prompt = GRISHA_SYSTEM_PROMPT.format(tools_desc=tools_desc, preferred_language=preferred_language, vision_context=vision_context)
+    # Stable system prefix; the vision context changes every step so it goes last
+    formatted_prompt = GRISHA_SYSTEM_PROMPT.format(tools_desc=tools_desc, preferred_language=preferred_language)
     return ChatPromptTemplate.from_messages([
         SystemMessage(content=formatted_prompt),
-        HumanMessage(content=context),
+        HumanMessage(content=with_volatile_suffix(context, vision_context=vision_context)),
     ])
 
 # Specialized media verification prompt
@@ -1,6 +1,8 @@
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.messages import SystemMessage, HumanMessage
 
+from core.prompt_cache import with_volatile_suffix
+
 TETYANA_SYSTEM_PROMPT = """You are Tetyana, the Lead Operator of "Trinity". Your goal: Atomic and precise execution of actions in macOS.
 
 🎯 YOUR ROLE:
@@ -18,9 +20,7 @@ You are the executor. You are provided with a plan and a strategic policy (tool_
 7. **GOOGLE SEARCH**: IMPORTANT: Use `textarea[name="q"]` for the Google search box. DO NOT use `input[name="q"]`.
 8. **FORBIDDEN RE-SEARCH**: If you are on a search results page (Google, YouTube, etc.) and your task is to "Select", "Click", "Open", or "Find a movie", you MUST click a link. **DO NOT** type in the search box again. **DO NOT** perform a new search. Use `browser_get_links` to see what is there, then `browser_click_element` to open one. If `browser_get_links` was just called, your NEXT action MUST be `browser_click_element`.
 
-[VISION CONTEXT]: {vision_context}
-
-VISION STRATEGY:
+VISION STRATEGY (the current vision context, if any, follows the request):
 1. Use 'enhanced_vision_analysis' for verification after screen-altering steps.
 2. Always capture a baseline frame if starting a complex GUI sequence.
 3. Use 'vision_analysis_with_context' to maintain visual history for Atlas.
@@ -30,14 +30,14 @@ Available tools:
 """
 
 def get_tetyana_prompt(task_context: str, tools_desc: str = "", preferred_language: str = "en", vision_context: str = ""):
+    # Stable system prefix; the vision context changes every step so it goes last
     formatted_prompt = TETYANA_SYSTEM_PROMPT.format(
         tools_desc=tools_desc, 
         preferred_language=preferred_language,
-        vision_context=vision_context
     )
     return ChatPromptTemplate.from_messages([
         SystemMessage(content=formatted_prompt),
-        HumanMessage(content=task_context),
+        HumanMessage(content=with_volatile_suffix(task_context, vision_context=vision_context)),
     ])
 
 # Placeholder for Dev Subsystem interaction
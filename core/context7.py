@@ -8,29 +8,53 @@ Enhanced with:
 - Sliding window for step-aware context management
 - Priority weighting for context sections
 - Token metrics for monitoring
+- Budgets enforced in tokenizer tokens (see core.token_counter)
+- Incremental assembly: rendered sections are cached by input and the step
+  window is a deque of pre-rendered entries updated per new message
+- Relevance-aware compression of oversized RAG, structure and step sections
+  (see core.context_compression)
 """
 
-from typing import Dict, Any, List, Optional
+from typing import Callable, Deque, Dict, Any, List, Optional, Tuple
+from collections import deque
 from dataclasses import dataclass, field
 from datetime import datetime
 import json
+import time
+
+from core.context_compression import ContextCompressor
+from core.token_counter import CachedTokenCounter, get_token_counter
 
 
 @dataclass
 class ContextMetrics:
     """Metrics for context usage tracking."""
     total_chars: int = 0
-    estimated_tokens: int = 0
+    estimated_tokens: int = 0  # chars / CHARS_PER_TOKEN, the legacy estimate
+    actual_tokens: int = 0  # counted by the configured tokenizer
+    tokenizer: str = ""
     sections_included: List[str] = field(default_factory=list)
-    truncations: Dict[str, int] = field(default_factory=dict)
+    truncations: Dict[str, int] = field(default_factory=dict)  # tokens dropped per section
+    dropped_chunks: Dict[str, int] = field(default_factory=dict)
+    dropped_scores: Dict[str, List[float]] = field(default_factory=dict)  # highest first, top 10
+    collapsed_repeats: Dict[str, int] = field(default_factory=dict)
+    sections_reused: int = 0  # sections served from the render cache
+    prep_ms: float = 0.0
     timestamp: datetime = field(default_factory=datetime.now)
     
     def to_dict(self) -> Dict[str, Any]:
         return {
             "total_chars": self.total_chars,
             "estimated_tokens": self.estimated_tokens,
+            "actual_tokens": self.actual_tokens,
+            "tokenizer": self.tokenizer,
             "sections_included": self.sections_included,
             "truncations": self.truncations,
+            "dropped_chunks": self.dropped_chunks,
+            "dropped_scores": self.dropped_scores,
+            "collapsed_repeats": self.collapsed_repeats,
+            "sections_reused": self.sections_reused,
+            "prep_ms": self.prep_ms,
             "timestamp": self.timestamp.isoformat()
         }
 
@@ -48,7 +72,7 @@ class Context7:
     # Sliding window configuration
     MAX_WINDOW_STEPS = 10  # Keep last N messages/steps in context
     
-    # Priority weights for context sections (must sum to 1.0)
+    # Priority weights for context sections (must sum to 1.0), applied to the token budget
     PRIORITY_WEIGHTS = {
         "policy": 0.10,         # Strategic policy (always included)
         "recent_steps": 0.35,   # Recent execution history
@@ -57,14 +81,28 @@ class Context7:
         "structure": 0.15       # Project structure
     }
 
-    def __init__(self, verbose: bool = False):
+    def __init__(self, verbose: bool = False, token_counter: Optional[CachedTokenCounter] = None):
         self.verbose = verbose
         # Token estimation constants
         self.MAX_CONTEXT_TOKENS = 32000  # Conservative adjustment space
-        self.CHARS_PER_TOKEN = 4
+        self.CHARS_PER_TOKEN = 4  # Only for the legacy estimate reported in metrics
+        self.tokens = token_counter or get_token_counter()
+        self.compressor = ContextCompressor(self.tokens)
         # Metrics storage
         self._last_metrics: Optional[ContextMetrics] = None
         self._metrics_history: List[ContextMetrics] = []
+        # Incremental assembly state
+        self._sections: Dict[str, Tuple[Any, str, Dict[str, Any]]] = {}
+        self._section_hits = 0
+        self._section_misses = 0
+        self._last_join: Optional[Tuple[List[str], str, int]] = None
+        # One entry per message in the window: (rendered step or None, chars, tokens)
+        self._window: Deque[Tuple[Optional[str], int, int]] = deque(maxlen=self.MAX_WINDOW_STEPS)
+        self._window_chars = 0
+        self._window_tokens = 0
+        self._window_version = 0
+        self._seen_messages = 0
+        self._last_message: Any = None
 
     def prepare(self, 
                 rag_context: str, 
@@ -82,32 +120,29 @@ class Context7:
         # 1. Apply Policy (High Priority)
         policy_block = self._format_policy(meta_config)
         
-        # 2. Budget Characters
-        # Conservative token count: 16k tokens -> ~48k chars (using 3 chars/token for safety)
-        TOTAL_BUDGET = 16000 * 3 
+        # 2. Budget Tokens
+        TOTAL_BUDGET = 16000
         
-        policy_len = len(policy_block)
-        msg_len = len(last_msg)
+        policy_tokens = self.tokens.count(policy_block)
+        msg_tokens = self.tokens.count(last_msg)
         
         # Remaining budget for Structure and RAG
-        remaining = TOTAL_BUDGET - (policy_len + msg_len + 500) # 500 for headers/overhead
+        remaining = TOTAL_BUDGET - (policy_tokens + msg_tokens + 125) # 125 for headers/overhead
         
-        # Budget for structure (max 50% of remaining or 20k chars)
-        structure_budget = min(int(remaining * 0.5), 20000)
-        final_structure = project_structure
-        if len(project_structure) > structure_budget:
-            if self.verbose:
-                 print(f"[Context7] Truncating structure: {len(project_structure)} -> {structure_budget}")
-            final_structure = project_structure[:structure_budget] + "\n...[Structure Truncated]..."
+        # Budget for structure (max 50% of remaining or 5k tokens); oversized
+        # sections keep the chunks most relevant to last_msg
+        metrics = ContextMetrics(tokenizer=self.tokens.name)
+        structure_budget = min(int(remaining * 0.5), 5000)
+        final_structure = self._compress("structure", "", project_structure, structure_budget, metrics, last_msg)
+        if self.verbose and "structure" in metrics.truncations:
+            print(f"[Context7] Compressed structure: dropped {metrics.truncations['structure']} tokens")
             
-        remaining -= len(final_structure)
+        remaining -= self.tokens.count(final_structure)
         
         # Final budget for RAG
-        final_rag = rag_context
-        if len(rag_context) > remaining:
-            if self.verbose:
-                print(f"[Context7] Budgeting RAG context: {len(rag_context)} -> {max(0, remaining)} chars")
-            final_rag = rag_context[:max(0, remaining)] + "\n...[Context Truncated by Context7]..."
+        final_rag = self._compress("rag_context", "", rag_context, max(0, remaining), metrics, last_msg, prior="rank")
+        if self.verbose and "rag_context" in metrics.truncations:
+            print(f"[Context7] Compressed RAG context: dropped {metrics.truncations['rag_context']} tokens")
             
         # 3. Assemble
         sections = []
@@ -119,7 +154,10 @@ class Context7:
         if final_rag:
             sections.append(f"## 📚 RETRIEVED KNOWLEDGE (RAG)\n{final_rag}")
             
-        return "\n\n".join(sections)
+        final_context = "\n\n".join(sections)
+        metrics.sections_included = ["policy"] + (["structure"] if final_structure else []) + (["rag_context"] if final_rag else [])
+        self._record_metrics(metrics, final_context, self.tokens.count(final_context))
+        return final_context
 
     def prepare_with_window(
         self,
@@ -128,7 +166,8 @@ class Context7:
         rag_context: str,
         project_structure: str,
         meta_config: Dict[str, Any],
-        max_tokens: Optional[int] = None
+        max_tokens: Optional[int] = None,
+        query: Optional[str] = None
     ) -> str:
         """
         Enhanced context preparation with sliding window for message history.
@@ -140,88 +179,228 @@ class Context7:
             project_structure: Project structure text
             meta_config: Meta-planner configuration
             max_tokens: Optional token limit override
+            query: Request that oversized sections are ranked against (default: original_task)
             
         Returns:
             Assembled context string optimized for token budget
         """
-        metrics = ContextMetrics()
+        started = time.perf_counter()
+        metrics = ContextMetrics(tokenizer=self.tokens.name)
         max_tokens = max_tokens or self.MAX_CONTEXT_TOKENS
-        char_budget = max_tokens * self.CHARS_PER_TOKEN
+        query = query if query is not None else original_task
         
-        # 1. Calculate budget for each section based on priority weights
+        # 1. Calculate token budget for each section based on priority weights
         budgets = {
-            section: int(char_budget * weight)
+            section: int(max_tokens * weight)
             for section, weight in self.PRIORITY_WEIGHTS.items()
         }
         
+        # Each section is re-rendered only when its input or budget changed since the last step
         sections = []
         
         # 2. Policy (always included, minimal truncation)
         policy_block = self._format_policy(meta_config)
-        if len(policy_block) > budgets["policy"]:
-            metrics.truncations["policy"] = len(policy_block) - budgets["policy"]
-            policy_block = policy_block[:budgets["policy"]] + "..."
-        sections.append(("policy", f"## 🧠 STRATEGIC POLICY\n{policy_block}"))
-        metrics.sections_included.append("policy")
+        sections.append(("policy", self._cached_section(
+            "policy", (policy_block, budgets["policy"]), metrics,
+            lambda m: "## 🧠 STRATEGIC POLICY\n" + self._fit("policy", policy_block, budgets["policy"], m, suffix="...")
+        )))
         
         # 3. Original Task (high priority)
-        task_section = f"## 🎯 ORIGINAL TASK\n{original_task}"
-        if len(task_section) > budgets["original_task"]:
-            metrics.truncations["original_task"] = len(task_section) - budgets["original_task"]
-            task_section = task_section[:budgets["original_task"]] + "..."
-        sections.append(("original_task", task_section))
-        metrics.sections_included.append("original_task")
+        sections.append(("original_task", self._cached_section(
+            "original_task", (original_task, budgets["original_task"]), metrics,
+            lambda m: self._fit("original_task", f"## 🎯 ORIGINAL TASK\n{original_task}", budgets["original_task"], m, suffix="...")
+        )))
         
         # 4. Recent Steps (sliding window) - highest priority after policy
-        recent_steps = self._extract_recent_steps(messages, self.MAX_WINDOW_STEPS)
-        if recent_steps:
-            steps_text = self._format_recent_steps(recent_steps)
-            if len(steps_text) > budgets["recent_steps"]:
-                # Truncate from the beginning (keep most recent)
-                metrics.truncations["recent_steps"] = len(steps_text) - budgets["recent_steps"]
-                steps_text = "...[Earlier steps truncated]...\n" + steps_text[-(budgets["recent_steps"] - 50):]
-            sections.append(("recent_steps", f"## 📝 RECENT EXECUTION HISTORY\n{steps_text}"))
-            metrics.sections_included.append("recent_steps")
+        self._update_window(messages)
+        if self._window_chars:
+            # Truncate from the beginning (keep most recent)
+            sections.append(("recent_steps", self._cached_section(
+                "recent_steps", (self._window_version, budgets["recent_steps"], query), metrics,
+                lambda m: self._compress(
+                    "recent_steps", "## 📝 RECENT EXECUTION HISTORY\n", self._window_lines(), budgets["recent_steps"], m,
+                    query, prior="recency", collapse_repeats=True
+                )
+            )))
         
         # 5. RAG Context
         if rag_context:
-            rag_section = f"## 📚 RETRIEVED KNOWLEDGE (RAG)\n{rag_context}"
-            if len(rag_section) > budgets["rag_context"]:
-                metrics.truncations["rag_context"] = len(rag_section) - budgets["rag_context"]
-                rag_section = rag_section[:budgets["rag_context"]] + "\n...[RAG Truncated]..."
-            sections.append(("rag_context", rag_section))
-            metrics.sections_included.append("rag_context")
+            sections.append(("rag_context", self._cached_section(
+                "rag_context", (rag_context, budgets["rag_context"], query), metrics,
+                lambda m: self._compress(
+                    "rag_context", "## 📚 RETRIEVED KNOWLEDGE (RAG)\n", rag_context, budgets["rag_context"], m,
+                    query, prior="rank"
+                )
+            )))
         
         # 6. Project Structure (lowest priority, can be heavily truncated)
         if project_structure:
-            struct_section = f"## 📂 PROJECT STRUCTURE\n{project_structure}"
-            if len(struct_section) > budgets["structure"]:
-                metrics.truncations["structure"] = len(struct_section) - budgets["structure"]
-                struct_section = struct_section[:budgets["structure"]] + "\n...[Structure Truncated]..."
-            sections.append(("structure", struct_section))
-            metrics.sections_included.append("structure")
+            sections.append(("structure", self._cached_section(
+                "structure", (project_structure, budgets["structure"], query), metrics,
+                lambda m: self._compress(
+                    "structure", "## 📂 PROJECT STRUCTURE\n", project_structure, budgets["structure"], m, query
+                )
+            )))
+        metrics.sections_included = [name for name, _ in sections]
         
-        # 7. Assemble final context (sorted by priority)
-        priority_order = ["policy", "original_task", "recent_steps", "rag_context", "structure"]
-        sorted_sections = sorted(sections, key=lambda x: priority_order.index(x[0]))
-        final_context = "\n\n".join(s[1] for s in sorted_sections)
+        # 7. Assemble final context (already in priority order); reuse the last join if no section changed
+        rendered = [text for _, text in sections]
+        if self._last_join is not None and len(rendered) == len(self._last_join[0]) and all(
+            a is b for a, b in zip(rendered, self._last_join[0])
+        ):
+            final_context, actual_tokens = self._last_join[1], self._last_join[2]
+        else:
+            final_context = "\n\n".join(rendered)
+            actual_tokens = self.tokens.count(final_context)
+            self._last_join = (rendered, final_context, actual_tokens)
         
         # 8. Record metrics
+        metrics.prep_ms = round((time.perf_counter() - started) * 1000, 3)
+        self._record_metrics(metrics, final_context, actual_tokens)
+        
+        if self.verbose:
+            print(f"[Context7] Prepared context: {metrics.actual_tokens} tokens "
+                  f"(estimated {metrics.estimated_tokens}), "
+                  f"{len(metrics.sections_included)} sections, "
+                  f"{len(metrics.truncations)} truncations, "
+                  f"{metrics.sections_reused} reused in {metrics.prep_ms} ms")
+        
+        return final_context
+
+    def _fit(
+        self,
+        section: str,
+        text: str,
+        budget: int,
+        metrics: ContextMetrics,
+        prefix: str = "",
+        suffix: str = "",
+        keep: str = "head"
+    ) -> str:
+        """Cut ``text`` to ``budget`` tokens (marker included), recording dropped tokens."""
+        tokens = self.tokens.count(text)
+        if tokens <= budget:
+            return text
+        room = max(0, budget - self.tokens.count(prefix + suffix))
+        kept = self.tokens.truncate(text, room, keep=keep)
+        metrics.truncations[section] = tokens - self.tokens.count(kept)
+        return prefix + kept + suffix
+
+    def _record_metrics(self, metrics: ContextMetrics, final_context: str, actual_tokens: int) -> None:
         metrics.total_chars = len(final_context)
         metrics.estimated_tokens = metrics.total_chars // self.CHARS_PER_TOKEN
+        metrics.actual_tokens = actual_tokens
         self._last_metrics = metrics
         self._metrics_history.append(metrics)
         
         # Keep only last 100 metrics entries
         if len(self._metrics_history) > 100:
             self._metrics_history = self._metrics_history[-100:]
-        
-        if self.verbose:
-            print(f"[Context7] Prepared context: {metrics.estimated_tokens} tokens, "
-                  f"{len(metrics.sections_included)} sections, "
-                  f"{len(metrics.truncations)} truncations")
-        
-        return final_context
+
+    _SECTION_METRICS = ("truncations", "dropped_chunks", "dropped_scores", "collapsed_repeats")
+
+    def _compress(
+        self,
+        section: str,
+        header: str,
+        body: Any,
+        budget: int,
+        metrics: ContextMetrics,
+        query: str,
+        prior: str = "none",
+        collapse_repeats: bool = False
+    ) -> str:
+        """``header`` + ``body`` within ``budget`` tokens, keeping the chunks most relevant to ``query``.
+
+        ``body`` is a list of chunks or a string, split into paragraphs (or lines when it has none).
+        """
+        if isinstance(body, str):
+            separator = "\n\n" if "\n\n" in body.strip() else "\n"
+            chunks = body.split(separator)
+        else:
+            separator, chunks = "\n", body
+        full = header + separator.join(chunks)
+        tokens = self.tokens.count(full)
+        if tokens <= budget:
+            return full
+        result = self.compressor.compress(
+            chunks, query, budget - self.tokens.count(header), prior=prior, separator=separator,
+            collapse_repeats=collapse_repeats
+        )
+        text = header + result.text
+        metrics.truncations[section] = max(0, tokens - self.tokens.count(text))
+        if result.dropped_scores:
+            metrics.dropped_chunks[section] = len(result.dropped_scores)
+            metrics.dropped_scores[section] = result.dropped_scores[:10]
+        if result.collapsed:
+            metrics.collapsed_repeats[section] = result.collapsed
+        return text
+
+    def _cached_section(
+        self,
+        name: str,
+        key: Any,
+        metrics: ContextMetrics,
+        render: Callable[[ContextMetrics], str]
+    ) -> str:
+        """Rendered section for ``key``, re-rendered only when the key changed."""
+        cached = self._sections.get(name)
+        if cached is not None and cached[0] == key:
+            self._section_hits += 1
+            metrics.sections_reused += 1
+            text, recorded = cached[1], cached[2]
+        else:
+            self._section_misses += 1
+            scratch = ContextMetrics()
+            text = render(scratch)
+            recorded = {
+                attr: getattr(scratch, attr)[name]
+                for attr in self._SECTION_METRICS
+                if name in getattr(scratch, attr)
+            }
+            self._sections[name] = (key, text, recorded)
+        for attr, value in recorded.items():
+            getattr(metrics, attr)[name] = value
+        return text
+
+    def _update_window(self, messages: List[Any]) -> None:
+        """Render only messages added since the last call; rebuild if history was rewritten."""
+        seen = self._seen_messages
+        appended = (
+            0 < seen <= len(messages)
+            and messages[seen - 1] is self._last_message
+        )
+        if not appended:
+            self._window.clear()
+            self._window_chars = self._window_tokens = 0
+            seen = 0
+        new = messages[max(seen, len(messages) - self.MAX_WINDOW_STEPS):]
+        for msg in new:
+            if len(self._window) == self._window.maxlen:
+                _, chars, tokens = self._window[0]
+                self._window_chars -= chars
+                self._window_tokens -= tokens
+            entry = self._render_step(msg)
+            chars = len(entry) if entry else 0
+            tokens = self.tokens.count(entry) if entry else 0
+            self._window.append((entry, chars, tokens))
+            self._window_chars += chars
+            self._window_tokens += tokens
+        if new or not appended:
+            self._window_version += 1
+        self._seen_messages = len(messages)
+        self._last_message = messages[-1] if messages else None
+
+    def _render_step(self, msg: Any) -> Optional[str]:
+        """Step line without its number (numbers shift as the window slides), or None for non-steps."""
+        steps = self._extract_recent_steps([msg], 1)
+        if not steps:
+            return None
+        return self._format_recent_steps(steps).split(" ", 1)[1]
+
+    def _window_lines(self) -> List[str]:
+        entries = [entry for entry, _, _ in self._window if entry]
+        return [f"**Step {i}** {entry}" for i, entry in enumerate(entries, 1)]
 
     def _extract_recent_steps(self, messages: List[Any], max_steps: int) -> List[Dict[str, str]]:
         """Extract the most recent steps from message history."""
@@ -283,7 +462,9 @@ class Context7:
             "policy": "sliding_window_priority",
             "max_window_steps": self.MAX_WINDOW_STEPS,
             "priority_weights": self.PRIORITY_WEIGHTS,
-            "metrics_history_size": len(self._metrics_history)
+            "metrics_history_size": len(self._metrics_history),
+            "token_counter": self.tokens.get_stats(),
+            "incremental": self._incremental_stats()
         }
         
         if self._last_metrics:
@@ -294,10 +475,25 @@ class Context7:
             avg_tokens = sum(m.estimated_tokens for m in self._metrics_history) / len(self._metrics_history)
             avg_truncations = sum(len(m.truncations) for m in self._metrics_history) / len(self._metrics_history)
             stats["avg_tokens"] = int(avg_tokens)
+            stats["avg_actual_tokens"] = int(sum(m.actual_tokens for m in self._metrics_history) / len(self._metrics_history))
             stats["avg_truncations"] = round(avg_truncations, 2)
         
         return stats
 
+    def _incremental_stats(self) -> Dict[str, Any]:
+        lookups = self._section_hits + self._section_misses
+        history = self._metrics_history
+        return {
+            "section_hits": self._section_hits,
+            "section_misses": self._section_misses,
+            "hit_ratio": round(self._section_hits / lookups, 3) if lookups else 0.0,
+            "last_prep_ms": self._last_metrics.prep_ms if self._last_metrics else None,
+            "avg_prep_ms": round(sum(m.prep_ms for m in history) / len(history), 3) if history else None,
+            "window_entries": sum(1 for entry, _, _ in self._window if entry),
+            "window_chars": self._window_chars,
+            "window_tokens": self._window_tokens,
+        }
+
     def get_last_metrics(self) -> Optional[ContextMetrics]:
         """Get the most recent context metrics."""
         return self._last_metrics
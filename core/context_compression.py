@@ -0,0 +1,138 @@
+"""Relevance-aware compression for Context7 sections.
+
+Context7 used to cut oversized sections blindly: RAG and project structure
+lost their tail, recent steps lost their head. The compressor instead works
+on chunks (RAG hits, structure lines, step entries):
+
+1. for step/tool-output sections, chunks that are identical except for
+   numbers (the same tool output on every retry) collapse into their latest
+   occurrence, annotated with the repeat count;
+2. each chunk is scored by BM25 against the current request, plus a small
+   positional prior (retrieval rank for RAG, recency for steps);
+3. the highest-scoring chunks are packed into the token budget and emitted
+   in their original order, followed by an omission marker.
+
+Dropped chunks and their scores are returned so Context7 can report them.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.memory import bm25_scores
+
+_DIGITS_RE = re.compile(r"\d+")
+# Shorter chunks (paths, list items) are distinct entries, not repeated output
+MIN_REPEAT_CHARS = 40
+
+
+@dataclass
+class CompressionResult:
+    """Packed section text and what was left out."""
+    text: str
+    kept: int = 0
+    collapsed: int = 0
+    dropped_scores: List[float] = field(default_factory=list)
+
+
+class ContextCompressor:
+    """Packs the most relevant chunks of a section into a token budget.
+
+    Args:
+        token_counter: Counter with ``count`` and ``truncate`` (core.token_counter).
+        prior_weight: Weight of the positional prior relative to the BM25 score.
+    """
+
+    OMITTED_MARKER = "\n...[{n} less relevant chunks omitted]..."
+
+    def __init__(self, token_counter: Any, prior_weight: float = 0.3):
+        self.tokens = token_counter
+        self.prior_weight = prior_weight
+
+    def compress(
+        self,
+        chunks: List[str],
+        query: str,
+        budget: int,
+        prior: str = "none",
+        separator: str = "\n",
+        collapse_repeats: bool = False,
+    ) -> CompressionResult:
+        """Select chunks for ``budget`` tokens.
+
+        Args:
+            chunks: Section pieces in their original order.
+            query: Current request the chunks are scored against.
+            budget: Token budget for the joined result (marker included).
+            prior: "rank" favours earlier chunks, "recency" later ones, "none" neither.
+            separator: Joins kept chunks.
+            collapse_repeats: Collapse repeated step/tool output before packing.
+        """
+        collapsed = 0
+        if collapse_repeats:
+            chunks, collapsed = self._collapse_repeats(chunks)
+        if not chunks:
+            return CompressionResult(text="", collapsed=collapsed)
+
+        keyword = bm25_scores(query, chunks)
+        top = max(keyword) or 1.0
+        n = len(chunks)
+        scores = []
+        for i, kw in enumerate(keyword):
+            position = 0.0
+            if n > 1 and prior == "rank":
+                position = 1 - i / (n - 1)
+            elif n > 1 and prior == "recency":
+                position = i / (n - 1)
+            scores.append(round(kw / top + self.prior_weight * position, 4))
+
+        sizes = [self.tokens.count(c + separator) for c in chunks]
+        order = sorted(range(n), key=lambda i: scores[i], reverse=True)
+        room = budget - self.tokens.count(self.OMITTED_MARKER.format(n=n))
+        selected = set()
+        used = 0
+        for i in order:
+            if used + sizes[i] <= room:
+                selected.add(i)
+                used += sizes[i]
+
+        pieces = [chunks[i] for i in range(n) if i in selected]
+        if not pieces:
+            # Not even the best chunk fits: keep as much of it as the budget allows
+            best = order[0]
+            pieces = [self.tokens.truncate(chunks[best], max(0, room)) + "\n...[truncated]..."]
+            selected.add(best)
+
+        dropped = sorted((scores[i] for i in range(n) if i not in selected), reverse=True)
+        text = separator.join(p for p in pieces if p)
+        if dropped:
+            text += self.OMITTED_MARKER.format(n=len(dropped))
+        return CompressionResult(text=text, kept=len(selected), collapsed=collapsed, dropped_scores=dropped)
+
+    @staticmethod
+    def _collapse_repeats(chunks: List[str]) -> Tuple[List[str], int]:
+        """Keep the last of each group of chunks identical modulo numbers, tagged with the count."""
+        last: Dict[str, int] = {}
+        counts: Dict[str, int] = {}
+        keys: List[Optional[str]] = []
+        for i, chunk in enumerate(chunks):
+            if len(chunk.strip()) < MIN_REPEAT_CHARS:
+                keys.append(None)
+                continue
+            key = _DIGITS_RE.sub("#", chunk)
+            keys.append(key)
+            last[key] = i
+            counts[key] = counts.get(key, 0) + 1
+
+        out: List[str] = []
+        collapsed = 0
+        for i, (chunk, chunk_key) in enumerate(zip(chunks, keys)):
+            if chunk_key is None:
+                if chunk.strip():
+                    out.append(chunk)
+                continue
+            if last[chunk_key] != i:
+                collapsed += 1
+                continue
+            out.append(chunk if counts[chunk_key] == 1 else f"{chunk} [repeated {counts[chunk_key]}x]")
+        return out, collapsed
@@ -0,0 +1,239 @@
+"""Shared embedding service for the memory layers and the RAG pipeline.
+
+core.memory collections used Chroma's built-in ONNX model and
+system_ai.memory.chroma_store loaded its own HuggingFace copy of the same
+all-MiniLM-L6-v2 model; a single planning step embedded the same query once
+per collection. The service owns one model instance, caches vectors in an
+LRU with a TTL (keyed by a hash of the whitespace-normalized text) and embeds
+all cache misses of a call in one batch. Adapters expose it as a Chroma
+embedding function and as LangChain ``Embeddings``.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+
+def normalize_text(text: str) -> str:
+    return " ".join(str(text).split())
+
+
+def _text_key(text: str) -> str:
+    return hashlib.sha1(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+def _load_backend(name: str) -> Callable[[List[str]], Sequence[Any]]:
+    """Build the embedding model: 'onnx' (Chroma's bundled MiniLM) or 'huggingface'."""
+    if name == "huggingface":
+        from langchain_huggingface import HuggingFaceEmbeddings
+
+        model = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL)
+        embed_documents: Callable[[List[str]], Sequence[Any]] = model.embed_documents
+        return embed_documents
+
+    try:
+        from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
+    except ImportError:
+        # No chromadb (numpy vector backend): same model through sentence-transformers
+        return _load_backend("huggingface")
+
+    model = DefaultEmbeddingFunction()
+    return lambda texts: model(texts)
+
+
+class EmbeddingService:
+    """Embeds texts through one shared model with an LRU+TTL vector cache.
+
+    Args:
+        backend: Callable mapping a list of texts to vectors. Loaded lazily from
+            EMBEDDING_BACKEND (onnx | huggingface) when omitted.
+        cache_size: Maximum cached vectors (EMBEDDING_CACHE_SIZE).
+        ttl_seconds: Cached vector lifetime, 0 = no expiry (EMBEDDING_CACHE_TTL).
+    """
+
+    def __init__(
+        self,
+        backend: Optional[Callable[[List[str]], Sequence[Any]]] = None,
+        cache_size: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+    ):
+        self._backend = backend
+        self.backend_name = "custom" if backend is not None else os.getenv("EMBEDDING_BACKEND", "onnx").strip().lower()
+        self.cache_size = cache_size if cache_size is not None else int(os.getenv("EMBEDDING_CACHE_SIZE", "4096"))
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else float(os.getenv("EMBEDDING_CACHE_TTL", "3600"))
+
+        self._cache: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._backend_lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "expired": 0,
+            "evictions": 0,
+            "backend_calls": 0,
+            "texts_embedded": 0,
+            "embed_ms": 0.0,
+        }
+
+    def embed(self, texts: Sequence[str]) -> List[Any]:
+        """Vectors for ``texts`` in order; cache misses are embedded in one backend call."""
+        keys = [_text_key(t) for t in texts]
+        vectors: List[Any] = [None] * len(keys)
+        missing: "OrderedDict[str, str]" = OrderedDict()
+        now = time.monotonic()
+
+        with self._lock:
+            for i, key in enumerate(keys):
+                entry = self._cache.get(key)
+                if entry is not None and self.ttl_seconds and now - entry[0] > self.ttl_seconds:
+                    del self._cache[key]
+                    self._stats["expired"] += 1
+                    entry = None
+                if entry is not None:
+                    self._cache.move_to_end(key)
+                    vectors[i] = entry[1]
+                    self._stats["hits"] += 1
+                else:
+                    self._stats["misses"] += 1
+                    missing.setdefault(key, normalize_text(texts[i]))
+
+        if missing:
+            started = time.perf_counter()
+            computed = list(self._get_backend()(list(missing.values())))
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            fresh = dict(zip(missing.keys(), computed))
+            for i, key in enumerate(keys):
+                if vectors[i] is None:
+                    vectors[i] = fresh[key]
+
+            with self._lock:
+                self._stats["backend_calls"] += 1
+                self._stats["texts_embedded"] += len(missing)
+                self._stats["embed_ms"] += elapsed_ms
+                stamp = time.monotonic()
+                for key, vector in fresh.items():
+                    self._cache[key] = (stamp, vector)
+                    self._cache.move_to_end(key)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+                    self._stats["evictions"] += 1
+        return vectors
+
+    def embed_query(self, text: str) -> Any:
+        return self.embed([text])[0]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._stats)
+            stats["cached"] = len(self._cache)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+        stats["avg_batch"] = round(stats["texts_embedded"] / stats["backend_calls"], 2) if stats["backend_calls"] else 0.0
+        stats["embed_ms"] = round(stats["embed_ms"], 2)
+        stats["backend"] = self.backend_name
+        stats["cache_size"] = self.cache_size
+        stats["ttl_seconds"] = self.ttl_seconds
+        return stats
+
+    def as_chroma_function(self) -> Any:
+        return _get_chroma_function_class()(self)
+
+    def as_langchain(self) -> Any:
+        from langchain_core.embeddings import Embeddings
+
+        service = self
+
+        class _LangChainEmbeddings(Embeddings):
+            def embed_documents(self, texts: List[str]) -> List[List[float]]:
+                return [_as_list(v) for v in service.embed(texts)]
+
+            def embed_query(self, text: str) -> List[float]:
+                return _as_list(service.embed_query(text))
+
+        return _LangChainEmbeddings()
+
+    def _get_backend(self) -> Callable[[List[str]], Sequence[Any]]:
+        if self._backend is None:
+            with self._backend_lock:
+                if self._backend is None:
+                    self._backend = _load_backend(self.backend_name)
+        return self._backend
+
+
+def _as_list(vector: Any) -> List[float]:
+    return vector.tolist() if hasattr(vector, "tolist") else [float(x) for x in vector]
+
+
+_chroma_function_class: Optional[type] = None
+
+
+def _get_chroma_function_class() -> type:
+    """Build the Chroma adapter class on first use: importing chromadb costs ~1 s at startup."""
+    global _chroma_function_class
+    if _chroma_function_class is not None:
+        return _chroma_function_class
+    _Base: type
+    try:
+        from chromadb.api.types import EmbeddingFunction
+
+        _Base = EmbeddingFunction
+    except ImportError:  # chromadb is optional for the numpy backend and the RAG-only path
+        _Base = object
+
+    class ChromaEmbeddingFunction(_Base):
+        """Chroma embedding function backed by the shared service."""
+
+        def __init__(self, service: Optional[EmbeddingService] = None):
+            self._service = service or get_embedding_service()
+
+        def __call__(self, input):
+            return self._service.embed(list(input))
+
+        @staticmethod
+        def name() -> str:
+            # Same all-MiniLM-L6-v2 vectors as Chroma's default function, so collections
+            # created before the service existed (persisted as "default") stay compatible.
+            return "default"
+
+        def get_config(self) -> Dict[str, Any]:
+            return {}
+
+        @staticmethod
+        def build_from_config(config: Dict[str, Any]) -> "ChromaEmbeddingFunction":
+            return ChromaEmbeddingFunction()
+
+        def is_legacy(self) -> bool:
+            return False
+
+    _chroma_function_class = ChromaEmbeddingFunction
+    return _chroma_function_class
+
+
+def __getattr__(name: str) -> Any:
+    if name == "ChromaEmbeddingFunction":
+        return _get_chroma_function_class()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+_embedding_service: Optional[EmbeddingService] = None
+_embedding_service_lock = threading.Lock()
+
+
+def get_embedding_service() -> EmbeddingService:
+    """Get the process-wide embedding service."""
+    global _embedding_service
+    if _embedding_service is None:
+        with _embedding_service_lock:
+            if _embedding_service is None:
+                _embedding_service = EmbeddingService()
+    return _embedding_service
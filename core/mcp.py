@@ -1,3 +1,6 @@
+import bisect
+import hashlib
+import inspect
 import json
 import time
 import asyncio
@@ -5,8 +8,7 @@ import threading
 import os
 import contextlib
 from typing import Dict, Any, Callable, List, Optional, Union
-from mcp import ClientSession, StdioServerParameters
-from mcp.client.stdio import stdio_client
+from core.mcp_pool import ExternalMCPProvider, MCPProviderPool
 
 # Import all tools
 from system_ai.tools.automation import (
@@ -43,68 +45,96 @@ from system_ai.tools.browser import (
     browser_close
 )
 
-class ExternalMCPProvider:
-    """Handles connection to an external MCP server via stdio."""
-    def __init__(self, name: str, command: str, args: List[str]):
-        self.name = name
-        self.command = command
-        self.args = args
-        self._server_params = StdioServerParameters(command=command, args=args, env=os.environ.copy())
-        self._tools: Dict[str, Any] = {}
-        self._loop = asyncio.new_event_loop()
-        self._thread = threading.Thread(target=self._run_loop, daemon=True)
-        self._thread.start()
-        self._connected = False
-        
-    def _run_loop(self):
-        asyncio.set_event_loop(self._loop)
-        self._loop.run_forever()
+class _ToolBinder:
+    """Argument binding for one tool, derived from its signature once at registration."""
 
-    def connect(self):
-        if self._connected:
-            return
-        future = asyncio.run_coroutine_threadsafe(self._async_connect(), self._loop)
-        future.result(timeout=30)
-        self._connected = True
-
-    async def _async_connect(self):
-        self._exit_stack = contextlib.AsyncExitStack()
-        read, write = await self._exit_stack.enter_async_context(stdio_client(self._server_params))
-        self._session = await self._exit_stack.enter_async_context(ClientSession(read, write))
-        await self._session.initialize()
-        
-        # List tools
-        tools_list = await self._session.list_tools()
-        for tool in tools_list.tools:
-            self._tools[tool.name] = tool
-        
-    def execute(self, tool_name: str, args: Dict[str, Any]) -> Any:
-        if not self._connected:
-            self.connect()
-        future = asyncio.run_coroutine_threadsafe(self._async_execute(tool_name, args), self._loop)
-        return future.result(timeout=60)
+    __slots__ = ("params", "has_varkw", "pass_args_as", "wants_allow")
 
-    async def _async_execute(self, tool_name: str, args: Dict[str, Any]) -> Any:
+    def __init__(self, func: Callable):
         try:
-            result = await self._session.call_tool(tool_name, args)
-            # Standardize output for Trinity (JSON string or dict)
-            content = []
-            result_content = getattr(result, "content", []) if result is not None else []
-            for item in result_content if result_content else []:
-                if item is not None and hasattr(item, "text"):
-                    content.append(item.text)
-                elif item is not None and hasattr(item, "data"):
-                    # Handle image/binary data if needed
-                    content.append(f"[Binary Data: {len(item.data)} bytes]")
-            
-            return {
-                "tool": tool_name,
-                "status": "success" if not result.isError else "error",
-                "output": "\n".join(content) if content else "",
-                "raw": str(result)
-            }
-        except Exception as e:
-            return {"tool": tool_name, "status": "error", "error": str(e)}
+            sig = inspect.signature(func)
+            params = sig.parameters
+        except (TypeError, ValueError):
+            # Builtins / C callables without a signature: pass everything through
+            params = {}
+            self.has_varkw = True
+        else:
+            self.has_varkw = any(p.kind == inspect.Parameter.VAR_KEYWORD for p in params.values())
+        self.params = frozenset(params)
+        # TUI Tool Convention: a tool that declares 'args' (or '_args') receives the full dictionary
+        self.pass_args_as = "args" if "args" in self.params else ("_args" if "_args" in self.params else None)
+        self.wants_allow = "allow" in self.params
+
+    def bind(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        # Special handling for 'allow' kwarg in executor tools if not present but needed
+        if self.wants_allow and "allow" not in args:
+            args["allow"] = True
+
+        call_kwargs: Dict[str, Any] = {}
+        if self.pass_args_as:
+            call_kwargs[self.pass_args_as] = args
+
+        if self.has_varkw:
+            # If function has **kwargs, pass everything
+            for k, v in args.items():
+                # Avoid overwriting the injected 'args' parameter if it exists
+                if k == "args" and self.pass_args_as == "args":
+                    continue
+                call_kwargs[k] = v
+        else:
+            # Filter to supported params
+            for k, v in args.items():
+                if k in self.params:
+                    call_kwargs[k] = v
+        return call_kwargs
+
+
+class _LatencyHistogram:
+    """Fixed-bucket call latency histogram for one tool."""
+
+    BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+    __slots__ = ("counts", "calls", "errors", "total_ms", "max_ms")
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BUCKETS_MS) + 1)
+        self.calls = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, ms: float, error: bool = False) -> None:
+        self.counts[bisect.bisect_left(self.BUCKETS_MS, ms)] += 1
+        self.calls += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        if error:
+            self.errors += 1
+
+    def percentile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th percentile."""
+        target = q * self.calls
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= target:
+                return float(self.BUCKETS_MS[i]) if i < len(self.BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+    def to_dict(self) -> Dict[str, Any]:
+        buckets = {f"le_{b}": c for b, c in zip(self.BUCKETS_MS, self.counts) if c}
+        if self.counts[-1]:
+            buckets["le_inf"] = self.counts[-1]
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "avg_ms": round(self.total_ms / self.calls, 2) if self.calls else 0.0,
+            "max_ms": round(self.max_ms, 2),
+            "p50_ms": self.percentile(0.5),
+            "p95_ms": self.percentile(0.95),
+            "buckets": buckets,
+        }
+
 
 class MCPToolRegistry:
     """
@@ -115,10 +145,26 @@ class MCPToolRegistry:
     def __init__(self):
         self._tools: Dict[str, Callable] = {}
         self._descriptions: Dict[str, str] = {}
+        self._binders: Dict[str, _ToolBinder] = {}
+        self._latency: Dict[str, _LatencyHistogram] = {}
+        self._stats_lock = threading.Lock()
+        self._serialization = {"results": 0, "bytes": 0, "spilled": 0, "spilled_bytes": 0}
+        # Result encoding: compact JSON unless MCP_RESULT_FORMAT=pretty; results longer than
+        # MCP_RESULT_MAX_CHARS (0 = unlimited) are written to MCP_SPILL_DIR and replaced by a reference.
+        self.result_format = os.getenv("MCP_RESULT_FORMAT", "compact").strip().lower()
+        self.result_max_chars = int(os.getenv("MCP_RESULT_MAX_CHARS", "0") or 0)
+        self.spill_dir = os.path.expanduser(os.getenv("MCP_SPILL_DIR", "~/.system_cli/tool_outputs"))
         self._external_providers: Dict[str, ExternalMCPProvider] = {}
         self._external_tools_map: Dict[str, str] = {} # tool_name -> provider_name
+        self._provider_pool = MCPProviderPool()
+        # External servers are spawned on first external-tool use (or start_external_providers()),
+        # so building a registry does not start processes
+        self._external_started = False
+        self._external_lock = threading.Lock()
+        self._local_version = 0
+        # (local version, pool version) -> tool definitions / prompt listing
+        self._defs_cache: Optional[tuple] = None
         self._register_defaults()
-        self._register_external_mcp()
         
     def _register_defaults(self):
         # Foundation Tools
@@ -410,6 +456,16 @@ class MCPToolRegistry:
             "Save last response to .last_response.txt and regenerate project_structure_final.txt. Args: text (str)"
         )
 
+    def start_external_providers(self) -> None:
+        """Register external MCP servers and start connecting in the background (idempotent)."""
+        if self._external_started:
+            return
+        with self._external_lock:
+            if self._external_started:
+                return
+            self._register_external_mcp()
+            self._external_started = True
+
     def _register_external_mcp(self):
         """Register external MCP servers (Playwright & PyAutoGUI)."""
         import platform
@@ -426,119 +482,176 @@ class MCPToolRegistry:
             try:
                 provider = ExternalMCPProvider(name, cmd, args)
                 self._external_providers[name] = provider
-                # Lazy loading: we don't connect yet, just register the intent
-                # Note: list_tools() will trigger connection if needed to get descriptions
+                self._provider_pool.add(provider)
             except Exception as e:
                 print(f"[MCP] Failed to initialize external provider {name}: {e}")
 
+        # Connect in the background; prompts only read the pool's cached tool snapshot
+        self._provider_pool.start()
+
     def register_tool(self, name: str, func: Callable, description: str):
         self._tools[name] = func
         self._descriptions[name] = description
+        self._binders[name] = _ToolBinder(func)
+        self._local_version += 1
 
     def get_tool(self, name: str) -> Optional[Callable]:
         return self._tools.get(name)
 
-    def list_tools(self) -> str:
-        """Returns a formatted list of tools for the System Prompt."""
-        lines = []
+    @property
+    def tools_version(self) -> tuple:
+        """Changes whenever a local tool is registered or an external provider's tools change."""
+        return (self._local_version, self._provider_pool.version)
+
+    def _tool_catalog(self) -> tuple:
+        """(definitions, prompt listing) for the current tools version, rebuilt only on change."""
+        self.start_external_providers()
+        version = self.tools_version
+        cached = self._defs_cache
+        if cached is not None and cached[0] == version:
+            return cached[1], cached[2]
+
+        defs: List[Dict[str, str]] = []
+        lines: List[str] = []
         # Local tools
         for name, desc in self._descriptions.items():
+            defs.append({"name": name, "description": desc})
             lines.append(f"- {name}: {desc}")
-        
-        # External tools
-        for p_name, provider in self._external_providers.items():
-            try:
-                provider.connect()
-                for t_name, tool in provider._tools.items():
-                    # Prefix external tools to avoid collisions (e.g. playwright.browser_snapshot)
-                    prefixed_name = f"{p_name}.{t_name}"
-                    self._external_tools_map[prefixed_name] = p_name
-                    lines.append(f"- {prefixed_name}: {tool.description}")
-            except Exception as e:
-                lines.append(f"- [Provider Offline] {p_name}: {e}")
-                
-        return "\n".join(lines)
+
+        # External tools (cached snapshot of online providers; never blocks on a server)
+        for p_name, tools in self._provider_pool.tool_snapshot().items():
+            for t_name, description in tools:
+                # Prefix external tools to avoid collisions (e.g. playwright.browser_snapshot)
+                prefixed_name = f"{p_name}.{t_name}"
+                self._external_tools_map[prefixed_name] = p_name
+                defs.append({"name": prefixed_name, "description": description})
+                lines.append(f"- {prefixed_name}: {description}")
+        for p_name, reason in self._provider_pool.unavailable().items():
+            lines.append(f"- [Provider Offline] {p_name}: {reason}")
+
+        listing = "\n".join(lines)
+        self._defs_cache = (version, defs, listing)
+        return defs, listing
+
+    def list_tools(self) -> str:
+        """Returns a formatted list of tools for the System Prompt."""
+        return self._tool_catalog()[1]
 
     def get_all_tool_definitions(self) -> List[Dict[str, str]]:
         """Returns a list of tool definitions for LLM binding."""
-        defs = []
-        
-        # Local tools
-        for name, desc in self._descriptions.items():
-            defs.append({"name": name, "description": desc})
-            
-        # External tools
-        for p_name, provider in self._external_providers.items():
-            try:
-                # Ensure connected to get tools
-                if not provider._connected:
-                    provider.connect()
-                
-                for t_name, tool in provider._tools.items():
-                    prefixed_name = f"{p_name}.{t_name}"
-                    # Use schema if available, otherwise just description
-                    defs.append({
-                        "name": prefixed_name,
-                        "description": tool.description
-                    })
-            except Exception as e:
-                print(f"[MCP] Failed to get tools from provider {p_name}: {e}")
-                
-        return defs
+        return list(self._tool_catalog()[0])
+
+    def get_provider_stats(self) -> Dict[str, Any]:
+        """Connection pool health: per-provider status, circuit state, pings and call counts."""
+        return self._provider_pool.get_stats()
 
     def execute(self, tool_name: str, args: Dict[str, Any]) -> str:
         """Executes a tool safely and returns a string result."""
+        if tool_name not in self._tools and tool_name not in self._external_tools_map:
+            # First external-tool use before any listing: start providers and pick up their tools
+            self.start_external_providers()
+            self._tool_catalog()
         # Check external tools first
         provider_name = self._external_tools_map.get(tool_name)
         if provider_name and provider_name in self._external_providers:
-            provider = self._external_providers[provider_name]
+            started = time.perf_counter()
             try:
                 # Strip prefix if present (e.g. "playwright.browser_navigate" -> "browser_navigate")
                 actual_name = tool_name.split(".", 1)[-1] if "." in tool_name else tool_name
-                res = provider.execute(actual_name, args)
-                return json.dumps(res, indent=2, ensure_ascii=False)
+                res = self._provider_pool.execute(provider_name, actual_name, args)
+                self._observe(tool_name, started)
+                return self._serialize_result(tool_name, res)
             except Exception as e:
+                self._observe(tool_name, started, error=True)
                 return f"Error executing external tool '{tool_name}': {str(e)}"
 
         func = self._tools.get(tool_name)
         if not func:
             return f"Error: Tool '{tool_name}' not found."
-        
+
+        started = time.perf_counter()
         try:
-            # Inspection of function signature to avoid TypeError: unexpected keyword argument
-            import inspect
-            sig = inspect.signature(func)
-            
-            # Special handling for 'allow' kwarg in executor tools if not present but needed
-            if "allow" in sig.parameters and "allow" not in args:
-                args["allow"] = True
-            
-            call_kwargs = {}
-            
-            # TUI Tool Convention: If the function explicitly requests 'args', pass the full dictionary
-            if "args" in sig.parameters:
-                call_kwargs["args"] = args
-            elif "_args" in sig.parameters:
-                call_kwargs["_args"] = args
-            
-            # Filter args to only those supported by the function, unless it has **kwargs
-            has_varkw = any(p.kind == inspect.Parameter.VAR_KEYWORD for p in sig.parameters.values())
-            
-            if has_varkw:
-                # If function has **kwargs, pass everything
-                for k, v in args.items():
-                    # Avoid overwriting the injected 'args' parameter if it exists
-                    if k == "args" and "args" in sig.parameters:
-                        continue
-                    call_kwargs[k] = v
-            else:
-                # Filter to supported params
-                for k, v in args.items():
-                    if k in sig.parameters:
-                        call_kwargs[k] = v
-            
-            result = func(**call_kwargs)
-                
-            return json.dumps(result, indent=2, ensure_ascii=False)
+            binder = self._binders.get(tool_name)
+            if binder is None:
+                # Tool inserted into _tools directly instead of via register_tool
+                binder = self._binders[tool_name] = _ToolBinder(func)
+            result = func(**binder.bind(args))
         except Exception as e:
+            self._observe(tool_name, started, error=True)
             return f"Error executing '{tool_name}': {str(e)}"
+        self._observe(tool_name, started, error=isinstance(result, dict) and result.get("status") == "error")
+
+        try:
+            return self._serialize_result(tool_name, result)
+        except Exception as e:
+            return f"Error executing '{tool_name}': {str(e)}"
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Per-tool call latency histograms, result serialization totals and provider health."""
+        with self._stats_lock:
+            tools = {name: hist.to_dict() for name, hist in self._latency.items()}
+            serialization = dict(self._serialization)
+        return {
+            "tools": tools,
+            "serialization": {
+                **serialization,
+                "format": self.result_format,
+                "max_chars": self.result_max_chars,
+            },
+            "providers": self.get_provider_stats(),
+        }
+
+    def _observe(self, tool_name: str, started: float, error: bool = False) -> None:
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._stats_lock:
+            hist = self._latency.get(tool_name)
+            if hist is None:
+                hist = self._latency[tool_name] = _LatencyHistogram()
+            hist.observe(elapsed_ms, error=error)
+
+    def _serialize_result(self, tool_name: str, result: Any) -> str:
+        if self.result_format == "pretty":
+            text = json.dumps(result, indent=2, ensure_ascii=False)
+        else:
+            # No indentation, but keep the default ": " separator: trinity/tui match '"status": "error"' in results
+            text = json.dumps(result, ensure_ascii=False)
+
+        spilled = False
+        if self.result_max_chars and len(text) > self.result_max_chars:
+            text = self._spill(tool_name, result, text)
+            spilled = True
+
+        with self._stats_lock:
+            self._serialization["results"] += 1
+            self._serialization["bytes"] += len(text)
+            if spilled:
+                self._serialization["spilled"] += 1
+        return text
+
+    def _spill(self, tool_name: str, result: Any, text: str) -> str:
+        """Write an oversized result to disk and return a compact reference with a preview."""
+        digest = hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+        safe_name = "".join(c if c.isalnum() or c in "._-" else "_" for c in tool_name)
+        path = os.path.join(self.spill_dir, f"{safe_name}_{digest}.json")
+        try:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            if not os.path.exists(path):
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(text)
+        except OSError as e:
+            # Could not spill: fall back to a hard truncation so the caller still gets bounded output
+            return text[: self.result_max_chars] + f"... [truncated {len(text) - self.result_max_chars} chars: {e}]"
+
+        with self._stats_lock:
+            self._serialization["spilled_bytes"] += len(text)
+        preview_len = max(0, min(2000, self.result_max_chars // 2))
+        reference = {
+            "tool": tool_name,
+            "status": result.get("status", "success") if isinstance(result, dict) else "success",
+            "truncated": True,
+            "size_chars": len(text),
+            "full_output_path": path,
+            "preview": text[:preview_len],
+        }
+        # Default separators, as in _serialize_result: callers match '"status": "error"'
+        return json.dumps(reference, ensure_ascii=False)
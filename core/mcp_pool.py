@@ -0,0 +1,402 @@
+"""External MCP providers and the background connection pool that keeps them warm.
+
+The pool connects every provider once in the background at startup, caches each
+provider's tool list under a version stamp, pings online providers periodically
+and puts failing ones behind a circuit breaker with exponential backoff.
+Prompt construction only ever reads the cached snapshot, so an offline server
+never blocks a Tetyana turn.
+
+Configuration (env):
+- MCP_HEALTH_INTERVAL: seconds between health pings (default 30)
+- MCP_RETRY_BACKOFF / MCP_RETRY_BACKOFF_MAX: reconnect backoff base/cap (default 5 / 300)
+- MCP_CONNECT_TIMEOUT: connect + list_tools timeout (default 30)
+"""
+
+import asyncio
+import contextlib
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+
+class ExternalMCPProvider:
+    """Handles connection to an external MCP server via stdio."""
+    def __init__(self, name: str, command: str, args: List[str]):
+        self.name = name
+        self.command = command
+        self.args = args
+        self._server_params = StdioServerParameters(command=command, args=args, env=os.environ.copy())
+        self._tools: Dict[str, Any] = {}
+        self._session: Optional[ClientSession] = None
+        self._session_task: Optional[asyncio.Future] = None
+        self._stop_event: Optional[asyncio.Event] = None
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run_loop, daemon=True)
+        self._thread.start()
+        self._connected = False
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+    def connect(self, timeout: float = 30):
+        if self._connected:
+            return
+        future = asyncio.run_coroutine_threadsafe(self._async_connect(timeout), self._loop)
+        future.result(timeout=timeout + 5)
+        self._connected = True
+
+    def ping(self, timeout: float = 5) -> float:
+        """Round-trip a protocol ping; returns latency in ms."""
+        if not self._connected or self._session is None:
+            raise ConnectionError(f"MCP provider '{self.name}' is not connected")
+        start = time.perf_counter()
+        future = asyncio.run_coroutine_threadsafe(
+            asyncio.wait_for(self._session.send_ping(), timeout), self._loop
+        )
+        future.result(timeout=timeout + 1)
+        return (time.perf_counter() - start) * 1000
+
+    def close(self, timeout: float = 5) -> None:
+        """Shut the session down (the stdio server process exits with it)."""
+        self._connected = False
+        if self._stop_event is None:
+            return
+        future = asyncio.run_coroutine_threadsafe(self._async_close(), self._loop)
+        try:
+            future.result(timeout=timeout)
+        except Exception:
+            pass
+
+    async def _async_connect(self, timeout: float):
+        # The stdio client and session live in one long-running task so that
+        # their context managers are entered and exited in the same task.
+        self._stop_event = asyncio.Event()
+        ready = self._loop.create_future()
+        self._session_task = asyncio.ensure_future(self._session_main(ready, self._stop_event))
+        try:
+            await asyncio.wait_for(asyncio.shield(ready), timeout)
+        except BaseException:
+            ready.cancel()
+            self._session_task.cancel()
+            raise
+
+    async def _session_main(self, ready: asyncio.Future, stop_event: asyncio.Event):
+        try:
+            async with contextlib.AsyncExitStack() as stack:
+                read, write = await stack.enter_async_context(stdio_client(self._server_params))
+                session = await stack.enter_async_context(ClientSession(read, write))
+                await session.initialize()
+
+                # List tools
+                tools_list = await session.list_tools()
+                self._tools = {tool.name: tool for tool in tools_list.tools}
+                self._session = session
+                ready.set_result(True)
+                await stop_event.wait()
+        except BaseException as e:
+            if not ready.done():
+                ready.set_exception(e if isinstance(e, Exception) else ConnectionError(str(e)))
+        finally:
+            self._session = None
+            self._connected = False
+
+    async def _async_close(self):
+        if self._stop_event is not None:
+            self._stop_event.set()
+        if self._session_task is not None:
+            with contextlib.suppress(BaseException):
+                await asyncio.wait_for(self._session_task, 5)
+
+    def execute(self, tool_name: str, args: Dict[str, Any], timeout: float = 60) -> Any:
+        if not self._connected:
+            self.connect()
+        future = asyncio.run_coroutine_threadsafe(self._async_execute(tool_name, args), self._loop)
+        return future.result(timeout=timeout)
+
+    async def _async_execute(self, tool_name: str, args: Dict[str, Any]) -> Any:
+        session = self._session
+        if session is None:
+            raise ProviderUnavailable(f"MCP provider '{self.name}' is not connected")
+        try:
+            result = await session.call_tool(tool_name, args)
+            # Standardize output for Trinity (JSON string or dict)
+            content = []
+            result_content = getattr(result, "content", []) if result is not None else []
+            for item in result_content if result_content else []:
+                if item is not None and hasattr(item, "text"):
+                    content.append(item.text)
+                elif item is not None and hasattr(item, "data"):
+                    # Handle image/binary data if needed
+                    content.append(f"[Binary Data: {len(item.data)} bytes]")
+
+            is_error = getattr(result, "isError", getattr(result, "is_error", False))
+            return {
+                "tool": tool_name,
+                "status": "success" if not is_error else "error",
+                "output": "\n".join(content) if content else "",
+                "raw": str(result)
+            }
+        except Exception as e:
+            return {"tool": tool_name, "status": "error", "error": str(e)}
+
+
+class ProviderUnavailable(RuntimeError):
+    """Raised when a call targets a provider whose circuit is open."""
+
+
+@dataclass
+class _ProviderHealth:
+    status: str = "pending"  # pending | connecting | online | offline
+    tools: List[Tuple[str, str]] = field(default_factory=list)
+    last_error: str = ""
+    consecutive_failures: int = 0
+    next_attempt_at: float = 0.0
+    last_check_at: float = 0.0
+    last_ping_ms: Optional[float] = None
+    connects: int = 0
+    connect_failures: int = 0
+    pings: int = 0
+    ping_failures: int = 0
+    calls: int = 0
+    call_failures: int = 0
+    rejected_calls: int = 0
+
+
+class MCPProviderPool:
+    """Keeps external MCP providers connected without blocking callers."""
+
+    DEFAULT_HEALTH_INTERVAL = 30.0
+    DEFAULT_BACKOFF_BASE = 5.0
+    DEFAULT_BACKOFF_CAP = 300.0
+    DEFAULT_CONNECT_TIMEOUT = 30.0
+    DEFAULT_PING_TIMEOUT = 5.0
+    DEFAULT_CALL_TIMEOUT = 60.0
+    DEFAULT_FAILURE_THRESHOLD = 3
+
+    def __init__(
+        self,
+        health_interval: Optional[float] = None,
+        backoff_base: Optional[float] = None,
+        backoff_cap: Optional[float] = None,
+        connect_timeout: Optional[float] = None,
+        ping_timeout: Optional[float] = None,
+        failure_threshold: Optional[int] = None,
+    ) -> None:
+        self.health_interval = health_interval or float(os.getenv("MCP_HEALTH_INTERVAL", self.DEFAULT_HEALTH_INTERVAL))
+        self.backoff_base = backoff_base or float(os.getenv("MCP_RETRY_BACKOFF", self.DEFAULT_BACKOFF_BASE))
+        self.backoff_cap = backoff_cap or float(os.getenv("MCP_RETRY_BACKOFF_MAX", self.DEFAULT_BACKOFF_CAP))
+        self.connect_timeout = connect_timeout or float(os.getenv("MCP_CONNECT_TIMEOUT", self.DEFAULT_CONNECT_TIMEOUT))
+        self.ping_timeout = ping_timeout or self.DEFAULT_PING_TIMEOUT
+        self.failure_threshold = failure_threshold or self.DEFAULT_FAILURE_THRESHOLD
+        self._providers: Dict[str, ExternalMCPProvider] = {}
+        self._health: Dict[str, _ProviderHealth] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._settled = threading.Condition(self._lock)
+        self._thread: Optional[threading.Thread] = None
+        self._version = 0
+
+    @property
+    def version(self) -> int:
+        """Bumped whenever the set of online providers or their tools changes."""
+        return self._version
+
+    @property
+    def providers(self) -> Dict[str, ExternalMCPProvider]:
+        return dict(self._providers)
+
+    def add(self, provider: ExternalMCPProvider) -> None:
+        with self._lock:
+            self._providers[provider.name] = provider
+            self._health[provider.name] = _ProviderHealth()
+        self._wake.set()
+
+    def start(self) -> None:
+        """Start background connect / health-check loop (idempotent)."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="mcp-provider-pool", daemon=True)
+        self._thread.start()
+
+    def stop(self, close_providers: bool = True) -> None:
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        if close_providers:
+            for provider in list(self._providers.values()):
+                provider.close()
+
+    def wait_until_settled(self, timeout: float) -> bool:
+        """Block until every provider finished its first connect attempt (for CLI warm-up and tests)."""
+        deadline = time.monotonic() + timeout
+        with self._settled:
+            while any(h.status in ("pending", "connecting") for h in self._health.values()):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._settled.wait(remaining)
+        return True
+
+    def tool_snapshot(self) -> Dict[str, List[Tuple[str, str]]]:
+        """Cached (name, description) lists of online providers; never blocks on I/O."""
+        with self._lock:
+            return {name: list(h.tools) for name, h in self._health.items() if h.status == "online"}
+
+    def unavailable(self) -> Dict[str, str]:
+        """Providers that are not online, with a short reason."""
+        with self._lock:
+            out = {}
+            for name, h in self._health.items():
+                if h.status == "online":
+                    continue
+                if h.status in ("pending", "connecting"):
+                    out[name] = "connecting"
+                else:
+                    retry_in = max(0.0, h.next_attempt_at - time.time())
+                    out[name] = f"{h.last_error or 'offline'} (retry in {retry_in:.0f}s)"
+            return out
+
+    def is_available(self, name: str) -> bool:
+        with self._lock:
+            h = self._health.get(name)
+            return h is not None and h.status == "online"
+
+    def execute(self, name: str, tool_name: str, args: Dict[str, Any], timeout: Optional[float] = None) -> Any:
+        """Call a tool on a provider; fails fast while its circuit is open."""
+        with self._lock:
+            h = self._health.get(name)
+            provider = self._providers.get(name)
+            if h is None or provider is None:
+                raise ProviderUnavailable(f"Unknown MCP provider '{name}'")
+            if h.status != "online":
+                h.rejected_calls += 1
+                raise ProviderUnavailable(f"MCP provider '{name}' is offline: {h.last_error or h.status}")
+            h.calls += 1
+        try:
+            return provider.execute(tool_name, args, timeout=timeout or self.DEFAULT_CALL_TIMEOUT)
+        except Exception as e:
+            with self._lock:
+                h.call_failures += 1
+            self._record_failure(name, e)
+            raise
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            now = time.time()
+            providers = {}
+            for name, h in self._health.items():
+                providers[name] = {
+                    "status": h.status,
+                    "tools": len(h.tools),
+                    "last_error": h.last_error,
+                    "consecutive_failures": h.consecutive_failures,
+                    "retry_in_s": round(max(0.0, h.next_attempt_at - now), 1) if h.status == "offline" else 0.0,
+                    "last_ping_ms": round(h.last_ping_ms, 2) if h.last_ping_ms is not None else None,
+                    "connects": h.connects,
+                    "connect_failures": h.connect_failures,
+                    "pings": h.pings,
+                    "ping_failures": h.ping_failures,
+                    "calls": h.calls,
+                    "call_failures": h.call_failures,
+                    "rejected_calls": h.rejected_calls,
+                }
+            return {"version": self._version, "providers": providers}
+
+    # ----- background loop -----
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            self._wake.clear()
+            now = time.time()
+            next_wake = now + self.health_interval
+            with self._lock:
+                items = list(self._health.items())
+            for name, h in items:
+                if h.status in ("pending", "offline") and now >= h.next_attempt_at:
+                    self._start_connect(name)
+                elif h.status == "online" and now - h.last_check_at >= self.health_interval:
+                    self._ping(name)
+                if h.status == "offline":
+                    next_wake = min(next_wake, h.next_attempt_at)
+                elif h.status == "online":
+                    next_wake = min(next_wake, h.last_check_at + self.health_interval)
+            self._wake.wait(timeout=max(0.05, next_wake - time.time()))
+
+    def _start_connect(self, name: str) -> None:
+        with self._lock:
+            h = self._health[name]
+            if h.status == "connecting":
+                return
+            h.status = "connecting"
+        # Each connect gets its own thread so a hanging server cannot delay the others.
+        threading.Thread(target=self._connect, args=(name,), name=f"mcp-connect-{name}", daemon=True).start()
+
+    def _connect(self, name: str) -> None:
+        provider = self._providers[name]
+        try:
+            provider.connect(timeout=self.connect_timeout)
+            tools = [(t_name, getattr(tool, "description", "") or "") for t_name, tool in provider._tools.items()]
+        except Exception as e:
+            self._record_failure(name, e, connect=True)
+            return
+        with self._settled:
+            h = self._health[name]
+            h.status = "online"
+            h.connects += 1
+            h.consecutive_failures = 0
+            h.last_error = ""
+            h.last_check_at = time.time()
+            h.tools = tools
+            self._version += 1
+            self._settled.notify_all()
+        self._wake.set()
+
+    def _ping(self, name: str) -> None:
+        provider = self._providers[name]
+        try:
+            latency_ms = provider.ping(timeout=self.ping_timeout)
+        except Exception as e:
+            with self._lock:
+                self._health[name].ping_failures += 1
+            self._record_failure(name, e)
+            return
+        with self._lock:
+            h = self._health[name]
+            h.pings += 1
+            h.last_ping_ms = latency_ms
+            h.last_check_at = time.time()
+            h.consecutive_failures = 0
+
+    def _record_failure(self, name: str, error: Exception, connect: bool = False) -> None:
+        """Count a failure; open the circuit on connect errors or repeated call/ping errors."""
+        trip = False
+        with self._settled:
+            h = self._health[name]
+            h.consecutive_failures += 1
+            h.last_error = str(error) or type(error).__name__
+            h.last_check_at = time.time()
+            if connect:
+                h.connect_failures += 1
+            if connect or h.consecutive_failures >= self.failure_threshold:
+                was_online = h.status == "online"
+                h.status = "offline"
+                attempts = max(1, h.consecutive_failures if connect else 1)
+                delay = min(self.backoff_cap, self.backoff_base * (2 ** (attempts - 1)))
+                h.next_attempt_at = time.time() + delay
+                if was_online:
+                    h.tools = []
+                    self._version += 1
+                    trip = True
+                self._settled.notify_all()
+        if trip:
+            self._providers[name].close()
+        self._wake.set()
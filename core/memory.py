@@ -9,27 +9,146 @@ Original collections preserved for backward compatibility:
 - ui_patterns, strategies, user_habits, knowledge_base
 """
 
+import atexit
+import hashlib
+import math
 import os
+import re
 from typing import List, Dict, Any, Optional
-from dataclasses import dataclass, field
 from datetime import datetime
 import json
 import time
 import threading
+from concurrent.futures import ThreadPoolExecutor, wait
 
+from core.embeddings import get_embedding_service
+from core.memory_writer import MemoryWriteBuffer
+from core.working_memory import WorkingMemoryItem, WorkingMemoryStore
 
-@dataclass
-class WorkingMemoryItem:
-    """Item stored in volatile working memory."""
-    content: str
-    context: str
-    priority: int = 0
-    timestamp: datetime = field(default_factory=datetime.now)
-    ttl_seconds: int = 3600  # 1 hour default TTL
+
+def make_memory_id(prefix: str, content: str, *scope: str) -> str:
+    """Deterministic memory id: the same content in the same scope always maps to the same id.
+
+    Writes are upserts keyed by this id, so identical content is stored once and
+    concurrent writes of different content can never collide (unlike the old
+    second/millisecond timestamp ids).
+    """
+    h = hashlib.sha1()
+    for part in scope:
+        h.update(part.encode("utf-8"))
+        h.update(b"\x00")
+    h.update(content.encode("utf-8"))
+    return f"{prefix}_{h.hexdigest()[:24]}"
+
+
+HYBRID_POOL_FACTOR = 4
+# Metadata every stored memory carries, so status/confidence filters can run in the vector store
+METADATA_DEFAULTS: Dict[str, Any] = {"status": "success", "confidence": 1.0}
+_BM25_TOKEN_RE = re.compile(r"\w+")
+
+
+def build_where(where: Optional[Dict[str, Any]] = None, min_confidence: Optional[float] = None) -> Optional[Dict[str, Any]]:
+    """
+    Combine a metadata filter and a confidence floor into one vector-store filter.
     
-    def is_expired(self) -> bool:
-        elapsed = (datetime.now() - self.timestamp).total_seconds()
-        return elapsed > self.ttl_seconds
+    Multi-key dicts ({"status": "success", "type": "rule"}) become an explicit
+    $and, since Chroma accepts a single expression per filter level.
+    """
+    clauses: List[Dict[str, Any]] = []
+    if where:
+        for key, cond in where.items():
+            if key == "$and":
+                clauses.extend(cond)
+            else:
+                clauses.append({key: cond})
+    if min_confidence is not None:
+        clauses.append({"confidence": {"$gte": float(min_confidence)}})
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+def bm25_scores(query: str, documents: List[str], k1: float = 1.5, b: float = 0.75) -> List[float]:
+    """Okapi BM25 of ``query`` against each document, with IDF taken over ``documents``."""
+    terms = set(_BM25_TOKEN_RE.findall(query.lower()))
+    docs = [_BM25_TOKEN_RE.findall((d or "").lower()) for d in documents]
+    if not terms or not docs:
+        return [0.0] * len(documents)
+    avg_len = sum(len(d) for d in docs) / len(docs) or 1.0
+    n = len(docs)
+    df = {t: sum(1 for d in docs if t in d) for t in terms}
+    scores = []
+    for tokens in docs:
+        counts: Dict[str, int] = {}
+        for tok in tokens:
+            if tok in terms:
+                counts[tok] = counts.get(tok, 0) + 1
+        score = 0.0
+        for t, tf in counts.items():
+            idf = math.log(1 + (n - df[t] + 0.5) / (df[t] + 0.5))
+            score += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * len(tokens) / avg_len))
+        scores.append(score)
+    return scores
+
+
+def hybrid_rerank(query: str, items: List[Dict[str, Any]], alpha: Optional[float] = None) -> List[Dict[str, Any]]:
+    """
+    Rank vector hits by alpha * similarity + (1 - alpha) * BM25, both scaled to [0, 1]
+    within the candidate pool. Adds a "score" key to each item.
+    """
+    if not items:
+        return items
+    if alpha is None:
+        alpha = float(os.getenv("MEMORY_HYBRID_ALPHA", "0.6"))
+    sims = [1.0 / (1.0 + it["distance"]) if it.get("distance") is not None else 0.0 for it in items]
+    lo, hi = min(sims), max(sims)
+    keyword = bm25_scores(query, [it.get("content", "") for it in items])
+    top = max(keyword) or 1.0
+    for it, sim, kw in zip(items, sims, keyword):
+        vec = (sim - lo) / (hi - lo) if hi > lo else 1.0
+        it["score"] = round(alpha * vec + (1 - alpha) * kw / top, 4)
+    return sorted(items, key=lambda it: it["score"], reverse=True)
+
+
+def experience_filter(min_confidence: float = 0.3) -> Dict[str, Any]:
+    """Filter for planner experience: every failure (a warning at any confidence),
+    successes only above ``min_confidence``."""
+    return {"$or": [
+        {"status": "failed"},
+        {"$and": [{"status": "success"}, {"confidence": {"$gt": float(min_confidence)}}]},
+    ]}
+
+
+def query_experience(memory: Any, query: str, n_results: int = 3, min_confidence: float = 0.3) -> List[Dict[str, Any]]:
+    """
+    Query knowledge_base with ``experience_filter``, hybrid-ranked.
+    
+    A single filtered query: legacy entries without status/confidence are
+    backfilled when the store is opened (see ``AtlasMemory._backfill_defaults``).
+    """
+    return memory.query_memory(
+        "knowledge_base", query, n_results=n_results, where=experience_filter(min_confidence), hybrid=True
+    )
+
+
+def _format_query_results(results: Dict[str, Any], layer: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Flatten a single-query Chroma result into content/metadata/distance dicts."""
+    formatted = []
+    if results["documents"]:
+        distances = results.get("distances") or [[]]
+        for i, doc in enumerate(results["documents"][0]):
+            meta = results["metadatas"][0][i] if results["metadatas"] else {}
+            meta = dict(meta or {})
+            if layer:
+                meta["layer"] = layer
+            item = {
+                "content": doc,
+                "metadata": meta
+            }
+            if i < len(distances[0]):
+                item["distance"] = distances[0][i]
+            formatted.append(item)
+    return formatted
 
 
 class AtlasMemory:
@@ -41,26 +160,113 @@ class AtlasMemory:
     - User Preferences
     """
     
-    def __init__(self, persist_path: str = "./memory_db"):
-        import chromadb
-        self.client = chromadb.PersistentClient(path=persist_path)
+    def __init__(self, persist_path: str = "./memory_db", backend: Optional[str] = None):
+        # Vector backend: "chroma" (default) or "numpy" (core.vector_store); MEMORY_BACKEND overrides
+        from core.vector_store import NumpyVectorClient, resolve_backend
+        self.backend = resolve_backend(backend)
+        if self.backend == "numpy":
+            self.client = NumpyVectorClient(persist_path)
+        else:
+            import chromadb
+            self.client = chromadb.PersistentClient(path=persist_path)
+        # One shared, cached embedding model for every collection (and the RAG pipeline)
+        self.embeddings = get_embedding_service()
+        self._embedding_function = self.embeddings.as_chroma_function()
         
         # Initialize Collections
-        self.ui_patterns = self.client.get_or_create_collection(name="ui_patterns")
-        self.strategies = self.client.get_or_create_collection(name="strategies")
-        self.user_habits = self.client.get_or_create_collection(name="user_habits")
-        self.knowledge_base = self.client.get_or_create_collection(name="knowledge_base")
+        self.ui_patterns = self._open_collection("ui_patterns")
+        self.strategies = self._open_collection("strategies")
+        self.user_habits = self._open_collection("user_habits")
+        self.knowledge_base = self._open_collection("knowledge_base")
+        self._backfill_defaults(persist_path, "knowledge_base")
+
+        # Write-behind buffer: writes are batched off the caller's thread (MEMORY_WRITE_BEHIND=0 disables)
+        self._writes: Optional[MemoryWriteBuffer] = None
+        if os.getenv("MEMORY_WRITE_BEHIND", "1").strip().lower() not in {"0", "false", "no", "off"}:
+            self._writes = MemoryWriteBuffer(
+                self._get_collection,
+                journal_path=os.path.join(persist_path, "write_journal.jsonl"),
+            )
+
+    def _open_collection(self, name: str, metadata: Optional[Dict[str, Any]] = None):
+        return self.client.get_or_create_collection(
+            name=name,
+            metadata=metadata,
+            embedding_function=self._embedding_function
+        )
+
+    def _backfill_defaults(self, persist_path: str, category: str) -> int:
+        """
+        One-time migration: add METADATA_DEFAULTS to entries written before
+        add_memory stored them, so store-side filters see every entry.
+        
+        Runs once per store (a marker file records completion); returns the
+        number of entries updated.
+        """
+        marker = os.path.join(persist_path, f".{category}_defaults_v1")
+        if os.path.exists(marker):
+            return 0
+        collection = self._get_collection(category)
+        page_size = 1000
+        updated = 0
+        offset = 0
+        while True:
+            page = collection.get(include=["metadatas"], limit=page_size, offset=offset)
+            ids = page.get("ids") or []
+            if not ids:
+                break
+            stale_ids, stale_metas = [], []
+            for memory_id, meta in zip(ids, page.get("metadatas") or [{}] * len(ids)):
+                meta = dict(meta or {})
+                if all(k in meta for k in METADATA_DEFAULTS):
+                    continue
+                for key, value in METADATA_DEFAULTS.items():
+                    meta.setdefault(key, value)
+                stale_ids.append(memory_id)
+                stale_metas.append(meta)
+            if stale_ids:
+                collection.update(ids=stale_ids, metadatas=stale_metas)
+                updated += len(stale_ids)
+            offset += len(ids)
+        os.makedirs(persist_path, exist_ok=True)
+        with open(marker, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"updated": updated, "at": datetime.now().isoformat()}))
+        return updated
+
+    def _store(self, collection_name: str, memory_id: str, content: str, metadata: Dict[str, Any]) -> None:
+        """Persist one document, through the write-behind buffer when it is enabled."""
+        if self._writes is not None:
+            self._writes.enqueue(collection_name, memory_id, content, metadata)
+            return
+        self._get_collection(collection_name).upsert(
+            documents=[content],
+            metadatas=[metadata],
+            ids=[memory_id]
+        )
+
+    def flush_writes(self, category: Optional[str] = None) -> int:
+        """Persist buffered writes now (read-your-writes before queries and deletes)."""
+        if self._writes is None:
+            return 0
+        return self._writes.flush(category)
+
+    def close(self) -> None:
+        """Flush buffered writes and stop the background writer."""
+        if self._writes is not None:
+            self._writes.close()
         
-    def add_memory(self, category: str, content: str, metadata: Dict[str, Any] = None):
+    def add_memory(self, category: str, content: str, metadata: Dict[str, Any] = None, memory_id: Optional[str] = None):
         """
         Saves a memory fragment with metadata tagging.
         category: 'ui_patterns', 'strategies', 'user_habits', 'knowledge_base'
+        memory_id: explicit id to upsert; defaults to a hash of category and content,
+            so saving the same content again updates the existing entry.
         """
         collection = self._get_collection(category)
         if not collection:
             return {"status": "error", "error": f"Invalid category: {category}"}
             
-        memory_id = f"{category}_{int(time.time())}"
+        memory_id = memory_id or make_memory_id(category, content)
         
         # Ensure metadata is clean
         clean_meta = {}
@@ -70,40 +276,52 @@ class AtlasMemory:
                     clean_meta[k] = v
                 else:
                     clean_meta[k] = str(v)
+        # Explicit defaults (the values readers already assumed when absent) so
+        # status/confidence filters can run in the vector store
+        for key, value in METADATA_DEFAULTS.items():
+            clean_meta.setdefault(key, value)
         
         try:
-            collection.add(
-                documents=[content],
-                metadatas=[clean_meta],
-                ids=[memory_id]
-            )
+            self._store(category, memory_id, content, clean_meta)
             return {"status": "success", "id": memory_id}
         except Exception as e:
             return {"status": "error", "error": str(e)}
 
-    def query_memory(self, category: str, query: str, n_results: int = 3) -> List[Dict[str, Any]]:
+    def query_memory(
+        self,
+        category: str,
+        query: str,
+        n_results: int = 3,
+        where: Optional[Dict[str, Any]] = None,
+        min_confidence: Optional[float] = None,
+        hybrid: bool = False
+    ) -> List[Dict[str, Any]]:
         """
         Retrieves relevant memories.
+        
+        Args:
+            where: Metadata filter applied by the vector store (e.g. {"status": "success"})
+            min_confidence: Only return memories with metadata confidence >= this
+            hybrid: Rerank a wider candidate pool by BM25 keyword score mixed with vector
+                similarity (MEMORY_HYBRID_ALPHA weights the vector side); adds "score"
         """
         collection = self._get_collection(category)
         if not collection:
             return []
             
         try:
+            self.flush_writes(category)
+            where_filter = build_where(where, min_confidence)
+            pool = n_results * HYBRID_POOL_FACTOR if hybrid else n_results
             results = collection.query(
                 query_texts=[query],
-                n_results=n_results
+                n_results=pool,
+                where=where_filter
             )
             
-            # Format results
-            formatted = []
-            if results["documents"]:
-                for i, doc in enumerate(results["documents"][0]):
-                    meta = results["metadatas"][0][i] if results["metadatas"] else {}
-                    formatted.append({
-                        "content": doc,
-                        "metadata": meta
-                    })
+            formatted = _format_query_results(results)
+            if hybrid:
+                formatted = hybrid_rerank(query, formatted)[:n_results]
             return formatted
             
         except Exception as e:
@@ -127,6 +345,7 @@ class AtlasMemory:
             if not where_filter:
                 return {"status": "error", "error": "Delete requires a filter (use empty dict for all)"}
                 
+            self.flush_writes(category)
             collection.delete(where=where_filter)
             return {"status": "success"}
         except Exception as e:
@@ -137,6 +356,8 @@ class AtlasMemory:
         if category == "strategies": return self.strategies
         if category == "user_habits": return self.user_habits
         if category == "knowledge_base": return self.knowledge_base
+        if category == "episodic_memory": return getattr(self, "episodic_memory", None)
+        if category == "semantic_memory": return getattr(self, "semantic_memory", None)
         return None
 
 
@@ -152,22 +373,21 @@ class HierarchicalMemory(AtlasMemory):
     Original AtlasMemory collections are inherited for backward compatibility.
     """
     
-    def __init__(self, persist_path: str = "./memory_db"):
-        super().__init__(persist_path)
+    def __init__(self, persist_path: str = "./memory_db", backend: Optional[str] = None):
+        super().__init__(persist_path, backend=backend)
         
         # New hierarchical collections
-        self.semantic_memory = self.client.get_or_create_collection(
-            name="semantic_memory",
+        self.semantic_memory = self._open_collection(
+            "semantic_memory",
             metadata={"layer": "semantic", "description": "Long-term consolidated knowledge"}
         )
-        self.episodic_memory = self.client.get_or_create_collection(
-            name="episodic_memory", 
+        self.episodic_memory = self._open_collection(
+            "episodic_memory",
             metadata={"layer": "episodic", "description": "Session-specific experiences"}
         )
         
-        # Working memory is volatile (in-memory only)
-        self._working_memory: Dict[str, WorkingMemoryItem] = {}
-        self._working_memory_lock = threading.Lock()
+        # Working memory is volatile (in-memory only); WORKING_MEMORY_MAX_ITEMS caps it with LRU eviction
+        self._working_memory = WorkingMemoryStore(max_items=int(os.getenv("WORKING_MEMORY_MAX_ITEMS", "0")))
         
         # Session tracking
         self._session_id = f"session_{int(time.time())}"
@@ -190,61 +410,36 @@ class HierarchicalMemory(AtlasMemory):
             priority: Higher priority = more important (0-10)
             ttl_seconds: Time to live in seconds
         """
-        with self._working_memory_lock:
-            self._working_memory[key] = WorkingMemoryItem(
-                content=content,
-                context=context,
-                priority=priority,
-                ttl_seconds=ttl_seconds
-            )
+        self._working_memory.put(key, WorkingMemoryItem(
+            content=content,
+            context=context,
+            priority=priority,
+            ttl_seconds=ttl_seconds
+        ))
         return {"status": "success", "layer": "working", "key": key}
     
     def get_from_working_memory(self, key: str) -> Optional[WorkingMemoryItem]:
         """Get item from working memory by key."""
-        with self._working_memory_lock:
-            item = self._working_memory.get(key)
-            if item and not item.is_expired():
-                return item
-            elif item:
-                # Clean up expired
-                del self._working_memory[key]
-        return None
+        return self._working_memory.get(key)
     
     def query_working_memory(self, query: str = "", min_priority: int = 0) -> List[Dict[str, Any]]:
         """
         Query working memory. Returns all non-expired items matching criteria.
         """
-        with self._working_memory_lock:
-            results = []
-            expired_keys = []
-            
-            for key, item in self._working_memory.items():
-                if item.is_expired():
-                    expired_keys.append(key)
-                    continue
-                    
-                if item.priority >= min_priority:
-                    # Simple substring match for query
-                    if not query or query.lower() in item.content.lower():
-                        results.append({
-                            "key": key,
-                            "content": item.content,
-                            "context": item.context,
-                            "priority": item.priority,
-                            "layer": "working"
-                        })
-            
-            # Clean up expired
-            for key in expired_keys:
-                del self._working_memory[key]
-            
-            # Sort by priority
-            return sorted(results, key=lambda x: x["priority"], reverse=True)
+        return [
+            {
+                "key": key,
+                "content": item.content,
+                "context": item.context,
+                "priority": item.priority,
+                "layer": "working"
+            }
+            for key, item in self._working_memory.query(query, min_priority)
+        ]
     
     def clear_working_memory(self) -> None:
         """Clear all working memory."""
-        with self._working_memory_lock:
-            self._working_memory.clear()
+        self._working_memory.clear()
     
     def add_episodic_memory(
         self,
@@ -262,7 +457,7 @@ class HierarchicalMemory(AtlasMemory):
             outcome: "success", "failed", "partial"
             metadata: Additional metadata
         """
-        memory_id = f"episodic_{self._session_id}_{int(time.time() * 1000)}"
+        memory_id = make_memory_id("episodic", content, self._session_id, action_type, outcome)
         
         clean_meta = {
             "session_id": self._session_id,
@@ -280,11 +475,7 @@ class HierarchicalMemory(AtlasMemory):
                     clean_meta[k] = str(v)
         
         try:
-            self.episodic_memory.add(
-                documents=[content],
-                metadatas=[clean_meta],
-                ids=[memory_id]
-            )
+            self._store("episodic_memory", memory_id, content, clean_meta)
             return {"status": "success", "layer": "episodic", "id": memory_id}
         except Exception as e:
             return {"status": "error", "error": str(e)}
@@ -308,22 +499,14 @@ class HierarchicalMemory(AtlasMemory):
             if session_only:
                 where_filter = {"session_id": self._session_id}
             
+            self.flush_writes("episodic_memory")
             results = self.episodic_memory.query(
                 query_texts=[query],
                 n_results=n_results,
                 where=where_filter
             )
             
-            formatted = []
-            if results["documents"]:
-                for i, doc in enumerate(results["documents"][0]):
-                    meta = results["metadatas"][0][i] if results["metadatas"] else {}
-                    meta["layer"] = "episodic"
-                    formatted.append({
-                        "content": doc,
-                        "metadata": meta
-                    })
-            return formatted
+            return _format_query_results(results, layer="episodic")
         except Exception as e:
             print(f"[Memory] Episodic query error: {e}")
             return []
@@ -339,6 +522,7 @@ class HierarchicalMemory(AtlasMemory):
             where_filter = {"session_id": session_id} if session_id else {}
             # If where_filter is empty, we must ensure the library supports it.
             # ChromaDB usually requires a filter for delete.
+            self.flush_writes("episodic_memory")
             self.episodic_memory.delete(where=where_filter)
             return {"status": "success", "layer": "episodic"}
         except Exception as e:
@@ -362,7 +546,7 @@ class HierarchicalMemory(AtlasMemory):
             source: Where this knowledge came from
             metadata: Additional metadata
         """
-        memory_id = f"semantic_{knowledge_type}_{int(time.time() * 1000)}"
+        memory_id = make_memory_id("semantic", content, knowledge_type)
         
         clean_meta = {
             "knowledge_type": knowledge_type,
@@ -380,11 +564,7 @@ class HierarchicalMemory(AtlasMemory):
                     clean_meta[k] = str(v)
         
         try:
-            self.semantic_memory.add(
-                documents=[content],
-                metadatas=[clean_meta],
-                ids=[memory_id]
-            )
+            self._store("semantic_memory", memory_id, content, clean_meta)
             return {"status": "success", "layer": "semantic", "id": memory_id}
         except Exception as e:
             return {"status": "error", "error": str(e)}
@@ -393,7 +573,8 @@ class HierarchicalMemory(AtlasMemory):
         self,
         query: str,
         n_results: int = 5,
-        min_confidence: float = 0.0
+        min_confidence: float = 0.0,
+        knowledge_type: Optional[str] = None
     ) -> List[Dict[str, Any]]:
         """
         Query semantic memory for long-term knowledge.
@@ -402,28 +583,22 @@ class HierarchicalMemory(AtlasMemory):
             query: Search query
             n_results: Max results
             min_confidence: Minimum confidence threshold
+            knowledge_type: Only return this type ("rule", "pattern", ...)
         """
         try:
-            where_filter = None
-            if min_confidence > 0:
-                where_filter = {"confidence": {"$gte": min_confidence}}
+            where_filter = build_where(
+                {"knowledge_type": knowledge_type} if knowledge_type else None,
+                min_confidence if min_confidence > 0 else None
+            )
             
+            self.flush_writes("semantic_memory")
             results = self.semantic_memory.query(
                 query_texts=[query],
                 n_results=n_results,
                 where=where_filter
             )
             
-            formatted = []
-            if results["documents"]:
-                for i, doc in enumerate(results["documents"][0]):
-                    meta = results["metadatas"][0][i] if results["metadatas"] else {}
-                    meta["layer"] = "semantic"
-                    formatted.append({
-                        "content": doc,
-                        "metadata": meta
-                    })
-            return formatted
+            return _format_query_results(results, layer="semantic")
         except Exception as e:
             print(f"[Memory] Semantic query error: {e}")
             return []
@@ -451,53 +626,116 @@ class HierarchicalMemory(AtlasMemory):
             metadata={"consolidated_at": datetime.now().isoformat()}
         )
     
+    def compact_episodic_memory(self, dry_run: bool = False, **kwargs) -> Dict[str, Any]:
+        """
+        Merge near-duplicate episodic entries into semantic summaries and prune
+        entries past the retention window (see core.memory_compaction).
+        """
+        from core.memory_compaction import MemoryCompactor
+        return MemoryCompactor(self, **kwargs).run(dry_run=dry_run)
+    
+    # Prior applied to each layer's similarity when merging (ties favour distilled knowledge)
+    LAYER_WEIGHTS = {"working": 1.0, "semantic": 1.0, "episodic": 0.9, "legacy": 0.85}
+
     def get_relevant_context(
         self,
         query: str,
         include_working: bool = True,
         include_episodic: bool = True,
         include_semantic: bool = True,
-        max_results_per_layer: int = 3
-    ) -> Dict[str, List[Dict[str, Any]]]:
+        max_results_per_layer: int = 3,
+        parallel: Optional[bool] = None,
+        layer_timeout: Optional[float] = None,
+        top_k: Optional[int] = None
+    ) -> Dict[str, Any]:
         """
         Query all memory layers for relevant context.
         
-        Returns organized results from each layer, sorted by relevance.
+        Vector layers are queried concurrently (MEMORY_PARALLEL_RETRIEVAL=0 for
+        sequential); a layer that misses its deadline (MEMORY_LAYER_TIMEOUT seconds)
+        contributes no results instead of holding up the others.
+        
+        Returns organized results from each layer, plus:
+            merged: top_k results across layers, reranked by weighted similarity
+            timings: per-layer latency in ms (None if the layer timed out)
+            timed_out: layers that missed the deadline
         """
-        results = {
+        if parallel is None:
+            parallel = os.getenv("MEMORY_PARALLEL_RETRIEVAL", "1").strip().lower() not in {"0", "false", "no", "off"}
+        if layer_timeout is None:
+            layer_timeout = float(os.getenv("MEMORY_LAYER_TIMEOUT", "1.5"))
+
+        results: Dict[str, Any] = {
             "working": [],
             "episodic": [],
             "semantic": [],
             "legacy": []  # Original AtlasMemory collections
         }
-        
-        if include_working:
-            results["working"] = self.query_working_memory(query)[:max_results_per_layer]
-        
+        timings: Dict[str, Optional[float]] = {}
+        timed_out: List[str] = []
+
+        layers = {}
         if include_episodic:
-            results["episodic"] = self.query_episodic_memory(query, n_results=max_results_per_layer)
-        
+            layers["episodic"] = lambda: self.query_episodic_memory(query, n_results=max_results_per_layer)
         if include_semantic:
-            results["semantic"] = self.query_semantic_memory(query, n_results=max_results_per_layer)
-        
+            layers["semantic"] = lambda: self.query_semantic_memory(query, n_results=max_results_per_layer)
         # Also query legacy knowledge_base for backward compatibility
-        results["legacy"] = self.query_memory("knowledge_base", query, n_results=max_results_per_layer)
-        
+        layers["legacy"] = lambda: self.query_memory("knowledge_base", query, n_results=max_results_per_layer)
+
+        if parallel and len(layers) > 1:
+            # Embed the query once up front so the concurrent layer queries all hit the cache
+            try:
+                self.embeddings.embed_query(query)
+            except Exception:
+                pass
+            pool = _get_retrieval_pool()
+            futures = {name: pool.submit(_timed_call, fn) for name, fn in layers.items()}
+            done, _ = wait(futures.values(), timeout=layer_timeout)
+            for name, future in futures.items():
+                if future in done:
+                    results[name], timings[name] = future.result()
+                else:
+                    # Still running: leave it to finish in the background and return what we have
+                    timings[name] = None
+                    timed_out.append(name)
+        else:
+            for name, fn in layers.items():
+                results[name], timings[name] = _timed_call(fn)
+
+        if include_working:
+            results["working"], timings["working"] = _timed_call(
+                lambda: self.query_working_memory(query)[:max_results_per_layer]
+            )
+
+        results["merged"] = self._merge_layers(results, top_k or max_results_per_layer)
+        results["timings"] = timings
+        results["timed_out"] = timed_out
         return results
+
+    def _merge_layers(self, results: Dict[str, Any], top_k: int) -> List[Dict[str, Any]]:
+        """Rerank results from all layers by weighted similarity, keeping one copy per content."""
+        best: Dict[str, Dict[str, Any]] = {}
+        for layer, weight in self.LAYER_WEIGHTS.items():
+            for item in results.get(layer) or []:
+                if layer == "working":
+                    # Substring match, no vector distance: rank by priority (0-10)
+                    similarity = 0.5 + min(max(item.get("priority", 0), 0), 10) / 20
+                else:
+                    distance = item.get("distance")
+                    similarity = 1.0 / (1.0 + distance) if distance is not None else 0.5
+                score = round(similarity * weight, 4)
+                content = item.get("content", "")
+                if content not in best or score > best[content]["score"]:
+                    best[content] = {**item, "layer": layer, "score": score}
+        return sorted(best.values(), key=lambda x: x["score"], reverse=True)[:top_k]
     
     def get_stats(self) -> Dict[str, Any]:
         """Get statistics about memory usage."""
-        with self._working_memory_lock:
-            working_count = len(self._working_memory)
-            expired_count = sum(1 for item in self._working_memory.values() if item.is_expired())
+        working = self._working_memory.get_stats()
         
         return {
             "session_id": self._session_id,
-            "working_memory": {
-                "total_items": working_count,
-                "expired_items": expired_count,
-                "active_items": working_count - expired_count
-            },
+            "working_memory": working,
             "episodic_memory": {
                 "total_items": self.episodic_memory.count()
             },
@@ -509,12 +747,38 @@ class HierarchicalMemory(AtlasMemory):
                 "strategies": self.strategies.count(),
                 "user_habits": self.user_habits.count(),
                 "knowledge_base": self.knowledge_base.count()
-            }
+            },
+            "write_buffer": self._writes.get_stats() if self._writes is not None else {"enabled": False},
+            "embeddings": self.embeddings.get_stats(),
+            "backend": self.backend
         }
 
 
 # Global Instance
 _memory_instance = None
+_memory_instance_lock = threading.Lock()
+
+_retrieval_pool: Optional[ThreadPoolExecutor] = None
+_retrieval_pool_lock = threading.Lock()
+
+
+def _get_retrieval_pool() -> ThreadPoolExecutor:
+    """Shared pool for concurrent layer queries (MEMORY_RETRIEVAL_WORKERS)."""
+    global _retrieval_pool
+    if _retrieval_pool is None:
+        with _retrieval_pool_lock:
+            if _retrieval_pool is None:
+                _retrieval_pool = ThreadPoolExecutor(
+                    max_workers=int(os.getenv("MEMORY_RETRIEVAL_WORKERS", "6")),
+                    thread_name_prefix="memory-retrieval"
+                )
+    return _retrieval_pool
+
+
+def _timed_call(fn) -> tuple:
+    started = time.perf_counter()
+    out = fn()
+    return out, round((time.perf_counter() - started) * 1000, 2)
 
 
 class _FallbackMemory:
@@ -522,13 +786,13 @@ class _FallbackMemory:
     def __init__(self):
         self._working_memory = {}
 
-    def add_memory(self, category: str, content: str, metadata: Dict[str, Any] = None):
+    def add_memory(self, category: str, content: str, metadata: Dict[str, Any] = None, memory_id: Optional[str] = None):
         _ = category
         _ = content
         _ = metadata
         return {"status": "success", "id": "fallback"}
 
-    def query_memory(self, category: str, query: str, n_results: int = 3) -> List[Dict[str, Any]]:
+    def query_memory(self, category: str, query: str, n_results: int = 3, *args, **kwargs) -> List[Dict[str, Any]]:
         _ = category
         _ = query
         _ = n_results
@@ -565,7 +829,7 @@ class _FallbackMemory:
         return []
     
     def get_relevant_context(self, *args, **kwargs):
-        return {"working": [], "episodic": [], "semantic": [], "legacy": []}
+        return {"working": [], "episodic": [], "semantic": [], "legacy": [], "merged": [], "timings": {}, "timed_out": []}
     
     def get_stats(self):
         return {"fallback_mode": True}
@@ -576,18 +840,121 @@ class _FallbackMemory:
     def clear_episodic_memory(self, *args, **kwargs):
         return {"status": "success", "layer": "episodic"}
 
+    def flush_writes(self, *args, **kwargs):
+        return 0
+
+    def close(self):
+        pass
+
 
 def get_memory() -> AtlasMemory:
     """Get the global memory instance (backward compatible)."""
     global _memory_instance
     if _memory_instance is None:
-        try:
-            _memory_instance = HierarchicalMemory(persist_path=os.path.join(os.getcwd(), ".atlas_memory"))
-        except BaseException:
-            _memory_instance = _FallbackMemory()
+        # LazyMemory warms up on a background thread while tools may already ask for memory
+        with _memory_instance_lock:
+            if _memory_instance is None:
+                _memory_instance = _create_memory()
     return _memory_instance
 
 
+def _create_memory() -> AtlasMemory:
+    persist_path = os.path.join(os.getcwd(), ".atlas_memory")
+    try:
+        try:
+            memory = HierarchicalMemory(persist_path=persist_path)
+        except BaseException as e:
+            from core.vector_store import resolve_backend
+            if resolve_backend() == "numpy":
+                raise
+            # Chroma unavailable or broken: keep vector search with the in-process backend, in its
+            # own directory so it never shadows (or journals into) the Chroma store
+            fallback_path = os.path.join(persist_path, "numpy_fallback")
+            print(
+                f"[Memory] Warning: Chroma store failed to open ({e}); using the numpy backend at "
+                f"{fallback_path}. Memories written there are not visible to the Chroma store. "
+                "Set MEMORY_BACKEND=numpy to choose it explicitly."
+            )
+            memory = HierarchicalMemory(persist_path=fallback_path, backend="numpy")
+        # Buffered writes left at exit stay in the journal anyway; flushing here just saves a replay
+        atexit.register(memory.close)
+        compaction_interval = float(os.getenv("MEMORY_COMPACTION_INTERVAL", "0") or 0)
+        if compaction_interval > 0:
+            from core.memory_compaction import MemoryCompactor
+            MemoryCompactor(memory).start(compaction_interval)
+    except BaseException:
+        memory = _FallbackMemory()
+    return memory
+
+
+class LazyMemory:
+    """
+    Proxy that builds the memory instance in a background thread.
+    
+    Opening the store (chromadb import, collections) takes on the order of a second
+    and most tasks touch memory late or not at all. The proxy starts warming up
+    immediately; attribute access blocks only if warm-up has not finished yet.
+    """
+    
+    def __init__(self, factory=None, start: bool = True):
+        self._factory = factory or get_memory
+        self._instance = None
+        self._error: Optional[BaseException] = None
+        self._ready = threading.Event()
+        self._start_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.metrics: Dict[str, Any] = {"init_ms": None, "blocked_ms": 0.0, "blocked_calls": 0, "warm_on_first_use": None}
+        if start:
+            self.start()
+    
+    def start(self) -> None:
+        """Begin warming up in the background (idempotent)."""
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._warm, name="memory-warmup", daemon=True)
+                self._thread.start()
+    
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+    
+    def get(self, timeout: Optional[float] = None):
+        """The underlying memory instance, waiting for warm-up if needed."""
+        if not self._ready.is_set():
+            self.start()
+            started = time.perf_counter()
+            if not self._ready.wait(timeout):
+                raise TimeoutError("Memory initialization did not finish in time")
+            self.metrics["blocked_ms"] += round((time.perf_counter() - started) * 1000, 2)
+            self.metrics["blocked_calls"] += 1
+            if self.metrics["warm_on_first_use"] is None:
+                self.metrics["warm_on_first_use"] = False
+        elif self.metrics["warm_on_first_use"] is None:
+            self.metrics["warm_on_first_use"] = True
+        if self._error is not None:
+            raise self._error
+        return self._instance
+    
+    def __getattr__(self, name: str):
+        # Only reached for attributes not defined on the proxy itself
+        return getattr(self.get(), name)
+    
+    def _warm(self) -> None:
+        started = time.perf_counter()
+        try:
+            self._instance = self._factory()
+        except BaseException as e:
+            self._error = e
+        finally:
+            self.metrics["init_ms"] = round((time.perf_counter() - started) * 1000, 2)
+            self._ready.set()
+
+
+def get_lazy_memory() -> LazyMemory:
+    """Memory proxy that warms up in the background (see LazyMemory)."""
+    return LazyMemory(get_memory)
+
+
 def get_hierarchical_memory() -> HierarchicalMemory:
     """Get the global memory instance with hierarchical features."""
     memory = get_memory()
@@ -0,0 +1,276 @@
+"""Episodic → semantic memory compaction.
+
+Episodic memory gains a document for every recorded action and was only
+ever promoted to semantic memory by hand. The compactor:
+
+1. prunes episodic entries older than the retention window;
+2. clusters the remaining entries by embedding similarity (greedy leader
+   clustering on cosine similarity);
+3. replaces every cluster of near-duplicates with one semantic summary whose
+   confidence reflects how often and how successfully it was observed;
+4. reports collection sizes and probe query latency before and after.
+
+The active session is left untouched. Runs in-process (periodically via
+MEMORY_COMPACTION_INTERVAL, see core.memory.get_memory) or offline against an
+existing store:
+
+    python -m core.memory_compaction --path ./.atlas_memory --dry-run
+"""
+
+import argparse
+import json
+import math
+import os
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+
+class MemoryCompactor:
+    """Compacts a HierarchicalMemory's episodic layer into semantic summaries.
+
+    Args:
+        memory: HierarchicalMemory instance to compact.
+        similarity_threshold: Cosine similarity for two entries to share a cluster.
+        min_cluster_size: Smallest cluster that is merged into a summary.
+        retention_days: Episodic entries older than this are deleted (0 = keep all).
+        skip_session: Session id whose entries are never touched (default: the live session).
+    """
+
+    PAGE_SIZE = 1000
+    PROBE_QUERIES = 5
+
+    def __init__(
+        self,
+        memory: Any,
+        similarity_threshold: Optional[float] = None,
+        min_cluster_size: int = 3,
+        retention_days: Optional[float] = None,
+        skip_session: Optional[str] = "__current__",
+    ):
+        self.memory = memory
+        self.similarity_threshold = similarity_threshold if similarity_threshold is not None else float(
+            os.getenv("MEMORY_COMPACTION_SIMILARITY", "0.9")
+        )
+        self.min_cluster_size = max(2, min_cluster_size)
+        self.retention_days = retention_days if retention_days is not None else float(
+            os.getenv("MEMORY_EPISODIC_RETENTION_DAYS", "30")
+        )
+        self.skip_session = getattr(memory, "_session_id", None) if skip_session == "__current__" else skip_session
+        self.last_report: Optional[Dict[str, Any]] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def run(self, dry_run: bool = False) -> Dict[str, Any]:
+        """Run one compaction pass and return the report."""
+        started = time.perf_counter()
+        self.memory.flush_writes()
+        entries = self._load_episodic()
+        probes = [e["embedding"] for e in entries[: self.PROBE_QUERIES]]
+        before = self._measure(probes)
+
+        cutoff = datetime.now() - timedelta(days=self.retention_days) if self.retention_days else None
+        expired_ids: List[str] = []
+        live: List[Dict[str, Any]] = []
+        for entry in entries:
+            meta = entry["metadata"]
+            if self.skip_session and meta.get("session_id") == self.skip_session:
+                continue
+            if cutoff is not None and _parse_time(meta.get("timestamp")) < cutoff:
+                expired_ids.append(entry["id"])
+            else:
+                live.append(entry)
+
+        clusters = [c for c in self._cluster(live) if len(c) >= self.min_cluster_size]
+        summaries = [self._summarize(cluster) for cluster in clusters]
+        merged_ids = [e["id"] for cluster in clusters for e in cluster]
+
+        if not dry_run:
+            for summary in summaries:
+                self.memory.add_semantic_memory(
+                    content=summary["content"],
+                    knowledge_type=summary["knowledge_type"],
+                    confidence=summary["confidence"],
+                    source="compaction",
+                    metadata=summary["metadata"],
+                )
+            self.memory.flush_writes()
+            doomed = expired_ids + merged_ids
+            for i in range(0, len(doomed), self.PAGE_SIZE):
+                self.memory.episodic_memory.delete(ids=doomed[i:i + self.PAGE_SIZE])
+
+        report = {
+            "dry_run": dry_run,
+            "scanned": len(entries),
+            "pruned": len(expired_ids),
+            "clusters": len(clusters),
+            "merged_entries": len(merged_ids),
+            "summaries": len(summaries),
+            "before": before,
+            "after": before if dry_run else self._measure(probes),
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+        }
+        if dry_run:
+            report["preview"] = [{"content": s["content"], "confidence": s["confidence"]} for s in summaries[:10]]
+        self.last_report = report
+        return report
+
+    def start(self, interval_seconds: float) -> None:
+        """Run compaction every ``interval_seconds`` on a daemon thread."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+
+        def loop():
+            while not self._stop.wait(interval_seconds):
+                try:
+                    self.run()
+                except Exception as e:
+                    self.last_report = {"error": str(e)}
+
+        self._thread = threading.Thread(target=loop, name="memory-compaction", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _load_episodic(self) -> List[Dict[str, Any]]:
+        collection = self.memory.episodic_memory
+        entries: List[Dict[str, Any]] = []
+        offset = 0
+        while True:
+            page = collection.get(
+                include=["documents", "metadatas", "embeddings"],
+                limit=self.PAGE_SIZE,
+                offset=offset,
+            )
+            ids = page.get("ids") or []
+            if not ids:
+                break
+            embeddings = page.get("embeddings")
+            for i, memory_id in enumerate(ids):
+                entries.append({
+                    "id": memory_id,
+                    "document": page["documents"][i],
+                    "metadata": page["metadatas"][i] or {},
+                    "embedding": np.asarray(embeddings[i], dtype=np.float32),
+                })
+            if len(ids) < self.PAGE_SIZE:
+                break
+            offset += len(ids)
+        return entries
+
+    def _cluster(self, entries: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """Greedy leader clustering: join the most similar cluster above the threshold, else start one."""
+        if not entries:
+            return []
+        vectors = np.stack([e["embedding"] for e in entries])
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1, norms)
+
+        leaders = np.empty((0, vectors.shape[1]), dtype=np.float32)
+        clusters: List[List[int]] = []
+        for i, vec in enumerate(vectors):
+            if clusters:
+                sims = leaders @ vec
+                best = int(np.argmax(sims))
+                if sims[best] >= self.similarity_threshold:
+                    clusters[best].append(i)
+                    continue
+            clusters.append([i])
+            leaders = np.vstack([leaders, vec])
+        return [[entries[i] for i in members] for members in clusters]
+
+    def _summarize(self, cluster: List[Dict[str, Any]]) -> Dict[str, Any]:
+        vectors = np.stack([e["embedding"] for e in cluster])
+        centroid = vectors.mean(axis=0)
+        representative = cluster[int(np.argmin(np.linalg.norm(vectors - centroid, axis=1)))]
+
+        outcomes = Counter(e["metadata"].get("outcome", "success") for e in cluster)
+        action_types = Counter(e["metadata"].get("action_type", "pattern") for e in cluster)
+        sessions = {e["metadata"].get("session_id") for e in cluster}
+        size = len(cluster)
+        success_rate = outcomes.get("success", 0) / size
+        # More observations → more confidence, scaled by how often the experience succeeded
+        support = min(0.95, 0.6 + 0.1 * math.log2(size))
+        confidence = round(max(0.1, support * success_rate), 3)
+
+        timestamps = sorted(e["metadata"].get("timestamp", "") for e in cluster)
+        content = (
+            f"{representative['document']}\n"
+            f"(Observed {size} times across {len(sessions)} sessions; "
+            f"outcomes: {', '.join(f'{k} {v}' for k, v in outcomes.most_common())})"
+        )
+        return {
+            "content": content,
+            "knowledge_type": action_types.most_common(1)[0][0],
+            "confidence": confidence,
+            "metadata": {
+                "cluster_size": size,
+                "sessions": len(sessions),
+                "success_rate": round(success_rate, 3),
+                "first_seen": timestamps[0],
+                "last_seen": timestamps[-1],
+            },
+        }
+
+    def _measure(self, probes: List[np.ndarray]) -> Dict[str, Any]:
+        sizes = {
+            "episodic": self.memory.episodic_memory.count(),
+            "semantic": self.memory.semantic_memory.count(),
+        }
+        latencies = []
+        for vec in probes:
+            started = time.perf_counter()
+            try:
+                self.memory.episodic_memory.query(query_embeddings=[vec.tolist()], n_results=5)
+            except Exception:
+                continue
+            latencies.append((time.perf_counter() - started) * 1000)
+        sizes["query_ms"] = round(sum(latencies) / len(latencies), 3) if latencies else None
+        return sizes
+
+
+def _parse_time(value: Any) -> datetime:
+    try:
+        return datetime.fromisoformat(str(value))
+    except ValueError:
+        # Unknown age: treat as fresh rather than pruning it
+        return datetime.now()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compact episodic memory into semantic summaries.")
+    parser.add_argument("--path", default=os.path.join(os.getcwd(), ".atlas_memory"), help="memory_db directory")
+    parser.add_argument("--similarity", type=float, default=None, help="cosine threshold for near-duplicates")
+    parser.add_argument("--min-cluster", type=int, default=3)
+    parser.add_argument("--retention-days", type=float, default=None)
+    parser.add_argument("--dry-run", action="store_true", help="report what would change without writing")
+    args = parser.parse_args(argv)
+
+    from core.memory import HierarchicalMemory
+
+    memory = HierarchicalMemory(persist_path=args.path)
+    try:
+        compactor = MemoryCompactor(
+            memory,
+            similarity_threshold=args.similarity,
+            min_cluster_size=args.min_cluster,
+            retention_days=args.retention_days,
+            skip_session=None,
+        )
+        print(json.dumps(compactor.run(dry_run=args.dry_run), indent=2, ensure_ascii=False))
+    finally:
+        memory.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
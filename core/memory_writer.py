@@ -0,0 +1,280 @@
+"""Write-behind buffer for ChromaDB memory collections.
+
+Memory writes used to call ``collection.add`` with a single document on the
+caller's thread, paying for the embedding and the Chroma persist inline. The
+buffer queues writes, appends them to a local journal, and a background
+thread flushes them in batches (one ``upsert`` per collection) once a batch
+fills up or the flush interval elapses. Entries still in the journal after a
+crash are replayed on the first use of the buffer after a restart (lazily,
+so subclasses can finish creating their collections first).
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+
+class MemoryWriteBuffer:
+    """Batches memory writes per collection and flushes them in the background.
+
+    Args:
+        resolve_collection: Maps a collection name to a Chroma collection (or None).
+        journal_path: JSONL file holding writes that are not yet flushed.
+        batch_size: Pending writes that trigger an immediate flush.
+        flush_interval: Maximum seconds a write waits before it is flushed.
+        max_retries: Failed flush attempts before a batch is dropped.
+    """
+
+    def __init__(
+        self,
+        resolve_collection: Callable[[str], Any],
+        journal_path: Optional[str] = None,
+        batch_size: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+        max_retries: int = 3,
+    ):
+        self._resolve = resolve_collection
+        self.journal_path = journal_path
+        self.batch_size = max(1, batch_size or int(os.getenv("MEMORY_WRITE_BATCH", "32")))
+        self.flush_interval = flush_interval if flush_interval is not None else float(
+            os.getenv("MEMORY_FLUSH_INTERVAL", "0.5")
+        )
+        self.max_retries = max_retries
+
+        self._pending: List[Dict[str, Any]] = []
+        self._attempts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        # Serializes flushes so the journal is never rewritten by two threads at once
+        self._flush_lock = threading.Lock()
+        # Journal file I/O happens under this lock only, never under _lock; held across a
+        # producer's append and queue insert so a rewrite never misses a journaled entry
+        self._journal_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._replayed = threading.Event()
+
+        self._stats: Dict[str, float] = {
+            "enqueued": 0,
+            "flushed": 0,
+            "batches": 0,
+            "failed_batches": 0,
+            "dropped": 0,
+            "deduplicated": 0,
+            "replayed": 0,
+            "max_queue_depth": 0,
+            "last_flush_ms": 0.0,
+            "max_flush_ms": 0.0,
+            "total_flush_ms": 0.0,
+        }
+        self._last_error: Optional[str] = None
+
+    def enqueue(self, collection: str, memory_id: str, document: str, metadata: Dict[str, Any]) -> None:
+        """Queue one write; returns without waiting for the embedding or persist."""
+        entry = {"collection": collection, "id": memory_id, "document": document, "metadata": metadata}
+        self._replay_journal()
+        with self._journal_lock:
+            self._append_journal([entry])
+            with self._lock:
+                self._pending.append(entry)
+                self._stats["enqueued"] += 1
+                depth = len(self._pending)
+                if depth > self._stats["max_queue_depth"]:
+                    self._stats["max_queue_depth"] = depth
+        self._ensure_thread()
+        if depth >= self.batch_size:
+            self._wakeup.set()
+
+    def pending_count(self, collection: Optional[str] = None) -> int:
+        self._replay_journal()
+        with self._lock:
+            if collection is None:
+                return len(self._pending)
+            return sum(1 for e in self._pending if e["collection"] == collection)
+
+    def flush(self, collection: Optional[str] = None) -> int:
+        """Flush pending writes synchronously (all, or only those for ``collection``).
+
+        Returns the number of writes that were persisted.
+        """
+        self._replay_journal()
+        with self._flush_lock:
+            with self._lock:
+                if collection is None:
+                    batch, self._pending = self._pending, []
+                else:
+                    batch = [e for e in self._pending if e["collection"] == collection]
+                    if not batch:
+                        return 0
+                    self._pending = [e for e in self._pending if e["collection"] != collection]
+            if not batch:
+                return 0
+
+            started = time.perf_counter()
+            by_collection: Dict[str, List[Dict[str, Any]]] = {}
+            for entry in batch:
+                by_collection.setdefault(entry["collection"], []).append(entry)
+
+            flushed = 0
+            retry: List[Dict[str, Any]] = []
+            for name, entries in by_collection.items():
+                try:
+                    flushed += self._write(name, entries)
+                    for e in entries:
+                        self._attempts.pop(e["id"], None)
+                except Exception as e:
+                    with self._lock:
+                        self._stats["failed_batches"] += 1
+                        self._last_error = f"{name}: {e}"
+                    for entry in entries:
+                        attempts = self._attempts.get(entry["id"], 0) + 1
+                        if attempts < self.max_retries:
+                            self._attempts[entry["id"]] = attempts
+                            retry.append(entry)
+                        else:
+                            self._attempts.pop(entry["id"], None)
+                            with self._lock:
+                                self._stats["dropped"] += 1
+
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            with self._lock:
+                # Failed entries go back to the front so write order is preserved
+                self._pending = retry + self._pending
+                self._stats["flushed"] += flushed
+                self._stats["batches"] += 1
+                self._stats["last_flush_ms"] = round(elapsed_ms, 2)
+                self._stats["max_flush_ms"] = round(max(self._stats["max_flush_ms"], elapsed_ms), 2)
+                self._stats["total_flush_ms"] += elapsed_ms
+            with self._journal_lock:
+                with self._lock:
+                    remaining = list(self._pending)
+                self._rewrite_journal(remaining)
+            return flushed
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Stop the background thread and flush what is left."""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+        self.flush()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._stats)
+            stats["queue_depth"] = len(self._pending)
+            stats["last_error"] = self._last_error
+        stats["avg_flush_ms"] = round(stats.pop("total_flush_ms") / stats["batches"], 2) if stats["batches"] else 0.0
+        stats["batch_size"] = self.batch_size
+        stats["flush_interval"] = self.flush_interval
+        return stats
+
+    def _write(self, name: str, entries: List[Dict[str, Any]]) -> int:
+        collection = self._resolve(name)
+        if collection is None:
+            raise ValueError(f"Invalid collection: {name}")
+        # Chroma rejects a batch with repeated ids; the last write wins, as with sequential upserts
+        latest: Dict[str, Dict[str, Any]] = {}
+        for e in entries:
+            latest.pop(e["id"], None)
+            latest[e["id"]] = e
+        unique = list(latest.values())
+        collection.upsert(
+            documents=[e["document"] for e in unique],
+            metadatas=[e["metadata"] for e in unique],
+            ids=[e["id"] for e in unique],
+        )
+        deduplicated = len(entries) - len(unique)
+        if deduplicated:
+            with self._lock:
+                self._stats["deduplicated"] += deduplicated
+        return len(unique)
+
+    def _ensure_thread(self) -> None:
+        if self._thread is not None or self._stopped.is_set():
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="memory-write-behind", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            self._wakeup.wait(timeout=self.flush_interval)
+            self._wakeup.clear()
+            if self._stopped.is_set():
+                break
+            try:
+                self.flush()
+            except Exception as e:
+                with self._lock:
+                    self._last_error = str(e)
+
+    # --- journal ---
+
+    def _append_journal(self, entries: List[Dict[str, Any]]) -> None:
+        if not self.journal_path:
+            return
+        try:
+            with open(self.journal_path, "a", encoding="utf-8") as f:
+                for e in entries:
+                    f.write(json.dumps(e, ensure_ascii=False) + "\n")
+        except OSError as e:
+            self._last_error = f"journal: {e}"
+
+    def _rewrite_journal(self, entries: List[Dict[str, Any]]) -> None:
+        if not self.journal_path:
+            return
+        try:
+            if not entries:
+                if os.path.exists(self.journal_path):
+                    os.remove(self.journal_path)
+                return
+            tmp_path = self.journal_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for e in entries:
+                    f.write(json.dumps(e, ensure_ascii=False) + "\n")
+            os.replace(tmp_path, self.journal_path)
+        except OSError as e:
+            self._last_error = f"journal: {e}"
+
+    def _replay_journal(self) -> None:
+        if self._replayed.is_set():
+            return
+        with self._journal_lock:
+            if self._replayed.is_set():
+                return
+            if not self.journal_path or not os.path.exists(self.journal_path):
+                self._replayed.set()
+                return
+            entries = self._load_journal()
+            with self._lock:
+                if entries:
+                    # Entries are already journaled: queue them ahead of anything new
+                    self._pending[:0] = entries
+                    self._stats["replayed"] = len(entries)
+            self._replayed.set()
+        if entries:
+            self._ensure_thread()
+            self._wakeup.set()
+
+    def _load_journal(self) -> List[Dict[str, Any]]:
+        entries: List[Dict[str, Any]] = []
+        if not self.journal_path:
+            return entries
+        try:
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        # Torn last line from a crash mid-append
+                        continue
+        except OSError as e:
+            self._last_error = f"journal: {e}"
+        return entries
@@ -0,0 +1,232 @@
+"""Bounded, append-only message history for TrinityState.
+
+Every Trinity node used to return ``list(context) + [AIMessage(...)]``, copying
+the whole history on each transition, and tool results of up to 50k chars
+stayed in the state for the whole run. ``TrinityState.messages`` is now
+reduced by ``merge_messages``:
+
+- nodes return only their new messages; the reducer returns a new
+  ``MessageLog`` with them appended and never mutates the previous value, so
+  LangGraph channel copies, checkpoints and ``get_state`` history each keep
+  their own snapshot (the log is bounded by the window, so the copy is cheap;
+  returns that still repeat the full history are recognized by their shared
+  prefix and reduced to the new tail);
+- message contents above TRINITY_MESSAGE_SPILL_CHARS are written once to a
+  content-addressed blob directory (TRINITY_BLOB_DIR) and replaced in the
+  state by a head/tail preview plus the blob reference (``load_content``
+  restores the full text);
+- beyond TRINITY_MESSAGE_WINDOW messages the oldest turns (never the initial
+  task) are evicted into ``MessageLog.compacted``, which the meta-planner
+  folds into the running ``summary`` on its regular cadence, or earlier once
+  TRINITY_COMPACT_FOLD turns are pending. Folding is recorded in the state
+  (``compacted_folded``) rather than by draining the log in place.
+
+Blobs are pruned when the store is first opened in a process: files older
+than TRINITY_BLOB_MAX_AGE_DAYS (default 7) go first, then the oldest ones
+until the directory fits TRINITY_BLOB_MAX_MB (default 512). Set either to 0
+to disable that limit.
+"""
+
+import hashlib
+import os
+import tempfile
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, List, Optional
+
+BLOB_KEY = "blob_sha256"
+
+
+class BlobStore:
+    """Content-addressed text blobs: ``<root>/<sha[:2]>/<sha>``, each written once.
+
+    Re-putting existing content refreshes its mtime, which ``prune`` ages by.
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = os.path.expanduser(root or os.getenv("TRINITY_BLOB_DIR") or "~/.system_cli/blobs")
+
+    def path(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], digest)
+
+    def put(self, text: str) -> str:
+        data = text.encode("utf-8", "replace")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        else:
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+        return digest
+
+    def get(self, digest: str) -> Optional[str]:
+        try:
+            with open(self.path(digest), "r", encoding="utf-8") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def prune(self, max_age_seconds: float = 0, max_bytes: int = 0) -> int:
+        """Delete blobs older than ``max_age_seconds``, then the oldest beyond ``max_bytes``."""
+        entries = []
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+        entries.sort()
+        now = time.time()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for mtime, size, path in entries:
+            expired = max_age_seconds and now - mtime > max_age_seconds
+            if not expired and not (max_bytes and total > max_bytes):
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        return removed
+
+
+class MessageLog(List[Any]):
+    """The messages list of a Trinity run, plus the turns compacted out of it.
+
+    A plain ``list`` subclass, so nodes keep indexing, slicing and iterating it
+    as before. Treat it as immutable: ``merge_messages`` builds a new log for
+    every update.
+    """
+
+    def __init__(self, messages: Iterable[Any] = (), previous: Optional["MessageLog"] = None):
+        super().__init__(messages)
+        maxlen = int(os.getenv("TRINITY_COMPACTED_MAX", "50"))
+        if previous is not None:
+            self.compacted: Deque[str] = deque(previous.compacted, maxlen=maxlen)
+            self.compacted_total: int = previous.compacted_total
+            self.stats: Dict[str, Any] = dict(previous.stats)
+            return
+        self.compacted = deque(maxlen=maxlen)
+        # Turns ever evicted; the digest of turn k (1-based) is kept while it is among the last maxlen
+        self.compacted_total = 0
+        self.stats = {
+            "appended": 0,
+            "prefix_returns": 0,
+            "spilled": 0,
+            "spilled_chars": 0,
+            "compacted": 0,
+            "merge_ms": 0.0,
+        }
+
+    def pending_compacted(self, folded: int = 0) -> List[str]:
+        """Digests of evicted turns not yet folded into the summary (oldest first).
+
+        ``folded`` is the ``compacted_total`` recorded when the summary last absorbed them.
+        """
+        pending = max(0, self.compacted_total - max(0, folded))
+        if not pending:
+            return []
+        return list(self.compacted)[-pending:]
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        stats["merge_ms"] = round(stats["merge_ms"], 3)
+        stats["messages"] = len(self)
+        stats["compacted_kept"] = len(self.compacted)
+        return stats
+
+
+_blob_store: Optional[BlobStore] = None
+
+
+def get_blob_store() -> BlobStore:
+    global _blob_store
+    if _blob_store is None:
+        _blob_store = BlobStore()
+        try:
+            _blob_store.prune(
+                max_age_seconds=float(os.getenv("TRINITY_BLOB_MAX_AGE_DAYS", "7")) * 86400,
+                max_bytes=int(float(os.getenv("TRINITY_BLOB_MAX_MB", "512")) * 1024 * 1024),
+            )
+        except OSError:
+            pass
+    return _blob_store
+
+
+def _spill(message: Any, log: MessageLog, threshold: int) -> Any:
+    content = getattr(message, "content", None)
+    if not isinstance(content, str) or len(content) <= threshold or not hasattr(message, "model_copy"):
+        return message
+    digest = get_blob_store().put(content)
+    head, tail = int(threshold * 0.75), int(threshold * 0.25)
+    preview = (
+        f"{content[:head]}\n\n[... {len(content) - head - tail} chars stored in blob {digest} ...]\n\n"
+        f"{content[-tail:]}"
+    )
+    log.stats["spilled"] += 1
+    log.stats["spilled_chars"] += len(content) - len(preview)
+    kwargs = dict(getattr(message, "additional_kwargs", None) or {})
+    kwargs[BLOB_KEY] = digest
+    return message.model_copy(update={"content": preview, "additional_kwargs": kwargs})
+
+
+def _digest_line(message: Any) -> str:
+    content = " ".join(str(getattr(message, "content", message) or "").split())
+    return f"{type(message).__name__}: {content[:200]}"
+
+
+def merge_messages(left: Optional[List[Any]], right: Optional[List[Any]]) -> MessageLog:
+    """LangGraph reducer for ``TrinityState.messages`` (see module docstring).
+
+    Pure: ``left`` is never modified, so applying one write to several channel
+    copies yields the same, independent result for each.
+    """
+    started = time.perf_counter()
+    previous = left if isinstance(left, MessageLog) else None
+    log = MessageLog(left or [], previous=previous)
+    new = list(right or [])
+    n = len(log)
+    if n and len(new) >= n and new[0] is log[0] and new[n - 1] is log[-1]:
+        # Legacy full-history return: keep only what is new
+        new = new[n:]
+        log.stats["prefix_returns"] += 1
+
+    threshold = int(os.getenv("TRINITY_MESSAGE_SPILL_CHARS", "8000"))
+    for message in new:
+        log.append(_spill(message, log, threshold))
+    log.stats["appended"] += len(new)
+
+    window = int(os.getenv("TRINITY_MESSAGE_WINDOW", "40"))
+    overflow = len(log) - window
+    if window > 1 and overflow > 0:
+        # Keep the initial task message; evict the oldest turns after it
+        for message in log[1:1 + overflow]:
+            log.compacted.append(_digest_line(message))
+        del log[1:1 + overflow]
+        log.compacted_total += overflow
+        log.stats["compacted"] += overflow
+
+    log.stats["merge_ms"] += (time.perf_counter() - started) * 1000
+    return log
+
+
+def load_content(message: Any) -> str:
+    """Full content of ``message``, read back from the blob store if it was spilled."""
+    content = getattr(message, "content", "")
+    digest = (getattr(message, "additional_kwargs", None) or {}).get(BLOB_KEY)
+    if digest:
+        full = get_blob_store().get(digest)
+        if full is not None:
+            return full
+    return content if isinstance(content, str) else str(content)
@@ -5,12 +5,18 @@ Analyzes step dependencies and executes non-dependent steps concurrently.
 
 Features:
 - Dependency graph analysis
+- DAG scheduling with priorities and per-tool concurrency limits
 - Async parallel execution
 - Result aggregation with ordering
 - Configurable concurrency limits
 """
 
 import asyncio
+import contextvars
+import functools
+import heapq
+import time
+from collections import deque
 from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Any, Callable, Dict, List, Optional, Set, Tuple
@@ -86,30 +92,170 @@ class DependencyGraph:
             if deps.issubset(completed):
                 independent.append(step_id)
         return independent
+    
+    def critical_path(self, step_ids: List[int], weights: Dict[int, float]) -> Tuple[List[int], float]:
+        """
+        Longest weighted dependency chain through the given steps.
+        
+        Args:
+            step_ids: Steps to consider (dependencies outside this set are ignored)
+            weights: step_id -> cost (e.g. duration in ms)
+            
+        Returns:
+            (chain of step_ids from first to last, total weight)
+        """
+        members = set(step_ids)
+        indegree = {sid: len(self.get_dependencies(sid) & members) for sid in step_ids}
+        queue = deque(sid for sid in step_ids if indegree[sid] == 0)
+        best: Dict[int, float] = {}
+        parent: Dict[int, Optional[int]] = {}
+        
+        # Kahn's algorithm: relax the heaviest predecessor for each step
+        while queue:
+            sid = queue.popleft()
+            deps = self.get_dependencies(sid) & members
+            prev = max(deps, key=lambda d: best.get(d, 0.0), default=None)
+            parent[sid] = prev
+            best[sid] = weights.get(sid, 0.0) + (best.get(prev, 0.0) if prev is not None else 0.0)
+            for dep_id in self.get_dependents(sid):
+                if dep_id in indegree:
+                    indegree[dep_id] -= 1
+                    if indegree[dep_id] == 0:
+                        queue.append(dep_id)
+        
+        if not best:
+            return [], 0.0
+        
+        end = max(best, key=lambda sid: best[sid])
+        chain: List[int] = []
+        cursor: Optional[int] = end
+        while cursor is not None:
+            chain.append(cursor)
+            cursor = parent.get(cursor)
+        return list(reversed(chain)), best[end]
+    
+    def parallelism_factor(self, step_ids: List[int]) -> Tuple[float, int]:
+        """
+        Steps per level of the dependency DAG.
+        
+        Returns:
+            (len(step_ids) / depth, depth) where depth is the longest chain in steps;
+            1.0 means fully serial, N means N steps could run side by side on average.
+        """
+        if not step_ids:
+            return 1.0, 0
+        chain, _ = self.critical_path(step_ids, {sid: 1.0 for sid in step_ids})
+        depth = max(1, len(chain))
+        return round(len(step_ids) / depth, 2), depth
+
+
+# Resource that every step touches: an unknown tool claims it exclusively (barrier)
+GLOBAL_RESOURCE = "*"
+
+
+@dataclass(frozen=True)
+class ToolEffects:
+    """Declared resource access of a tool.
+    
+    Resource templates may reference step args: "file:{path}" resolves to the
+    normalized ``path`` argument, "file:{path|file}" tries each name in turn.
+    A template whose args are missing widens the step to a global barrier.
+    
+    ``updates`` are commutative changes (e.g. adding a file to a directory):
+    they conflict with reads and writes of the resource but not with each other.
+    
+    ``writes_if`` holds (``"arg|other_arg"``, resources) pairs: the resources are
+    written only when one of the named args is set (e.g. a screenshot that
+    activates an app first).
+    """
+    reads: Tuple[str, ...] = ()
+    writes: Tuple[str, ...] = ()
+    updates: Tuple[str, ...] = ()
+    writes_if: Tuple[Tuple[str, Tuple[str, ...]], ...] = ()
 
 
 class DependencyAnalyzer:
-    """Analyzes step definitions to determine dependencies."""
-    
-    # Tool pairs that are typically dependent
-    DEPENDENT_TOOL_PATTERNS = {
-        ("open_app", "click"),  # Must open app before clicking
-        ("open_app", "type_text"),  # Must open app before typing
-        ("browser_open_url", "browser_click_element"),
-        ("browser_open_url", "browser_type_text"),
-        ("take_screenshot", "vision_analyze"),
-        ("write_file", "read_file"),  # If same file
-    }
+    """Analyzes step definitions to determine dependencies.
+    
+    Each step is mapped to read/write/update resource sets through ``TOOL_EFFECTS``.
+    A per-resource index (last writer, readers and updaters since that write) adds edges
+    only between conflicting accessors, so analysis is linear in the number
+    of steps plus edges. Tools missing from the table act as full barriers.
+    """
     
-    # Tools that are typically independent
-    INDEPENDENT_TOOLS = {
-        "get_clipboard",
-        "get_monitors_info",
-        "get_open_windows",
-        "list_processes",
-        "get_system_stats"
+    TOOL_EFFECTS: Dict[str, ToolEffects] = {
+        # Files
+        "read_file": ToolEffects(reads=("file:{path|file}",)),
+        "list_files": ToolEffects(reads=("dir:{path}",)),
+        "write_file": ToolEffects(writes=("file:{path|file}",), updates=("dir:@parent{path|file}",)),
+        "copy_file": ToolEffects(reads=("file:{src}",), writes=("file:{dst}",), updates=("dir:@parent{dst}",)),
+        # Read-only system state
+        "get_system_stats": ToolEffects(reads=("system",)),
+        "list_processes": ToolEffects(reads=("processes",)),
+        "kill_process": ToolEffects(writes=("processes",)),
+        "get_monitors_info": ToolEffects(reads=("displays",)),
+        "get_open_windows": ToolEffects(reads=("windows",)),
+        "check_permissions": ToolEffects(reads=("permissions",)),
+        "permission_help": ToolEffects(),
+        "system_check_identifiers": ToolEffects(reads=("system",)),
+        # Clipboard
+        "get_clipboard": ToolEffects(reads=("clipboard",)),
+        "set_clipboard": ToolEffects(writes=("clipboard",)),
+        # Apps and focus
+        "open_app": ToolEffects(writes=("app:{name}", "focus", "windows", "screen")),
+        "native_open_app": ToolEffects(writes=("app:{name|app_name}", "focus", "windows", "screen")),
+        "native_activate_app": ToolEffects(writes=("app:{name|app_name}", "focus", "windows", "screen")),
+        "activate_app": ToolEffects(writes=("app:{name|app_name}", "focus", "windows", "screen")),
+        # Screen observation (activating an app first changes focus and the screen)
+        "take_screenshot": ToolEffects(
+            reads=("screen",), writes=("screenshot",),
+            writes_if=(("activate|app_name", ("focus", "windows", "screen")),),
+        ),
+        "capture_screen": ToolEffects(
+            reads=("screen",), writes=("screenshot",),
+            writes_if=(("activate|app_name", ("focus", "windows", "screen")),),
+        ),
+        "take_burst_screenshot": ToolEffects(reads=("screen",), writes=("screenshot",)),
+        "capture_screen_region": ToolEffects(reads=("screen",), writes=("screenshot",)),
+        "ocr_region": ToolEffects(reads=("screen",)),
+        "vision_analyze": ToolEffects(reads=("screen", "screenshot")),
+        "analyze_screen": ToolEffects(reads=("screen", "screenshot")),
+        "find_image_on_screen": ToolEffects(reads=("screen",)),
+        "compare_images": ToolEffects(reads=("file:{path1}", "file:{path2}")),
+        "recorder_status": ToolEffects(reads=("recorder",)),
+        "recorder_start": ToolEffects(writes=("recorder",)),
+        "recorder_stop": ToolEffects(writes=("recorder",)),
+        # Input devices (act on whatever has focus and change what is on screen)
+        "move_mouse": ToolEffects(reads=("focus",), writes=("input", "screen")),
+        "click_mouse": ToolEffects(reads=("focus",), writes=("input", "screen")),
+        "click": ToolEffects(reads=("focus",), writes=("input", "screen")),
+        "type_text": ToolEffects(reads=("focus",), writes=("input", "screen")),
+        "press_key": ToolEffects(reads=("focus",), writes=("input", "screen")),
+        "native_click_ui": ToolEffects(reads=("focus",), writes=("input", "screen")),
+        "native_type_text": ToolEffects(reads=("focus",), writes=("input", "screen")),
+        # Browser page (rendered on screen, so page changes also change the screen)
+        "browser_open_url": ToolEffects(writes=("browser", "windows", "focus", "screen")),
+        "browser_navigate": ToolEffects(writes=("browser", "screen")),
+        "browser_click_element": ToolEffects(writes=("browser", "screen")),
+        "browser_type_text": ToolEffects(writes=("browser", "screen")),
+        "browser_press_key": ToolEffects(writes=("browser", "screen")),
+        "browser_execute_script": ToolEffects(writes=("browser", "screen")),
+        "browser_close": ToolEffects(writes=("browser", "windows", "focus", "screen")),
+        "browser_screenshot": ToolEffects(reads=("browser",)),
+        "browser_snapshot": ToolEffects(reads=("browser",)),
+        "browser_get_content": ToolEffects(reads=("browser",)),
+        "browser_get_links": ToolEffects(reads=("browser",)),
+        "browser_ensure_ready": ToolEffects(reads=("browser",)),
+        # Memory
+        "rag_query": ToolEffects(reads=("memory:{category}",)),
+        "save_memory": ToolEffects(writes=("memory:{category}",)),
     }
     
+    def __init__(self, tool_effects: Optional[Dict[str, ToolEffects]] = None):
+        self.tool_effects = dict(self.TOOL_EFFECTS)
+        self.tool_effects.update(tool_effects or {})
+        self.last_stats: Dict[str, Any] = {}
+    
     def analyze(self, steps: List[Dict[str, Any]]) -> DependencyGraph:
         """
         Analyze steps and build dependency graph.
@@ -120,6 +266,7 @@ class DependencyAnalyzer:
         Returns:
             DependencyGraph showing step dependencies
         """
+        started = time.perf_counter()
         graph = DependencyGraph()
         
         # Ensure all steps have IDs
@@ -127,97 +274,229 @@ class DependencyAnalyzer:
             if "id" not in step:
                 step["id"] = i + 1
         
-        # Analyze each step pair for dependencies
+        # resource -> last writing step, plus readers and updaters since that write
+        last_writer: Dict[str, int] = {}
+        readers: Dict[str, List[int]] = {}
+        updaters: Dict[str, List[int]] = {}
+        edges = 0
+        
         for i, step in enumerate(steps):
             step_id = step.get("id", i + 1)
-            step_tool = step.get("tool", "").lower()
-            step_args = step.get("args", {})
+            reads, writes, updates = self.resources_for(step.get("tool", ""), step.get("args") or {})
+            deps: Set[int] = set()
             
-            # Check against all previous steps
-            for j in range(i):
-                prev_step = steps[j]
-                prev_id = prev_step.get("id", j + 1)
-                prev_tool = prev_step.get("tool", "").lower()
-                prev_args = prev_step.get("args", {})
-                
-                if self._has_dependency(step_tool, step_args, prev_tool, prev_args):
-                    graph.add_dependency(step_id, prev_id)
+            for res in reads:
+                writer = last_writer.get(res)
+                if writer is not None:
+                    deps.add(writer)
+                deps.update(updaters.get(res, ()))
+            for res in updates:
+                writer = last_writer.get(res)
+                if writer is not None:
+                    deps.add(writer)
+                deps.update(readers.get(res, ()))
+            for res in writes:
+                writer = last_writer.get(res)
+                if writer is not None:
+                    deps.add(writer)
+                deps.update(readers.get(res, ()))
+                deps.update(updaters.get(res, ()))
+            
+            deps.discard(step_id)
+            for dep in deps:
+                graph.add_dependency(step_id, dep)
+            edges += len(deps)
+            
+            for res in writes:
+                last_writer[res] = step_id
+                readers[res] = []
+                updaters[res] = []
+            for res in updates:
+                if res not in writes:
+                    updaters.setdefault(res, []).append(step_id)
+            for res in reads:
+                if res not in writes:
+                    readers.setdefault(res, []).append(step_id)
         
+        step_ids = [s.get("id", i + 1) for i, s in enumerate(steps)]
+        factor, depth = graph.parallelism_factor(step_ids)
+        self.last_stats = {
+            "steps": len(steps),
+            "edges": edges,
+            "depth": depth,
+            "parallelism_factor": factor,
+            "analyze_ms": round((time.perf_counter() - started) * 1000, 3),
+        }
         return graph
     
-    def _has_dependency(
-        self,
-        tool: str,
-        args: Dict,
-        prev_tool: str,
-        prev_args: Dict
-    ) -> bool:
-        """Check if tool depends on prev_tool."""
-        
-        # Check known dependent patterns
-        if (prev_tool, tool) in self.DEPENDENT_TOOL_PATTERNS:
-            return True
-        
-        # Check if both are independent tools (no dependencies between them)
-        if tool in self.INDEPENDENT_TOOLS and prev_tool in self.INDEPENDENT_TOOLS:
-            return False
-        
-        # Check file-based dependencies
-        if self._has_file_dependency(tool, args, prev_tool, prev_args):
-            return True
+    def resources_for(self, tool: str, args: Dict[str, Any]) -> Tuple[Set[str], Set[str], Set[str]]:
+        """
+        Resolve the read, write and update resource sets for one tool call.
         
-        # Check app-based dependencies
-        if self._has_app_dependency(tool, args, prev_tool, prev_args):
-            return True
+        Every step reads the global resource, so it orders after any barrier;
+        unknown tools (or unresolved templates) write it and become barriers.
+        """
+        barrier: Tuple[Set[str], Set[str], Set[str]] = (set(), {GLOBAL_RESOURCE}, set())
+        effects = self.tool_effects.get(str(tool or "").lower())
+        if effects is None:
+            return barrier
         
-        # Default: assume sequential dependency for safety
-        # This ensures correctness at cost of some parallelism
-        return True
+        resolved: List[Set[str]] = [{GLOBAL_RESOURCE}, set(), set()]
+        for bucket, templates in zip(resolved, (effects.reads, effects.writes, effects.updates)):
+            for template in templates:
+                res = self._resolve(template, args)
+                if res is None:
+                    return barrier
+                bucket.add(res)
+        for names, resources in effects.writes_if:
+            if any(args.get(n) for n in names.split("|")):
+                resolved[1].update(resources)
+        return resolved[0], resolved[1], resolved[2]
     
-    def _has_file_dependency(
-        self,
-        tool: str,
-        args: Dict,
-        prev_tool: str,
-        prev_args: Dict
-    ) -> bool:
-        """Check if there's a file-based dependency."""
-        file_tools = {"read_file", "write_file", "copy_file"}
-        
-        if tool in file_tools and prev_tool in file_tools:
-            # Same file = dependency
-            file1 = args.get("path", args.get("file", ""))
-            file2 = prev_args.get("path", prev_args.get("file", ""))
-            if file1 and file2 and file1 == file2:
-                return True
-            
-            # Write before read on same file
-            if prev_tool == "write_file" and tool == "read_file":
-                if file1 == file2:
-                    return True
+    @staticmethod
+    def _resolve(template: str, args: Dict[str, Any]) -> Optional[str]:
+        """Fill a resource template from step args; None if a required arg is missing."""
+        if "{" not in template:
+            return template
+        prefix, _, rest = template.partition("{")
+        names, _, suffix = rest.partition("}")
+        value = next((args.get(n) for n in names.split("|") if args.get(n)), None)
+        if value is None:
+            return None
         
-        return False
-    
-    def _has_app_dependency(
-        self,
-        tool: str,
-        args: Dict,
-        prev_tool: str,
-        prev_args: Dict
-    ) -> bool:
-        """Check if there's an app-based dependency."""
-        app_opener_tools = {"open_app", "native_open_app", "activate_app"}
-        app_interaction_tools = {"click", "type_text", "press_key", "native_click_ui"}
-        
-        if prev_tool in app_opener_tools and tool in app_interaction_tools:
-            # Opening app then interacting = dependency
-            return True
-        
-        return False
+        parent = prefix.endswith("@parent")
+        if parent:
+            prefix = prefix[: -len("@parent")]
+        value = str(value)
+        if prefix in ("file:", "dir:"):
+            value = os.path.normpath(os.path.abspath(os.path.expanduser(value)))
+            if parent:
+                value = os.path.dirname(value)
+        else:
+            value = value.strip().lower()
+        return f"{prefix}{value}{suffix}"
 
 
 StepExecutor = Callable[[Dict[str, Any]], Any]
 
+# Thread pool of the async run in progress (used by ParallelToolExecutor.run_sync)
+_current_sync_pool: contextvars.ContextVar[Optional[concurrent.futures.ThreadPoolExecutor]] = contextvars.ContextVar(
+    "parallel_executor_sync_pool", default=None
+)
+
+
+class _DagRun:
+    """Scheduling state for one execution: ready heap, pending counts, group slots."""
+    
+    def __init__(self, owner: "ParallelToolExecutor", graph: DependencyGraph, steps: List[Dict[str, Any]]):
+        self.owner = owner
+        self.graph = graph
+        self.order = [s.get("id", i + 1) for i, s in enumerate(steps)]
+        self.position = {step_id: i for i, step_id in enumerate(self.order)}
+        self.step_map = {s.get("id", i + 1): s for i, s in enumerate(steps)}
+        self.waiting_on = {
+            step_id: len(graph.get_dependencies(step_id) & self.step_map.keys())
+            for step_id in self.order
+        }
+        self.ready: List[Tuple[float, int, int]] = []
+        self.unfinished = set(self.order)
+        self.in_flight: Dict[str, int] = {}
+        self.halted = False
+        for step_id in self.order:
+            if self.waiting_on[step_id] == 0:
+                self._push(step_id)
+    
+    def launchable(self, max_running: int, running: int) -> List[int]:
+        """Pop every ready step that fits within the worker and group limits."""
+        launched: List[int] = []
+        deferred = []
+        while self.ready and not self.halted and running + len(launched) < max_running:
+            entry = heapq.heappop(self.ready)
+            step_id = entry[2]
+            key = self.owner._limit_key(self.step_map[step_id])
+            limit = self.owner.concurrency_limits.get(key)
+            if limit is not None and self.in_flight.get(key, 0) >= limit:
+                deferred.append(entry)
+                continue
+            self.in_flight[key] = self.in_flight.get(key, 0) + 1
+            launched.append(step_id)
+        for entry in deferred:
+            heapq.heappush(self.ready, entry)
+        return launched
+    
+    def finish(self, step_id: int, result: StepResult, stop_on_error: bool) -> None:
+        """Record a finished step and release (or cancel) its dependents."""
+        key = self.owner._limit_key(self.step_map[step_id])
+        self.in_flight[key] -= 1
+        self.owner._record(result)
+        self.unfinished.discard(step_id)
+        
+        if result.status == StepStatus.FAILED:
+            if self.owner.verbose:
+                print(f"[ParallelExecutor] Step {step_id} failed: {result.error}")
+            self._cancel_dependents(step_id)
+            if stop_on_error:
+                self.halted = True
+            return
+        
+        for dependent in self.graph.get_dependents(step_id):
+            if dependent in self.unfinished and self.waiting_on.get(dependent, 0) > 0:
+                self.waiting_on[dependent] -= 1
+                if self.waiting_on[dependent] == 0:
+                    self._push(dependent)
+    
+    def release_blocked(self) -> bool:
+        """Nothing running or ready: release the earliest pending step (dependency cycle)."""
+        if self.halted or self.ready or not self.unfinished:
+            return False
+        remaining = sorted(self.unfinished, key=self.position.__getitem__)
+        if self.owner.verbose:
+            print(f"[ParallelExecutor] No ready steps. Pending: {remaining}")
+        self.waiting_on[remaining[0]] = 0
+        self._push(remaining[0])
+        return True
+    
+    def skip_remaining(self) -> None:
+        # Mark remaining as skipped
+        for step_id in list(self.unfinished):
+            self.owner._record(StepResult(
+                step_id=step_id,
+                status=StepStatus.SKIPPED,
+                error="Skipped due to previous failure"
+            ))
+        self.unfinished.clear()
+    
+    def _push(self, step_id: int) -> None:
+        step = self.step_map[step_id]
+        # heapq is a min-heap: higher priority first, then original order
+        try:
+            priority = float(step.get("priority", 0) or 0)
+        except (TypeError, ValueError):
+            priority = 0.0
+        heapq.heappush(self.ready, (-priority, self.position[step_id], step_id))
+    
+    def _cancel_dependents(self, failed_id: int) -> None:
+        """Skip every unfinished step that (transitively) depends on a failed one."""
+        stack = [failed_id]
+        cancelled: Set[int] = set()
+        while stack:
+            for dependent in self.graph.get_dependents(stack.pop()):
+                if dependent in self.unfinished and dependent not in cancelled:
+                    cancelled.add(dependent)
+                    stack.append(dependent)
+        if not cancelled:
+            return
+        
+        for step_id in cancelled:
+            self.unfinished.discard(step_id)
+            self.owner._record(StepResult(
+                step_id=step_id,
+                status=StepStatus.SKIPPED,
+                error=f"Cancelled: depends on failed step {failed_id}"
+            ))
+        self.ready[:] = [entry for entry in self.ready if entry[2] not in cancelled]
+        heapq.heapify(self.ready)
+
 
 class ParallelToolExecutor:
     """
@@ -225,31 +504,76 @@ class ParallelToolExecutor:
     
     Features:
     - Dependency analysis
-    - Parallel execution batches
-    - Result aggregation
-    - Ordering preservation
+    - DAG scheduling: a step starts as soon as its own dependencies complete
+    - Step priorities ("priority" key, higher runs first among ready steps)
+    - Per-tool / per-group concurrency limits (e.g. one GUI action at a time)
+    - Cancellation of dependents when a step fails
+    - Native asyncio path: coroutine tools run on the event loop, sync tools
+      in a bounded thread pool, with per-tool timeouts
+    - Critical-path report for the last run
+    - Result aggregation with ordering preservation
     """
     
     DEFAULT_MAX_WORKERS = 4
+    DEFAULT_ASYNC_CONCURRENCY = 32
+    
+    # Tools that share an exclusive device are limited as a group
+    TOOL_GROUPS = {
+        "move_mouse": "gui",
+        "click_mouse": "gui",
+        "click": "gui",
+        "type_text": "gui",
+        "press_key": "gui",
+        "native_click_ui": "gui",
+        "native_type_text": "gui",
+        "run_applescript": "applescript",
+        "native_applescript": "applescript",
+    }
+    
+    # Max concurrent steps per tool name or group; anything else is bounded by max_workers
+    DEFAULT_CONCURRENCY_LIMITS = {
+        "gui": 1,
+        "applescript": 1,
+    }
     
     def __init__(
         self,
         executor: StepExecutor,
         max_workers: Optional[int] = None,
-        verbose: bool = False
+        verbose: bool = False,
+        concurrency_limits: Optional[Dict[str, int]] = None,
+        max_async_concurrency: Optional[int] = None,
+        tool_timeouts: Optional[Dict[str, float]] = None
     ):
         """
         Args:
-            executor: Function to execute individual steps
+            executor: Function to execute individual steps (sync or ``async def``)
             max_workers: Max parallel workers (default: 4)
             verbose: Enable verbose logging
+            concurrency_limits: Overrides for per-tool/group limits (tool name or group -> max concurrent)
+            max_async_concurrency: Max in-flight steps on the async path (default: 32)
+            tool_timeouts: Per-tool timeouts in seconds for the async path
         """
         self.executor = executor
         self.max_workers = max_workers or int(os.getenv("PARALLEL_MAX_WORKERS", self.DEFAULT_MAX_WORKERS))
+        self.max_async_concurrency = max_async_concurrency or int(
+            os.getenv("PARALLEL_ASYNC_CONCURRENCY", self.DEFAULT_ASYNC_CONCURRENCY)
+        )
         self.verbose = verbose
+        self.concurrency_limits = dict(self.DEFAULT_CONCURRENCY_LIMITS)
+        self.concurrency_limits.update(concurrency_limits or {})
+        self.tool_timeouts = {k.lower(): v for k, v in (tool_timeouts or {}).items()}
+        default_timeout = os.getenv("PARALLEL_STEP_TIMEOUT")
+        self.default_timeout: Optional[float] = float(default_timeout) if default_timeout else None
         self.analyzer = DependencyAnalyzer()
         self._results: Dict[int, StepResult] = {}
         self._lock = threading.Lock()
+        self._last_graph: Optional[DependencyGraph] = None
+        self._last_order: List[int] = []
+        self._last_wall_ms = 0.0
+        self._executor_is_async = asyncio.iscoroutinefunction(executor) or asyncio.iscoroutinefunction(
+            getattr(executor, "__call__", None)
+        )
     
     def execute_parallel(
         self,
@@ -259,15 +583,30 @@ class ParallelToolExecutor:
         """
         Execute steps with parallel optimization.
         
+        Steps are launched as soon as all of their dependencies have completed,
+        ordered by priority among the ready set and subject to concurrency limits.
+        When a step fails, every step depending on it (transitively) is skipped.
+        
+        An async executor runs on a private event loop; when called from a thread
+        that already runs a loop, that private loop gets its own thread (async
+        callers should await ``execute_parallel_async`` instead).
+        
         Args:
             steps: List of step definitions
-            stop_on_error: Stop all execution if any step fails
+            stop_on_error: Stop launching new steps once any step fails
             
         Returns:
             List of StepResults in original step order
         """
         if not steps:
             return []
+        if self._executor_is_async:
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                return asyncio.run(self.execute_parallel_async(steps, stop_on_error))
+            with concurrent.futures.ThreadPoolExecutor(max_workers=1) as loop_thread:
+                return loop_thread.submit(asyncio.run, self.execute_parallel_async(steps, stop_on_error)).result()
         
         # Analyze dependencies
         graph = self.analyzer.analyze(steps)
@@ -275,65 +614,162 @@ class ParallelToolExecutor:
         if self.verbose:
             print(f"[ParallelExecutor] Analyzing {len(steps)} steps...")
         
-        # Track completion
-        completed: Set[int] = set()
-        pending = [s.get("id", i + 1) for i, s in enumerate(steps)]
-        step_map = {s.get("id", i + 1): s for i, s in enumerate(steps)}
+        run = _DagRun(self, graph, steps)
+        running: Dict[concurrent.futures.Future, int] = {}
+        started = time.perf_counter()
         
-        # Execute in batches
         with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as pool:
-            while pending:
-                # Find steps ready to execute
-                ready = graph.get_independent_steps(pending, completed)
-                
-                if not ready:
+            while run.unfinished:
+                for step_id in run.launchable(self.max_workers, len(running)):
                     if self.verbose:
-                        print(f"[ParallelExecutor] No ready steps. Pending: {pending}")
-                    # If nothing is ready but we have pending, force sequential
-                    ready = [pending[0]]
-                
-                # Limit batch size
-                batch = ready[:self.max_workers]
+                        print(f"[ParallelExecutor] Starting step {step_id}")
+                    running[pool.submit(self._execute_step, run.step_map[step_id])] = step_id
                 
-                if self.verbose:
-                    print(f"[ParallelExecutor] Executing batch: {batch}")
-                
-                # Submit batch
-                futures = {
-                    pool.submit(self._execute_step, step_map[step_id]): step_id
-                    for step_id in batch
-                }
+                if not running:
+                    if run.release_blocked():
+                        continue
+                    break
                 
-                # Wait for batch completion
-                error_occurred = False
-                for future in concurrent.futures.as_completed(futures):
-                    step_id = futures[future]
-                    result = future.result()
-                    
-                    with self._lock:
-                        self._results[step_id] = result
-                    
-                    completed.add(step_id)
-                    pending.remove(step_id)
-                    
-                    if result.status == StepStatus.FAILED:
-                        error_occurred = True
-                        if self.verbose:
-                            print(f"[ParallelExecutor] Step {step_id} failed: {result.error}")
+                done, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    step_id = running.pop(future)
+                    run.finish(step_id, future.result(), stop_on_error)
+        
+        if run.halted:
+            run.skip_remaining()
+        self._finish_run(graph, run.order, started)
+        
+        # Return results in original order
+        return self._ordered_results(run.order)
+    
+    async def execute_parallel_async(
+        self,
+        steps: List[Dict[str, Any]],
+        stop_on_error: bool = True
+    ) -> List[StepResult]:
+        """
+        Async version of parallel execution.
+        
+        Runs the same DAG schedule on the running event loop. An ``async def``
+        executor is awaited directly (no thread hop); a sync executor runs in a
+        thread pool bounded by ``max_workers``. Mixed dispatchers can be async and
+        offload blocking tools with ``await executor.run_sync(func, ...)``.
+        
+        Each step is bounded by its timeout (step "timeout" key, then
+        ``tool_timeouts``, then PARALLEL_STEP_TIMEOUT); a timed-out coroutine is
+        cancelled and reported as FAILED. Cancelling this coroutine cancels
+        every in-flight step.
+        
+        Returns:
+            List of StepResults in original step order
+        """
+        if not steps:
+            return []
+        
+        graph = self.analyzer.analyze(steps)
+        
+        if self.verbose:
+            print(f"[ParallelExecutor] Analyzing {len(steps)} steps (async)...")
+        
+        run = _DagRun(self, graph, steps)
+        max_running = self.max_async_concurrency if self._executor_is_async else self.max_workers
+        running: Dict["asyncio.Future[StepResult]", int] = {}
+        started = time.perf_counter()
+        pool = concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers)
+        token = _current_sync_pool.set(pool)
+        
+        try:
+            while run.unfinished:
+                for step_id in run.launchable(max_running, len(running)):
+                    if self.verbose:
+                        print(f"[ParallelExecutor] Starting step {step_id}")
+                    task: "asyncio.Future[StepResult]" = asyncio.ensure_future(
+                        self._execute_step_async(run.step_map[step_id], pool)
+                    )
+                    running[task] = step_id
                 
-                if error_occurred and stop_on_error:
-                    # Mark remaining as skipped
-                    for step_id in pending:
-                        with self._lock:
-                            self._results[step_id] = StepResult(
-                                step_id=step_id,
-                                status=StepStatus.SKIPPED,
-                                error="Skipped due to previous failure"
-                            )
+                if not running:
+                    if run.release_blocked():
+                        continue
                     break
+                
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    step_id = running.pop(task)
+                    run.finish(step_id, task.result(), stop_on_error)
+        except asyncio.CancelledError:
+            for task in running:
+                task.cancel()
+            await asyncio.gather(*running, return_exceptions=True)
+            raise
+        finally:
+            _current_sync_pool.reset(token)
+            pool.shutdown(wait=False)
         
-        # Return results in original order
-        return [self._results.get(s.get("id", i + 1)) for i, s in enumerate(steps)]
+        if run.halted:
+            run.skip_remaining()
+        self._finish_run(graph, run.order, started)
+        
+        return self._ordered_results(run.order)
+    
+    async def run_sync(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run a blocking call from an async executor in the run's bounded thread pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_current_sync_pool.get(), functools.partial(func, *args, **kwargs))
+    
+    def get_critical_path(self) -> Dict[str, Any]:
+        """
+        Critical-path report for the last execute_parallel run.
+        
+        The critical path is the longest chain of dependent steps by measured
+        duration; it bounds how fast the plan can run with unlimited workers.
+        """
+        with self._lock:
+            graph = self._last_graph
+            order = list(self._last_order)
+            wall_ms = self._last_wall_ms
+            durations = {
+                step_id: self._results[step_id].duration_ms
+                for step_id in order if step_id in self._results
+            }
+        if graph is None:
+            return {"steps": [], "duration_ms": 0.0}
+        
+        chain, length_ms = graph.critical_path(order, durations)
+        total_work_ms = sum(durations.values())
+        return {
+            "steps": chain,
+            "duration_ms": round(length_ms, 2),
+            "wall_ms": round(wall_ms, 2),
+            "total_work_ms": round(total_work_ms, 2),
+            "parallelism": round(total_work_ms / wall_ms, 2) if wall_ms > 0 else 1.0,
+            "scheduling_overhead_ms": round(max(0.0, wall_ms - length_ms), 2),
+        }
+    
+    def _limit_key(self, step: Dict[str, Any]) -> str:
+        tool = str(step.get("tool", "")).lower()
+        return self.TOOL_GROUPS.get(tool, tool)
+    
+    def _timeout_for(self, step: Dict[str, Any]) -> Optional[float]:
+        timeout = step.get("timeout")
+        if timeout is None:
+            timeout = self.tool_timeouts.get(str(step.get("tool", "")).lower(), self.default_timeout)
+        return float(timeout) if timeout else None
+    
+    def _record(self, result: StepResult) -> None:
+        with self._lock:
+            self._results[result.step_id] = result
+    
+    def _ordered_results(self, order: List[int]) -> List[StepResult]:
+        """Results in step order; every step has one once a run ends (skipped steps included)."""
+        results = [self._results.get(step_id) for step_id in order]
+        return [r for r in results if r is not None]
+    
+    def _finish_run(self, graph: DependencyGraph, order: List[int], started: float) -> None:
+        with self._lock:
+            self._last_graph = graph
+            self._last_order = order
+            self._last_wall_ms = (time.perf_counter() - started) * 1000
     
     def _execute_step(self, step: Dict[str, Any]) -> StepResult:
         """Execute a single step."""
@@ -366,20 +802,41 @@ class ParallelToolExecutor:
                 completed_at=completed_at
             )
     
-    async def execute_parallel_async(
+    async def _execute_step_async(
         self,
-        steps: List[Dict[str, Any]],
-        stop_on_error: bool = True
-    ) -> List[StepResult]:
-        """
-        Async version of parallel execution.
+        step: Dict[str, Any],
+        pool: concurrent.futures.ThreadPoolExecutor
+    ) -> StepResult:
+        """Execute a single step on the event loop (or in the pool for sync executors)."""
+        step_id = step.get("id", 0)
+        timeout = self._timeout_for(step)
+        started_at = datetime.now()
+        error: Optional[str] = None
+        result: Any = None
         
-        Useful when the executor is also async.
-        """
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(
-            None, 
-            lambda: self.execute_parallel(steps, stop_on_error)
+        try:
+            if self._executor_is_async:
+                pending = self.executor(step)
+            else:
+                pending = asyncio.get_running_loop().run_in_executor(pool, self.executor, step)
+            result = await asyncio.wait_for(pending, timeout) if timeout else await pending
+        except asyncio.TimeoutError:
+            # A sync tool keeps running in its thread; only the wait is abandoned.
+            error = f"Timed out after {timeout:g}s"
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            error = str(e)
+        
+        completed_at = datetime.now()
+        return StepResult(
+            step_id=step_id,
+            status=StepStatus.FAILED if error is not None else StepStatus.COMPLETED,
+            result=result,
+            error=error,
+            duration_ms=(completed_at - started_at).total_seconds() * 1000,
+            started_at=started_at,
+            completed_at=completed_at
         )
     
     def get_stats(self) -> Dict[str, Any]:
@@ -417,11 +874,13 @@ PARALLEL_ENABLED = os.getenv("ENABLE_PARALLEL", "true").lower() == "true"
 def create_parallel_executor(
     executor: StepExecutor,
     max_workers: Optional[int] = None,
-    verbose: bool = False
+    verbose: bool = False,
+    tool_timeouts: Optional[Dict[str, float]] = None
 ) -> ParallelToolExecutor:
     """Factory function to create parallel executor."""
     return ParallelToolExecutor(
         executor=executor,
         max_workers=max_workers,
-        verbose=verbose
+        verbose=verbose,
+        tool_timeouts=tool_timeouts
     )
@@ -0,0 +1,169 @@
+"""Stable prompt prefixes and a local response cache for agent prompts.
+
+Agent prompts are built as a byte-stable system prefix (role text, tools,
+language) followed by a human message that carries everything that changes
+per turn, with volatile blocks such as the vision context or forbidden
+actions appended last (``with_volatile_suffix``). Provider-side prefix
+caching can then reuse the shared prefix across turns.
+
+``PromptResponseCache`` answers exact repeats locally: the key is a hash of
+the model, the bound tool set and every message, so only a byte-identical
+prompt (e.g. the same replan prompt after a retry) is served from cache. It
+also tracks per agent how long the stable prefix is and how often it repeats.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+def with_volatile_suffix(content: str, **sections: str) -> str:
+    """Append non-empty ``sections`` (title from the keyword) after ``content``."""
+    blocks = [
+        f"{name.replace('_', ' ').upper()}:\n{value.strip()}"
+        for name, value in sections.items()
+        if value and value.strip()
+    ]
+    if not blocks:
+        return content
+    return content + "\n\n" + "\n\n".join(blocks)
+
+
+# CopilotLLM reports transport failures as response content with these markers
+FAILURE_PREFIXES = ("[COPILOT ERROR]", "[COPILOT]")
+
+
+def _is_cacheable_response(response: Any) -> bool:
+    """Non-empty responses that are not provider failures (those must be retried, not replayed)."""
+    if response is None:
+        return False
+    content = getattr(response, "content", None)
+    if isinstance(content, str) and content.lstrip().startswith(FAILURE_PREFIXES):
+        return False
+    return bool(content) or bool(getattr(response, "tool_calls", None))
+
+
+def _message_parts(messages: List[Any]) -> List[Tuple[str, str]]:
+    return [(type(m).__name__, str(getattr(m, "content", m))) for m in messages]
+
+
+class PromptResponseCache:
+    """LRU+TTL cache of LLM responses keyed by the full prompt hash.
+
+    Args:
+        max_entries: Cached responses kept (PROMPT_CACHE_SIZE).
+        ttl_seconds: Response lifetime (PROMPT_CACHE_TTL).
+        agents: Agents whose responses may be served from cache
+            (PROMPT_CACHE_AGENTS, comma-separated). Other agents are only measured.
+    """
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+        agents: Optional[List[str]] = None,
+    ):
+        self.max_entries = max_entries or int(os.getenv("PROMPT_CACHE_SIZE", "128"))
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else float(os.getenv("PROMPT_CACHE_TTL", "600"))
+        if agents is None:
+            agents = [a.strip() for a in os.getenv("PROMPT_CACHE_AGENTS", "meta_planner,atlas").split(",") if a.strip()]
+        self.agents = set(agents)
+        self._cache: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._last_prefix: Dict[str, str] = {}
+        self._stats: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def invoke(
+        self,
+        agent: str,
+        messages: List[Any],
+        call: Callable[[], Any],
+        model: str = "",
+        tools_fingerprint: str = "",
+    ) -> Tuple[Any, Dict[str, Any]]:
+        """Return ``(response, info)``; ``call`` runs only when the prompt is not cached.
+
+        ``info`` holds the per-call metrics (prefix length, prefix repeat, cache hit).
+        """
+        parts = _message_parts(messages)
+        prefix = parts[0][1] if parts and parts[0][0] == "SystemMessage" else ""
+        prefix_hash = hashlib.sha256(prefix.encode("utf-8")).hexdigest()
+        digest = hashlib.sha256()
+        for piece in (model, tools_fingerprint, *(f"{kind}\0{text}" for kind, text in parts)):
+            digest.update(piece.encode("utf-8"))
+            digest.update(b"\x1e")
+        key = f"{agent}:{digest.hexdigest()}"
+        cacheable = agent in self.agents
+
+        now = time.monotonic()
+        with self._lock:
+            st = self._stats.setdefault(agent, {
+                "calls": 0, "cache_hits": 0, "cache_misses": 0,
+                "prefix_repeats": 0, "prefix_chars": 0, "suffix_chars": 0,
+            })
+            st["calls"] += 1
+            prefix_repeat = self._last_prefix.get(agent) == prefix_hash
+            st["prefix_repeats"] += prefix_repeat
+            self._last_prefix[agent] = prefix_hash
+            st["prefix_chars"] = len(prefix)
+            st["suffix_chars"] += sum(len(text) for _, text in parts) - len(prefix)
+
+            cached = self._cache.get(key) if cacheable else None
+            if cached is not None and self.ttl_seconds and now - cached[0] > self.ttl_seconds:
+                del self._cache[key]
+                cached = None
+            if cached is not None:
+                self._cache.move_to_end(key)
+                st["cache_hits"] += 1
+            elif cacheable:
+                st["cache_misses"] += 1
+
+        info = {
+            "agent": agent,
+            "prefix_chars": len(prefix),
+            "prefix_hash": prefix_hash[:12],
+            "prefix_repeat": prefix_repeat,
+            "cache_hit": cached is not None,
+        }
+        if cached is not None:
+            return cached[1], info
+
+        response = call()
+        if cacheable and _is_cacheable_response(response):
+            with self._lock:
+                self._cache[key] = (time.monotonic(), response)
+                self._cache.move_to_end(key)
+                while len(self._cache) > self.max_entries:
+                    self._cache.popitem(last=False)
+        return response, info
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            agents = {}
+            for agent, st in self._stats.items():
+                st = dict(st)
+                st["prefix_repeat_rate"] = round(st["prefix_repeats"] / st["calls"], 3) if st["calls"] else 0.0
+                st["avg_suffix_chars"] = int(st.pop("suffix_chars") / st["calls"]) if st["calls"] else 0
+                agents[agent] = st
+            return {"cached": len(self._cache), "cacheable_agents": sorted(self.agents), "agents": agents}
+
+
+_prompt_cache: Optional[PromptResponseCache] = None
+_prompt_cache_lock = threading.Lock()
+
+
+def get_prompt_cache() -> PromptResponseCache:
+    """Get the process-wide prompt response cache."""
+    global _prompt_cache
+    if _prompt_cache is None:
+        with _prompt_cache_lock:
+            if _prompt_cache is None:
+                _prompt_cache = PromptResponseCache()
+    return _prompt_cache
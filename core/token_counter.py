@@ -0,0 +1,164 @@
+"""Token counting for context budgets.
+
+Context7 used to budget with fixed characters-per-token ratios (4 in
+``prepare_with_window``, 3 in ``prepare``). Ukrainian/Cyrillic text tokenizes
+at roughly two characters per token, so those budgets overflowed the model
+window for Cyrillic content and wasted it for code. The counters here are:
+
+- ``BPETokenCounter``: the real tokenizer, loaded from a local vocab file
+  (a HuggingFace ``tokenizer.json`` through ``tokenizers``, or a ``.tiktoken``
+  BPE ranks file through ``tiktoken``); set CONTEXT7_TOKENIZER to its path;
+- ``HeuristicTokenCounter``: a script-aware estimate used when no vocab file
+  is configured or it cannot be loaded;
+- ``CachedTokenCounter``: memoizes counts by content hash, so sections that
+  repeat across Trinity steps are tokenized once.
+"""
+
+import hashlib
+import math
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Sequence
+
+
+class HeuristicTokenCounter:
+    """Estimate: ~4 ASCII characters per token, ~2 per non-ASCII (Cyrillic) character.
+
+    Works from the UTF-8 byte length, so it costs one C-level encode per text.
+    """
+
+    name = "heuristic"
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        # Each 2-byte (Cyrillic) character adds one byte over its length
+        extra = len(text.encode("utf-8", "replace")) - len(text)
+        return math.ceil((len(text) - extra) / 4 + extra / 2)
+
+
+class BPETokenCounter:
+    """Exact token counts from a local tokenizer vocab file.
+
+    Args:
+        path: ``tokenizer.json`` (HuggingFace tokenizers) or ``*.tiktoken`` (BPE ranks).
+    """
+
+    # cl100k/o200k-style pre-tokenizer split, used with .tiktoken rank files
+    TIKTOKEN_PATTERN = (
+        r"""(?i:'s|'t|'re|'ve|'m|'ll|'d)|[^\r\n\p{L}\p{N}]?\p{L}+|\p{N}{1,3}| ?[^\s\p{L}\p{N}]+[\r\n]*|\s*[\r\n]+|\s+(?!\S)|\s+"""
+    )
+
+    def __init__(self, path: str):
+        self.path = os.path.expanduser(path)
+        self.name = f"bpe:{os.path.basename(self.path)}"
+        self._encode: Callable[[str], Sequence[int]]
+        if self.path.endswith(".tiktoken"):
+            import tiktoken
+            from tiktoken.load import load_tiktoken_bpe
+
+            encoding = tiktoken.Encoding(
+                name=os.path.basename(self.path),
+                pat_str=self.TIKTOKEN_PATTERN,
+                mergeable_ranks=load_tiktoken_bpe(self.path),
+                special_tokens={},
+            )
+            self._encode = lambda text: encoding.encode_ordinary(text)
+        else:
+            from tokenizers import Tokenizer
+
+            tokenizer = Tokenizer.from_file(self.path)
+            self._encode = lambda text: tokenizer.encode(text, add_special_tokens=False).ids
+
+    def count(self, text: str) -> int:
+        return len(self._encode(text)) if text else 0
+
+
+class CachedTokenCounter:
+    """LRU memoization of another counter's results, keyed by a hash of the text.
+
+    Args:
+        counter: Counter to delegate misses to.
+        max_entries: Cached counts kept (CONTEXT7_TOKEN_CACHE_SIZE).
+    """
+
+    # Below this length counting is cheaper than hashing for the cache key
+    MIN_CACHED_CHARS = 64
+
+    def __init__(self, counter: Any, max_entries: Optional[int] = None):
+        self.counter = counter
+        self.name = counter.name
+        self.max_entries = max_entries or int(os.getenv("CONTEXT7_TOKEN_CACHE_SIZE", "2048"))
+        self._cache: "OrderedDict[bytes, int]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0}
+
+    def count(self, text: str) -> int:
+        if len(text) < self.MIN_CACHED_CHARS:
+            return int(self.counter.count(text))
+        key = hashlib.sha1(text.encode("utf-8", "replace")).digest()
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self._stats["hits"] += 1
+                return cached
+            self._stats["misses"] += 1
+        tokens = int(self.counter.count(text))
+        with self._lock:
+            self._cache[key] = tokens
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return tokens
+
+    def truncate(self, text: str, max_tokens: int, keep: str = "head") -> str:
+        """Longest prefix (``keep="head"``) or suffix (``"tail"``) of ``text`` within ``max_tokens``."""
+        if max_tokens <= 0:
+            return ""
+        total = self.count(text)
+        if total <= max_tokens:
+            return text
+        # Start from the proportional cut and shrink until it fits
+        cut: int = int(len(text) * max_tokens / total)
+        while cut > 0:
+            part = text[:cut] if keep == "head" else text[len(text) - cut:]
+            if self.count(part) <= max_tokens:
+                return part
+            cut = int(cut * 0.9)
+        return ""
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._stats)
+            stats["cached"] = len(self._cache)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+        stats["tokenizer"] = self.name
+        return stats
+
+
+def load_token_counter(path: Optional[str] = None) -> CachedTokenCounter:
+    """Cached counter over the BPE vocab at ``path`` (or CONTEXT7_TOKENIZER), else the heuristic."""
+    path = path or os.getenv("CONTEXT7_TOKENIZER", "").strip()
+    counter: Any = HeuristicTokenCounter()
+    if path:
+        try:
+            counter = BPETokenCounter(path)
+        except Exception as e:
+            print(f"[TokenCounter] Cannot load tokenizer {path}: {e}; using heuristic")
+    return CachedTokenCounter(counter)
+
+
+_token_counter: Optional[CachedTokenCounter] = None
+_token_counter_lock = threading.Lock()
+
+
+def get_token_counter() -> CachedTokenCounter:
+    """Get the process-wide token counter."""
+    global _token_counter
+    if _token_counter is None:
+        with _token_counter_lock:
+            if _token_counter is None:
+                _token_counter = load_token_counter()
+    return _token_counter
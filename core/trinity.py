@@ -13,11 +13,15 @@ from core.agents.tetyana import get_tetyana_prompt
 from core.agents.grisha import get_grisha_prompt, get_grisha_media_prompt
 from core.vision_context import VisionContextManager
 from providers.copilot import CopilotLLM
+from providers.llm_registry import get_llm_registry
 
 from core.mcp import MCPToolRegistry
 from core.context7 import Context7
 from core.verification import AdaptiveVerifier
-from core.memory import get_memory
+from core.memory import get_lazy_memory, query_experience
+from core.message_store import MessageLog, load_content, merge_messages
+from core.prompt_cache import get_prompt_cache
+from core.parallel_executor import PARALLEL_ENABLED, StepStatus, create_parallel_executor
 from core.self_healing import IssueSeverity
 from core.vibe_assistant import VibeCLIAssistant
 from dataclasses import dataclass
@@ -42,7 +46,7 @@ class TrinityPermissions:
 
 # Define the state of the Trinity system
 class TrinityState(TypedDict):
-    messages: List[BaseMessage]
+    messages: Annotated[MessageLog, merge_messages]  # Bounded, spilled history; see core.message_store
     current_agent: str
     task_status: str
     final_response: Optional[str]
@@ -69,6 +73,7 @@ class TrinityState(TypedDict):
     vibe_assistant_pause: Optional[Dict[str, Any]]  # Vibe CLI Assistant pause state
     vibe_assistant_context: Optional[str]  # Context for Vibe CLI Assistant
     vision_context: Optional[Dict[str, Any]] # Enhanced visual context
+    compacted_folded: Optional[int]  # MessageLog.compacted_total already folded into summary
     learning_mode: Optional[bool]
 
 class TrinityRuntime:
@@ -91,10 +96,16 @@ class TrinityRuntime:
         hyper_mode: bool = False,
         learning_mode: bool = False
     ):
+        init_started = time.perf_counter()
+        # Memory opens its vector store in the background while the rest of the runtime is built;
+        # only the first node that actually reads or writes memory can block on it.
+        self.memory = get_lazy_memory()
         self.llm = CopilotLLM()
         self.verbose = verbose
         self.logger = get_logger("system_cli.trinity")
         self.registry = MCPToolRegistry()
+        # Warm external MCP servers in the background before the first prompt lists them
+        self.registry.start_external_providers()
         self.learning_mode = learning_mode
         
         # Integrate MCP tools with Trinity's registry
@@ -107,8 +118,9 @@ class TrinityRuntime:
         
         self.context_layer = Context7(verbose=verbose)
         self.verifier = AdaptiveVerifier(self.llm)
-        self.memory = get_memory()
         self.permissions = permissions or TrinityPermissions()
+        # Run independent tool calls from one Tetyana response concurrently
+        self.parallel_tools = PARALLEL_ENABLED and os.getenv("TETYANA_PARALLEL_TOOLS", "true").lower() == "true"
         self.preferred_language = preferred_language
         # Callback for streaming deltas: (agent_name, text_delta)
         self.on_stream = on_stream
@@ -140,6 +152,43 @@ class TrinityRuntime:
         
         # Register core tools including enhanced vision
         self._register_tools()
+        self.startup_metrics = {"runtime_init_ms": round((time.perf_counter() - init_started) * 1000, 2)}
+        try:
+            trace(self.logger, "runtime_startup", self.get_startup_metrics())
+        except Exception:
+            pass
+
+    def get_startup_metrics(self) -> Dict[str, Any]:
+        """Runtime construction time plus memory warm-up (init_ms) and time callers spent waiting on it."""
+        return {**self.startup_metrics, "memory": dict(self.memory.metrics), "memory_ready": self.memory.ready}
+
+    def get_prompt_stats(self) -> Dict[str, Any]:
+        """Per-agent prompt prefix length, prefix repeat rate and response-cache hits."""
+        return get_prompt_cache().get_stats()
+
+    def _invoke_agent(self, agent: str, llm: Any, messages: List[BaseMessage], on_delta: Optional[Callable[[str], None]] = None) -> Any:
+        """Invoke ``llm`` through the prompt response cache; exact repeats return the cached response."""
+        def call():
+            if on_delta is not None:
+                return llm.invoke_with_stream(messages, on_delta=on_delta)
+            return llm.invoke(messages)
+
+        response, info = get_prompt_cache().invoke(
+            agent,
+            messages,
+            call,
+            model=str(getattr(llm, "model_name", "") or ""),
+            tools_fingerprint=str(getattr(llm, "_tools_fingerprint", "") or ""),
+        )
+        if info["cache_hit"] and on_delta is not None:
+            content = getattr(response, "content", "")
+            if content:
+                on_delta(content)
+        try:
+            trace(self.logger, "prompt_cache", info)
+        except Exception:
+            pass
+        return response
 
     def _register_tools(self) -> None:
         """Register all local tools and MCP tools."""
@@ -530,6 +579,7 @@ class TrinityRuntime:
             "final_response": None,
             "plan": [],
             "summary": "",
+            "compacted_folded": 0,
             "step_count": 0,
             "replan_count": 0,
             "pause_info": None,
@@ -670,7 +720,17 @@ class TrinityRuntime:
 
         # 1. Update Summary Memory periodically
         summary = state.get("summary", "")
-        if len(context) > 6 and step_count % 3 == 0:
+        # Turns evicted from the message window are folded in on the usual cadence, or
+        # earlier once TRINITY_COMPACT_FOLD are pending (before the compacted deque drops any)
+        compacted_folded = int(state.get("compacted_folded") or 0)
+        compacted = context.pending_compacted(compacted_folded) if isinstance(context, MessageLog) else []
+        if hasattr(context, "get_stats"):
+            try:
+                trace(self.logger, "message_store", context.get_stats())
+            except Exception:
+                pass
+        fold_at = int(os.getenv("TRINITY_COMPACT_FOLD", "20"))
+        if (len(context) > 6 and step_count % 3 == 0) or len(compacted) >= fold_at:
              try:
                 # Safe content extraction - handle objects without .content attribute
                 recent_contents = []
@@ -678,13 +738,16 @@ class TrinityRuntime:
                     msg_content = getattr(m, "content", "") if m is not None else ""
                     if msg_content:
                         recent_contents.append(str(msg_content)[:4000])
-                
+
+                earlier = ("Earlier events (compacted):\n" + "\n".join(compacted) + "\n\n") if compacted else ""
                 summary_prompt = [
                     SystemMessage(content=f"You are the Trinity archivist. Create a concise summary (2-3 sentences) of the current task state in {self.preferred_language}. What has been done? What remains?"),
-                    HumanMessage(content=f"Current summary: {summary}\n\nRecent events:\n" + "\n".join(recent_contents))
+                    HumanMessage(content=f"Current summary: {summary}\n\n{earlier}Recent events:\n" + "\n".join(recent_contents))
                 ]
                 sum_resp = self.llm.invoke(summary_prompt)
                 summary = getattr(sum_resp, "content", "")
+                if compacted and isinstance(context, MessageLog):
+                    compacted_folded = context.compacted_total
                 if self.verbose: print(f"🧠 [Meta-Planner] Summary update: {summary[:50] if summary else '(empty)'}...")
              except Exception:
                 pass
@@ -693,10 +756,10 @@ class TrinityRuntime:
         lang = self.preferred_language if self.preferred_language in MESSAGES else "en"
         if step_count >= self.MAX_STEPS:
             msg = MESSAGES[lang]["step_limit_reached"].format(limit=self.MAX_STEPS)
-            return {"current_agent": "end", "messages": list(context) + [AIMessage(content=f"[VOICE] {msg}")]}
+            return {"current_agent": "end", "messages": [AIMessage(content=f"[VOICE] {msg}")]}
         if replan_count >= self.MAX_REPLANS:
             msg = MESSAGES[lang]["replan_limit_reached"].format(limit=self.MAX_REPLANS)
-            return {"current_agent": "end", "messages": list(context) + [AIMessage(content=f"[VOICE] {msg}")]}
+            return {"current_agent": "end", "messages": [AIMessage(content=f"[VOICE] {msg}")]}
 
         # 2. Plan Maintenance (Consumption)
         if plan:
@@ -716,7 +779,7 @@ class TrinityRuntime:
                     if has_verified:
                         lang = self.preferred_language if self.preferred_language in MESSAGES else "en"
                         msg = MESSAGES[lang]["task_achieved"]
-                        return {"current_agent": "end", "messages": list(context) + [AIMessage(content=f"[VOICE] {msg}")]}
+                        return {"current_agent": "end", "messages": [AIMessage(content=f"[VOICE] {msg}")]}
                     else:
                         if self.verbose: print("🧠 [Meta-Planner] Plan exhausted but Global Goal NOT verified. Triggering replan for next steps.")
                         # Do not return 'end' here; let the decision logic below set action = 'replan'
@@ -797,7 +860,7 @@ class TrinityRuntime:
             prompt = get_meta_planner_prompt(task_context, preferred_language=self.preferred_language)
             
             try:
-                resp = self.llm.invoke(prompt.format_messages())
+                resp = self._invoke_agent("meta_planner", self.llm, prompt.format_messages())
                 resp_content = getattr(resp, "content", "") if resp is not None else ""
                 data = self._extract_json_object(resp_content)
                 if data and "meta_config" in data:
@@ -808,24 +871,19 @@ class TrinityRuntime:
                         limit = int(meta_config.get("n_results", 3))
                         
                         if self.verbose: print(f"🧠 [Meta-Planner] Selective RAG lookup: '{query}' (top {limit})...")
-                        mem_res = self.memory.query_memory("knowledge_base", query, n_results=limit)
+                        # Filtered in the store: all failures, successes above the confidence floor
+                        mem_res = query_experience(
+                            self.memory, query, n_results=limit,
+                            min_confidence=float(meta_config.get("min_confidence", 0.3)),
+                        )
                         
-                        # Filter memories: Prioritize high confidence, be wary of 'failed' ones
+                        # Prioritize proven experience, be wary of 'failed' ones
                         relevant_context = []
                         for r in mem_res:
-                            m = r.get("metadata", {})
-                            status = m.get("status", "success")
-                            conf = float(m.get("confidence", 1.0))
-                            
-                            if status == "success" and conf > 0.3:
-                                relevant_context.append(f"[SUCCESS] {r.get('content')}")
-                            elif status == "failed":
+                            if r.get("metadata", {}).get("status") == "failed":
                                 relevant_context.append(f"[WARNING: FAILED PREVIOUSLY] Avoid this: {r.get('content')}")
-                        
-                        if not relevant_context:
-                            # fallback to strategies
-                            mem_res = self.memory.query_memory("strategies", query, n_results=limit)
-                            relevant_context = [r.get("content", "") for r in mem_res]
+                            else:
+                                relevant_context.append(f"[SUCCESS] {r.get('content')}")
                         
                         state["retrieved_context"] = "\n".join(relevant_context)
                     
@@ -842,12 +900,14 @@ class TrinityRuntime:
                 "current_step_fail_count": current_step_fail_count,
                 "gui_fallback_attempted": False if action == "replan" else state.get("gui_fallback_attempted"),
                 "summary": summary,
+                "compacted_folded": compacted_folded,
                 "retrieved_context": state.get("retrieved_context", "")
             }
 
         # 5. Default flow
         out = self._atlas_dispatch(state, plan)
         out["summary"] = summary
+        out["compacted_folded"] = compacted_folded
         return out
 
     def _atlas_node(self, state: TrinityState):
@@ -915,9 +975,9 @@ class TrinityRuntime:
 
             # Use Atlas-specific LLM
             atlas_model = os.getenv("ATLAS_MODEL") or os.getenv("COPILOT_MODEL") or "gpt-4.1"
-            atlas_llm = CopilotLLM(model_name=atlas_model)
+            atlas_llm = get_llm_registry().get("atlas", model_name=atlas_model)
 
-            plan_resp = atlas_llm.invoke_with_stream(prompt.format_messages(), on_delta=on_delta)
+            plan_resp = self._invoke_agent("atlas", atlas_llm, prompt.format_messages(), on_delta=on_delta)
             plan_resp_content = getattr(plan_resp, "content", "") if plan_resp is not None else ""
             data = self._extract_json_object(plan_resp_content)
             
@@ -925,7 +985,7 @@ class TrinityRuntime:
             if isinstance(data, list): raw_plan = data
             elif isinstance(data, dict):
                 if data.get("status") == "completed":
-                    return {"current_agent": "end", "messages": list(context) + [AIMessage(content=f"[VOICE] {data.get('message', 'Done.')}")]}
+                    return {"current_agent": "end", "messages": [AIMessage(content=f"[VOICE] {data.get('message', 'Done.')}")]}
                 raw_plan = data.get("steps") or data.get("plan") or []
                 if data.get("meta_config"):
                     meta_config.update(data["meta_config"])
@@ -936,7 +996,7 @@ class TrinityRuntime:
 
             # Optimize with Grisha (Verifier) using GRISHA settings
             grisha_model = os.getenv("GRISHA_MODEL") or os.getenv("COPILOT_MODEL") or "gpt-4.1"
-            grisha_llm = CopilotLLM(model_name=grisha_model)
+            grisha_llm = get_llm_registry().get("grisha", model_name=grisha_model)
             local_verifier = AdaptiveVerifier(grisha_llm)
             
             optimized_plan = local_verifier.optimize_plan(raw_plan, meta_config=meta_config)
@@ -972,7 +1032,7 @@ class TrinityRuntime:
                     "vibe_assistant_pause": pause_context,
                     "vibe_assistant_context": f"PAUSED: Planning failure for task: {last_msg}",
                     "current_agent": "meta_planner",  # Stay in meta_planner to handle pause
-                    "messages": list(context) + [AIMessage(content=f"[VOICE] Doctor Vibe: Виникла проблема з плануванням. Будь ласка, уточніть завдання.")]
+                    "messages": [AIMessage(content=f"[VOICE] Doctor Vibe: Виникла проблема з плануванням. Будь ласка, уточніть завдання.")]
                 }
             else:
                 # Regular fallback for other errors
@@ -989,7 +1049,7 @@ class TrinityRuntime:
         
         current_step = plan[0] if plan else None
         if not current_step:
-            return {"current_agent": "end", "messages": list(context) + [AIMessage(content="[VOICE] План порожній.")]}
+            return {"current_agent": "end", "messages": [AIMessage(content="[VOICE] План порожній.")]}
 
         desc = current_step.get('description', '')
         step_type = current_step.get("type", "execute")
@@ -1000,7 +1060,7 @@ class TrinityRuntime:
         
         return {
             "current_agent": next_agent,
-            "messages": list(context) + [AIMessage(content=content)],
+            "messages": [AIMessage(content=content)],
             "plan": plan,
             "step_count": step_count,
             "replan_count": replan_count,
@@ -1074,9 +1134,10 @@ class TrinityRuntime:
         
         # Use Tetyana-specific LLM
         tetyana_model = os.getenv("TETYANA_MODEL") or os.getenv("COPILOT_MODEL") or "gpt-4o"
-        tetyana_llm = CopilotLLM(model_name=tetyana_model)
-        
-        bound_llm = tetyana_llm.bind_tools(tool_defs)
+        # Reuse the role's bound client; it is rebuilt only when the model or tool set changes.
+        tetyana_llm = get_llm_registry().get(
+            "tetyana", model_name=tetyana_model, tools=tool_defs, tools_version=self.registry.tools_version
+        )
         
         pause_info = None
         content = ""  # Initialize content variable
@@ -1088,7 +1149,7 @@ class TrinityRuntime:
                     self.on_stream("tetyana", chunk)
             
             # Use Tetyana's local bound LLM
-            response = tetyana_llm.invoke_with_stream(prompt.format_messages(), on_delta=on_delta)
+            response = self._invoke_agent("tetyana", tetyana_llm, prompt.format_messages(), on_delta=on_delta)
             content = getattr(response, "content", "") if response is not None else ""
             tool_calls = getattr(response, "tool_calls", []) if response is not None and hasattr(response, 'tool_calls') else []
             
@@ -1100,7 +1161,7 @@ class TrinityRuntime:
                     if self.verbose: print("⚠️ [Tetyana] Acknowledgment loop detected. Forcing retry...")
                     new_msg = AIMessage(content=f"[VOICE] Error: No tool call provided. STOP TALKING, USE A TOOL. {content}")
                     return {
-                        "messages": context + [new_msg],
+                        "messages": [new_msg],
                         "last_step_status": "failed" # This will trigger replan or retry
                     }
 
@@ -1150,50 +1211,54 @@ class TrinityRuntime:
                 "get_windsurf_current_project_path",
             }
             if tool_calls:
-                for tool in tool_calls:
-                    name = tool.get("name")
-                    args = tool.get("args") or {}
-
-                    def _general_allows_file_write(tool_name: str, tool_args: Dict[str, Any]) -> bool:
-                        try:
-                            from system_ai.tools.filesystem import _normalize_special_paths  # type: ignore
+                def _general_allows_file_write(tool_name: str, tool_args: Dict[str, Any]) -> bool:
+                    try:
+                        from system_ai.tools.filesystem import _normalize_special_paths  # type: ignore
 
-                            git_root = self._get_git_root() or ""
-                            home = os.path.expanduser("~")
-                            allowed_roots = {
-                                home,
-                                os.path.join(os.sep, "tmp"),
-                            }
+                        git_root = self._get_git_root() or ""
+                        home = os.path.expanduser("~")
+                        allowed_roots = {
+                            home,
+                            os.path.join(os.sep, "tmp"),
+                        }
 
-                            def _is_allowed_path(p: str) -> bool:
-                                p2 = _normalize_special_paths(str(p or ""))
-                                ap = os.path.abspath(os.path.expanduser(str(p2 or "").strip()))
-                                if not ap:
-                                    return False
-                                # Block any writes inside repo for GENERAL tasks.
-                                if git_root and (ap == git_root or ap.startswith(git_root + os.sep)):
-                                    return False
-                                # Allow within home (or /tmp) only.
-                                if ap == home or ap.startswith(home + os.sep):
-                                    return True
-                                if ap == os.path.join(os.sep, "tmp") or ap.startswith(os.path.join(os.sep, "tmp") + os.sep):
-                                    return True
+                        def _is_allowed_path(p: str) -> bool:
+                            p2 = _normalize_special_paths(str(p or ""))
+                            ap = os.path.abspath(os.path.expanduser(str(p2 or "").strip()))
+                            if not ap:
                                 return False
-
-                            if tool_name == "write_file":
-                                return _is_allowed_path(tool_args.get("path"))
-                            if tool_name == "copy_file":
-                                return _is_allowed_path(tool_args.get("dst"))
-                            return False
-                        except Exception:
+                            # Block any writes inside repo for GENERAL tasks.
+                            if git_root and (ap == git_root or ap.startswith(git_root + os.sep)):
+                                return False
+                            # Allow within home (or /tmp) only.
+                            if ap == home or ap.startswith(home + os.sep):
+                                return True
+                            if ap == os.path.join(os.sep, "tmp") or ap.startswith(os.path.join(os.sep, "tmp") + os.sep):
+                                return True
                             return False
 
+                        if tool_name == "write_file":
+                            return _is_allowed_path(tool_args.get("path"))
+                        if tool_name == "copy_file":
+                            return _is_allowed_path(tool_args.get("dst"))
+                        return False
+                    except Exception:
+                        return False
+
+                # 1. Gate every call (routing + permissions) before anything runs.
+                gated: List[Dict[str, Any]] = []
+                for tool in tool_calls:
+                    name = tool.get("name")
+                    args = tool.get("args") or {}
+                    call = {"name": name, "args": args, "blocked": None, "pause_info": None}
+                    gated.append(call)
+
                     if task_type == "GENERAL" and name in windsurf_tools:
-                        results.append(f"[BLOCKED] {name}: GENERAL task must not use Windsurf dev subsystem")
+                        call["blocked"] = f"[BLOCKED] {name}: GENERAL task must not use Windsurf dev subsystem"
                         continue
                     if task_type == "GENERAL" and name in file_write_tools:
                         if not _general_allows_file_write(name, args):
-                            results.append(f"[BLOCKED] {name}: GENERAL write allowed only outside repo (home/tmp).")
+                            call["blocked"] = f"[BLOCKED] {name}: GENERAL write allowed only outside repo (home/tmp)."
                             continue
 
                     if (
@@ -1202,64 +1267,82 @@ class TrinityRuntime:
                         and requires_windsurf
                         and dev_edit_mode == "windsurf"
                     ):
-                        results.append(
-                            f"[BLOCKED] {name}: DEV task requires Windsurf-first. Use send_to_windsurf/open_file_in_windsurf, or switch to CLI fallback if Windsurf is unavailable."
-                        )
+                        call["blocked"] = f"[BLOCKED] {name}: DEV task requires Windsurf-first. Use send_to_windsurf/open_file_in_windsurf, or switch to CLI fallback if Windsurf is unavailable."
                         continue
 
                     # Permission check for file writes
                     if name in file_write_tools and not (self.permissions.allow_file_write or self.permissions.hyper_mode):
-                        pause_info = {
+                        call["pause_info"] = {
                             "permission": "file_write",
                             "message": "Потрібен дозвіл на запис у файли. Увімкніть Unsafe mode в TUI або перезапустіть задачу з allow_file_write.",
                             "blocked_tool": name,
                             "blocked_args": args,
                         }
-                        results.append(f"[BLOCKED] {name}: permission required")
+                        call["blocked"] = f"[BLOCKED] {name}: permission required"
                         continue
                     
                     # Permission check for dangerous tools
                     if name in shell_tools and not (self.permissions.allow_shell or self.permissions.hyper_mode):
-                        pause_info = {
+                        call["pause_info"] = {
                             "permission": "shell",
                             "message": "Потрібен дозвіл на виконання shell команд. Увімкніть Unsafe mode або додайте CONFIRM_SHELL у запит.",
                             "blocked_tool": name,
                             "blocked_args": args
                         }
-                        results.append(f"[BLOCKED] {name}: permission required")
+                        call["blocked"] = f"[BLOCKED] {name}: permission required"
                         continue
 
                     if name == "run_shortcut" and not (self.permissions.allow_shortcuts or self.permissions.hyper_mode):
-                        pause_info = {
+                        call["pause_info"] = {
                             "permission": "shortcuts",
                             "message": "Потрібен дозвіл на запуск Shortcuts. Увімкніть Unsafe mode (або дозвольте shortcuts у налаштуваннях).",
                             "blocked_tool": name,
                             "blocked_args": args,
                         }
-                        results.append(f"[BLOCKED] {name}: permission required")
+                        call["blocked"] = f"[BLOCKED] {name}: permission required"
                         continue
                         
                     if name in applescript_tools and not (self.permissions.allow_applescript or self.permissions.hyper_mode):
-                        pause_info = {
+                        call["pause_info"] = {
                             "permission": "applescript",
                             "message": "Потрібен дозвіл на виконання AppleScript. Увімкніть Unsafe mode або додайте CONFIRM_APPLESCRIPT у запит.",
                             "blocked_tool": name,
                             "blocked_args": args
                         }
-                        results.append(f"[BLOCKED] {name}: permission required")
+                        call["blocked"] = f"[BLOCKED] {name}: permission required"
                         continue
                     if name in gui_tools and not (self.permissions.allow_gui or self.permissions.hyper_mode):
-                        pause_info = {
+                        call["pause_info"] = {
                             "permission": "gui",
                             "message": "Потрібен дозвіл на GUI automation (mouse/keyboard). Увімкніть Unsafe mode або додайте CONFIRM_GUI у запит.",
                             "blocked_tool": name,
                             "blocked_args": args,
                         }
-                        results.append(f"[BLOCKED] {name}: permission required")
+                        call["blocked"] = f"[BLOCKED] {name}: permission required"
                         continue
-                        
-                    # Execute via MCP Registry
-                    res_str = self.registry.execute(name, args)
+
+                # 2. Run independent approved calls concurrently. A Windsurf failure aborts the
+                # rest of the step, so batches that touch Windsurf stay strictly sequential.
+                approved = [c for c in gated if c["blocked"] is None]
+                if (
+                    self.parallel_tools
+                    and len(approved) > 1
+                    and not any(c["name"] in windsurf_tools for c in approved)
+                ):
+                    self._execute_tool_calls_parallel(approved)
+
+                # 3. Process outcomes in the original call order.
+                for call in gated:
+                    name = call["name"]
+                    args = call["args"]
+                    if call["blocked"] is not None:
+                        if call["pause_info"] is not None:
+                            pause_info = call["pause_info"]
+                        results.append(call["blocked"])
+                        continue
+
+                    # Execute via MCP Registry (unless the parallel batch already did)
+                    res_str = call["result"] if "result" in call else self.registry.execute(name, args)
                     results.append(f"Result for {name}: {res_str}")
 
                     windsurf_failed = False
@@ -1271,7 +1354,7 @@ class TrinityRuntime:
                         except Exception:
                             pass
                         if windsurf_failed and not pause_info and dev_edit_mode == "windsurf":
-                            updated_messages = list(context) + [
+                            updated_messages = [
                                 AIMessage(content="[VOICE] Windsurf не відповідає. Перемикаюсь на CLI режим.")
                             ]
                             
@@ -1346,7 +1429,7 @@ class TrinityRuntime:
                 # Tell the graph to retry this step in GUI mode.
                 lang = self.preferred_language if self.preferred_language in MESSAGES else "en"
                 msg = MESSAGES[lang]["native_failed_switching_gui"]
-                updated_messages = list(context) + [AIMessage(content=msg)]
+                updated_messages = [AIMessage(content=msg)]
                 
                 try:
                     trace(self.logger, "tetyana_gui_fallback", {"from": execution_mode, "to": "gui"})
@@ -1368,7 +1451,7 @@ class TrinityRuntime:
         
         # If paused, return to atlas with pause_info
         if pause_info:
-            updated_messages = list(context) + [AIMessage(content=f"[ПАУЗОВАНО] {pause_info['message']}")]
+            updated_messages = [AIMessage(content=f"[ПАУЗОВАНО] {pause_info['message']}")]
             
             try:
                 trace(self.logger, "tetyana_paused", {"pause_info": pause_info})
@@ -1382,7 +1465,7 @@ class TrinityRuntime:
             }
         
         # Preserve existing messages and add new one
-        updated_messages = list(context) + [AIMessage(content=content)]
+        updated_messages = [AIMessage(content=content)]
         
         try:
             trace(self.logger, "tetyana_exit", {
@@ -1404,12 +1487,48 @@ class TrinityRuntime:
             "last_step_status": "failed" if had_failure else "success",
         }
 
+    def _execute_tool_calls_parallel(self, calls: List[Dict[str, Any]]) -> None:
+        """Execute approved tool calls through the dependency-aware parallel executor.
+
+        Each call dict gets its result string under ``"result"``. Per-batch wall-clock
+        savings versus running the calls back to back are written to the trace log.
+        """
+        steps = [{"tool": c["name"], "args": c["args"]} for c in calls]
+        executor = create_parallel_executor(
+            executor=lambda step: self.registry.execute(step["tool"], step["args"]),
+        )
+        started = time.perf_counter()
+        step_results = executor.execute_parallel(steps, stop_on_error=False)
+        wall_ms = (time.perf_counter() - started) * 1000
+
+        serial_ms = 0.0
+        for call, step_result in zip(calls, step_results):
+            if step_result is not None and step_result.status == StepStatus.COMPLETED:
+                call["result"] = step_result.result
+            else:
+                error = step_result.error if step_result is not None else "not executed"
+                call["result"] = f"Error executing tool '{call['name']}': {error}"
+            if step_result is not None:
+                serial_ms += step_result.duration_ms
+
+        try:
+            trace(self.logger, "tetyana_parallel_batch", {
+                "tools": [c["name"] for c in calls],
+                "calls": len(calls),
+                "wall_ms": round(wall_ms, 1),
+                "sequential_ms": round(serial_ms, 1),
+                "saved_ms": round(max(0.0, serial_ms - wall_ms), 1),
+                "speedup": round(serial_ms / wall_ms, 2) if wall_ms > 0 else 1.0,
+            })
+        except Exception:
+            pass
+
     def _grisha_node(self, state: TrinityState):
         if self.verbose: print("👁️ [Grisha] Verifying...")
         context = state.get("messages", [])
         if not context:
             return {"current_agent": "end", "messages": [AIMessage(content="[VOICE] Немає контексту для перевірки.")]}
-        last_msg = getattr(context[-1], "content", "") if context and len(context) > 0 and context[-1] is not None else ""
+        last_msg = load_content(context[-1]) if context and len(context) > 0 and context[-1] is not None else ""
         if isinstance(last_msg, str) and len(last_msg) > 50000:
             last_msg = last_msg[:45000] + "\n\n[... TRUNCATED DUE TO SIZE ...]\n\n" + last_msg[-5000:]
         tool_calls = [] # Initialize for scope safety
@@ -1521,9 +1640,9 @@ class TrinityRuntime:
             
             # Use Grisha-specific LLM
             grisha_model = os.getenv("GRISHA_MODEL") or os.getenv("COPILOT_MODEL") or "gpt-4.1"
-            grisha_llm = CopilotLLM(model_name=grisha_model)
+            grisha_llm = get_llm_registry().get("grisha", model_name=grisha_model)
             
-            response = grisha_llm.invoke_with_stream(prompt.format_messages(), on_delta=on_delta)
+            response = self._invoke_agent("grisha", grisha_llm, prompt.format_messages(), on_delta=on_delta)
             content = getattr(response, "content", "") if response is not None else ""
             tool_calls = getattr(response, "tool_calls", []) if response is not None and hasattr(response, 'tool_calls') else []
             
@@ -1744,7 +1863,7 @@ class TrinityRuntime:
 
         out = {
             "current_agent": next_agent, 
-            "messages": list(context) + [AIMessage(content=verdict_content)],
+            "messages": [AIMessage(content=verdict_content)],
             "last_step_status": step_status,
             "uncertain_streak": current_streak,
             "plan": state.get("plan"),  # Always preserve plan in state
@@ -1908,7 +2027,7 @@ class TrinityRuntime:
         final_msg = "[VOICE] Досвід збережено. Завдання завершено." if self.preferred_language == "uk" else "[VOICE] Experience stored. Task completed."
         return {
             "current_agent": "end",
-            "messages": context + [AIMessage(content=final_msg)]
+            "messages": [AIMessage(content=final_msg)]
         }
 
     def _get_git_root(self) -> Optional[str]:
@@ -2365,6 +2484,7 @@ class TrinityRuntime:
             "final_response": None,
             "plan": [],
             "summary": "",
+            "compacted_folded": 0,
             "step_count": 0,
             "replan_count": 0,
             "uncertain_streak": 0,
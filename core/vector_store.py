@@ -0,0 +1,473 @@
+"""In-process vector store backend for AtlasMemory.
+
+A lightweight alternative to ChromaDB for small and medium stores. The
+client and its collections implement the subset of the Chroma API that
+core.memory uses (``get_or_create_collection``; ``add``/``upsert``/``query``/
+``get``/``delete``/``count``), so AtlasMemory can use either one as
+``self.client``.
+
+Storage, per persist directory:
+- ``<collection>.f32``: append-only float32 matrix of L2-normalized vectors,
+  memory-mapped for search.
+- ``vectors.sqlite``: ids, documents and JSON metadata per row, with
+  tombstones for rows deleted or replaced by an upsert.
+
+Search is exact cosine (one matrix-vector product). Past IVF_MIN_ROWS live
+rows, an IVF index (k-means lists, probing the nearest ``nprobe`` lists) is
+trained on the first unfiltered query and kept up to date on appends.
+Returned distances are cosine distances (1 - similarity).
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+
+BACKENDS = ("chroma", "numpy")
+
+
+def resolve_backend(name: Optional[str] = None) -> str:
+    """Backend from ``name`` or MEMORY_BACKEND: chroma | numpy | auto (chroma when importable)."""
+    name = (name or os.getenv("MEMORY_BACKEND") or "chroma").strip().lower()
+    if name == "auto":
+        try:
+            import chromadb  # noqa: F401
+            return "chroma"
+        except ImportError:
+            return "numpy"
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown memory backend: {name} (expected one of {', '.join(BACKENDS)} or auto)")
+    return name
+
+
+def _match(meta: Dict[str, Any], where: Optional[Dict[str, Any]]) -> bool:
+    """Evaluate a Chroma-style metadata filter ($and/$or, $eq/$ne/$gt/$gte/$lt/$lte/$in/$nin)."""
+    if not where:
+        return True
+    for key, cond in where.items():
+        if key == "$and":
+            if not all(_match(meta, c) for c in cond):
+                return False
+            continue
+        if key == "$or":
+            if not any(_match(meta, c) for c in cond):
+                return False
+            continue
+        value = meta.get(key)
+        if not isinstance(cond, dict):
+            cond = {"$eq": cond}
+        for op, target in cond.items():
+            try:
+                if op == "$eq":
+                    ok = value == target
+                elif op == "$ne":
+                    ok = value != target
+                elif op == "$in":
+                    ok = value in target
+                elif op == "$nin":
+                    ok = value not in target
+                elif value is None:
+                    ok = False
+                elif op == "$gt":
+                    ok = value > target
+                elif op == "$gte":
+                    ok = value >= target
+                elif op == "$lt":
+                    ok = value < target
+                elif op == "$lte":
+                    ok = value <= target
+                else:
+                    raise ValueError(f"Unsupported filter operator: {op}")
+            except TypeError:
+                ok = False
+            if not ok:
+                return False
+    return True
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+class _IVFIndex:
+    """Inverted-file index over normalized rows: k-means centroids plus per-list row ids."""
+
+    def __init__(self, vectors: np.ndarray, rows: np.ndarray, nlist: int, iterations: int = 8):
+        rng = np.random.default_rng(0)
+        sample = vectors[rng.choice(len(vectors), size=min(len(vectors), nlist * 40), replace=False)]
+        centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            for c in range(nlist):
+                members = sample[assign == c]
+                if len(members):
+                    centroids[c] = members.mean(axis=0)
+            centroids = _normalize(centroids)
+        self.centroids = centroids
+        self.lists: List[List[int]] = [[] for _ in range(nlist)]
+        self.add(vectors, rows)
+
+    def add(self, vectors: np.ndarray, rows: Iterable[int]) -> None:
+        for row, c in zip(rows, np.argmax(vectors @ self.centroids.T, axis=1)):
+            self.lists[int(c)].append(int(row))
+
+    def candidates(self, query: np.ndarray, nprobe: int) -> np.ndarray:
+        nearest = np.argsort(-(self.centroids @ query))[:nprobe]
+        return np.fromiter((r for c in nearest for r in self.lists[c]), dtype=np.int64)
+
+
+class NumpyCollection:
+    """Chroma-compatible collection over a memory-mapped float32 matrix and SQLite metadata."""
+
+    IVF_MIN_ROWS = 20000
+
+    def __init__(self, client: "NumpyVectorClient", name: str, metadata: Optional[Dict[str, Any]],
+                 embedding_function: Optional[Callable[[List[str]], Sequence[Any]]]):
+        self.name = name
+        self.metadata = metadata
+        self._client = client
+        self._ef = embedding_function
+        self._path = os.path.join(client.path, f"{name}.f32")
+        self._lock = threading.RLock()
+        self.nprobe = int(os.getenv("MEMORY_IVF_NPROBE", "8"))
+
+        self._dim: Optional[int] = None
+        self._rows = 0
+        self._matrix: Optional[np.ndarray] = None
+        self._alive = np.zeros(0, dtype=bool)
+        self._row_of: Dict[str, int] = {}
+        self._ids: Dict[int, str] = {}
+        self._docs: Dict[int, str] = {}
+        self._metas: Dict[int, Dict[str, Any]] = {}
+        self._ivf: Optional[_IVFIndex] = None
+        self._load()
+
+    # --- Chroma API subset ---
+
+    def add(self, ids: List[str], documents: Optional[List[str]] = None, metadatas: Optional[List[Dict]] = None,
+            embeddings: Optional[Sequence[Any]] = None) -> None:
+        with self._lock:
+            existing = [i for i in ids if i in self._row_of]
+            if existing:
+                # Chroma ignores adds of existing ids
+                keep = [n for n, i in enumerate(ids) if i not in self._row_of]
+                ids = [ids[n] for n in keep]
+                documents = [documents[n] for n in keep] if documents else None
+                metadatas = [metadatas[n] for n in keep] if metadatas else None
+                embeddings = [embeddings[n] for n in keep] if embeddings is not None else None
+            if ids:
+                self._append(ids, documents, metadatas, embeddings)
+
+    def upsert(self, ids: List[str], documents: Optional[List[str]] = None, metadatas: Optional[List[Dict]] = None,
+               embeddings: Optional[Sequence[Any]] = None) -> None:
+        with self._lock:
+            self._append(ids, documents, metadatas, embeddings)
+
+    def update(self, ids: List[str], metadatas: Optional[List[Dict]] = None) -> None:
+        """Replace metadata of existing ids in place (no re-embedding); unknown ids are ignored."""
+        if not metadatas:
+            return
+        with self._lock:
+            changed = []
+            for memory_id, meta in zip(ids, metadatas):
+                row = self._row_of.get(memory_id)
+                if row is None:
+                    continue
+                self._metas[row] = dict(self._metas[row], **(meta or {}))
+                changed.append((json.dumps(self._metas[row], ensure_ascii=False), row))
+            self._client._set_metadata(self.name, changed)
+
+    def query(self, query_texts: Optional[List[str]] = None, query_embeddings: Optional[Sequence[Any]] = None,
+              n_results: int = 10, where: Optional[Dict[str, Any]] = None,
+              include: Optional[List[str]] = None) -> Dict[str, Any]:
+        if query_embeddings is None:
+            query_embeddings = self._embed(list(query_texts or []))
+        queries = _normalize(np.asarray(query_embeddings, dtype=np.float32).reshape(len(query_embeddings), -1))
+        out: Dict[str, List[Any]] = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        with self._lock:
+            rows = self._candidate_rows(where)
+            for q in queries:
+                ids, docs, metas, dists = [], [], [], []
+                if self._matrix is not None and len(rows):
+                    search_rows = rows
+                    ivf = self._ivf if where is None and self._ivf_ready() else None
+                    if ivf is not None:
+                        probed = ivf.candidates(q, self.nprobe)
+                        probed = probed[self._alive[probed]]
+                        if len(probed) >= n_results:
+                            search_rows = probed
+                    if len(search_rows) * 4 > self._rows:
+                        # Mostly everything: one product over the mapped matrix beats gathering rows first
+                        sims = (self._matrix @ q)[search_rows]
+                    else:
+                        sims = self._matrix[search_rows] @ q
+                    k = min(n_results, len(search_rows))
+                    top = np.argpartition(-sims, k - 1)[:k]
+                    top = top[np.argsort(-sims[top])]
+                    for t in top:
+                        row = int(search_rows[t])
+                        ids.append(self._id_of(row))
+                        docs.append(self._docs[row])
+                        metas.append(dict(self._metas[row]))
+                        dists.append(float(1.0 - sims[t]))
+                out["ids"].append(ids)
+                out["documents"].append(docs)
+                out["metadatas"].append(metas)
+                out["distances"].append(dists)
+        return out
+
+    def get(self, ids: Optional[List[str]] = None, where: Optional[Dict[str, Any]] = None,
+            limit: Optional[int] = None, offset: Optional[int] = None,
+            include: Optional[List[str]] = None) -> Dict[str, Any]:
+        include = include or ["documents", "metadatas"]
+        with self._lock:
+            if ids is not None:
+                rows = [self._row_of[i] for i in ids if i in self._row_of]
+                rows = [r for r in rows if _match(self._metas[r], where)]
+            else:
+                rows = [int(r) for r in self._candidate_rows(where)]
+            rows = rows[offset or 0:]
+            if limit is not None:
+                rows = rows[:limit]
+            out: Dict[str, Any] = {"ids": [self._id_of(r) for r in rows]}
+            out["documents"] = [self._docs[r] for r in rows] if "documents" in include else None
+            out["metadatas"] = [dict(self._metas[r]) for r in rows] if "metadatas" in include else None
+            if "embeddings" in include:
+                matrix = self._matrix
+                out["embeddings"] = (
+                    np.array(matrix[rows]) if rows and matrix is not None else np.zeros((0, self._dim or 0), np.float32)
+                )
+            return out
+
+    def delete(self, ids: Optional[List[str]] = None, where: Optional[Dict[str, Any]] = None) -> None:
+        with self._lock:
+            if ids is not None:
+                rows = [self._row_of[i] for i in ids if i in self._row_of]
+                if where:
+                    rows = [r for r in rows if _match(self._metas[r], where)]
+            else:
+                rows = [int(r) for r in self._candidate_rows(where)]
+            self._tombstone(rows)
+
+    def count(self) -> int:
+        with self._lock:
+            return len(self._row_of)
+
+    # --- internals ---
+
+    def _embed(self, texts: List[str]) -> List[Any]:
+        if self._ef is None:
+            raise ValueError(f"Collection {self.name} has no embedding function; pass embeddings")
+        return list(self._ef(texts))
+
+    def _id_of(self, row: int) -> str:
+        return self._ids[row]
+
+    def _candidate_rows(self, where: Optional[Dict[str, Any]]) -> np.ndarray:
+        alive = np.flatnonzero(self._alive)
+        if not where:
+            return alive
+        return np.fromiter((r for r in alive if _match(self._metas[int(r)], where)), dtype=np.int64)
+
+    def _append(self, ids: List[str], documents, metadatas, embeddings) -> None:
+        if not ids:
+            return
+        documents = list(documents) if documents else [""] * len(ids)
+        metadatas = [dict(m or {}) for m in metadatas] if metadatas else [{} for _ in ids]
+        if embeddings is None:
+            embeddings = self._embed(documents)
+        vectors = _normalize(np.asarray(embeddings, dtype=np.float32).reshape(len(ids), -1))
+        # A repeated id within one call: last one wins, as with sequential upserts
+        latest = {i: n for n, i in enumerate(ids)}
+        order = sorted(latest.values())
+        vectors = vectors[order]
+        if self._dim is None:
+            self._dim = vectors.shape[1]
+            self._client._set_dim(self.name, self._dim)
+        elif vectors.shape[1] != self._dim:
+            raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match collection dimension {self._dim}")
+
+        self._tombstone([self._row_of[ids[n]] for n in order if ids[n] in self._row_of])
+        row_bytes = 4 * self._dim
+        with open(self._path, "ab") as f:
+            # Rows are numbered by file offset: vectors orphaned by a failed metadata insert
+            # stay behind as dead rows instead of shifting every later row onto the wrong vector
+            start = f.tell() // row_bytes
+            if f.tell() != start * row_bytes:
+                f.truncate(start * row_bytes)
+            f.write(vectors.tobytes())
+        if start > self._rows:
+            self._alive = np.concatenate([self._alive, np.zeros(start - self._rows, dtype=bool)])
+            self._rows = start
+        rows = list(range(start, start + len(order)))
+        self._client._insert(self.name, [
+            (row, ids[n], documents[n], json.dumps(metadatas[n], ensure_ascii=False))
+            for row, n in zip(rows, order)
+        ])
+        for row, n in zip(rows, order):
+            self._row_of[ids[n]] = row
+            self._ids[row] = ids[n]
+            self._docs[row] = documents[n]
+            self._metas[row] = metadatas[n]
+        self._rows += len(order)
+        self._alive = np.concatenate([self._alive, np.ones(len(order), dtype=bool)])
+        self._remap()
+        if self._ivf is not None:
+            self._ivf.add(vectors, rows)
+
+    def _tombstone(self, rows: List[int]) -> None:
+        if not rows:
+            return
+        for row in rows:
+            self._alive[row] = False
+            self._row_of.pop(self._ids.pop(row), None)
+            self._docs.pop(row, None)
+            self._metas.pop(row, None)
+        self._client._kill(self.name, rows)
+        if self._rows > 1024 and len(self._row_of) < self._rows // 2:
+            self._compact()
+
+    def _remap(self) -> None:
+        if self._rows and self._dim:
+            self._matrix = np.memmap(self._path, dtype=np.float32, mode="r", shape=(self._rows, self._dim))
+        else:
+            self._matrix = None
+
+    def _ivf_ready(self) -> bool:
+        """Train the IVF index on first use once the collection is large enough."""
+        if self._ivf is None and len(self._row_of) >= self.IVF_MIN_ROWS:
+            self._train_ivf()
+        return self._ivf is not None
+
+    def _train_ivf(self) -> None:
+        if self._matrix is None:
+            return
+        rows = np.flatnonzero(self._alive)
+        nlist = max(16, int(np.sqrt(len(rows))))
+        self._ivf = _IVFIndex(np.asarray(self._matrix[rows]), rows, nlist)
+
+    def _compact(self) -> None:
+        """Rewrite the matrix without dead rows once they outnumber live ones."""
+        live = np.flatnonzero(self._alive)
+        matrix = self._matrix
+        if len(live) and matrix is not None:
+            vectors = np.array(matrix[live])
+        else:
+            vectors = np.zeros((0, self._dim or 0), np.float32)
+        self._matrix = None
+        tmp = self._path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(vectors.tobytes())
+        os.replace(tmp, self._path)
+        remap = {int(old): new for new, old in enumerate(live)}
+        self._client._renumber(self.name, remap)
+        self._ids = {remap[r]: i for r, i in self._ids.items()}
+        self._docs = {remap[r]: d for r, d in self._docs.items()}
+        self._metas = {remap[r]: m for r, m in self._metas.items()}
+        self._row_of = {i: r for r, i in self._ids.items()}
+        self._rows = len(live)
+        self._alive = np.ones(self._rows, dtype=bool)
+        self._remap()
+        self._ivf = None
+
+    def _load(self) -> None:
+        self._dim = self._client._get_dim(self.name)
+        if self._dim is None or not os.path.exists(self._path):
+            return
+        self._rows = os.path.getsize(self._path) // (4 * self._dim)
+        self._alive = np.zeros(self._rows, dtype=bool)
+        for row, memory_id, document, metadata in self._client._rows(self.name):
+            if row >= self._rows:
+                # Vector write lost in a crash after the metadata commit
+                continue
+            self._alive[row] = True
+            self._ids[row] = memory_id
+            self._row_of[memory_id] = row
+            self._docs[row] = document
+            self._metas[row] = json.loads(metadata)
+        self._remap()
+
+
+class NumpyVectorClient:
+    """Drop-in for ``chromadb.PersistentClient`` backed by NumpyCollection."""
+
+    def __init__(self, path: str):
+        self.path = os.path.join(path, "numpy_store")
+        os.makedirs(self.path, exist_ok=True)
+        self._db = sqlite3.connect(os.path.join(self.path, "vectors.sqlite"), check_same_thread=False)
+        self._db_lock = threading.Lock()
+        with self._db_lock, self._db:
+            self._db.execute("CREATE TABLE IF NOT EXISTS collections (name TEXT PRIMARY KEY, dim INTEGER, metadata TEXT)")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS items (collection TEXT, row INTEGER, id TEXT, document TEXT, "
+                "metadata TEXT, alive INTEGER DEFAULT 1, PRIMARY KEY (collection, row))"
+            )
+        self._collections: Dict[str, NumpyCollection] = {}
+
+    def get_or_create_collection(self, name: str, metadata: Optional[Dict[str, Any]] = None,
+                                 embedding_function: Optional[Callable] = None) -> NumpyCollection:
+        if name not in self._collections:
+            with self._db_lock, self._db:
+                self._db.execute(
+                    "INSERT OR IGNORE INTO collections (name, dim, metadata) VALUES (?, NULL, ?)",
+                    (name, json.dumps(metadata or {})),
+                )
+            self._collections[name] = NumpyCollection(self, name, metadata, embedding_function)
+        return self._collections[name]
+
+    def delete_collection(self, name: str) -> None:
+        self._collections.pop(name, None)
+        with self._db_lock, self._db:
+            self._db.execute("DELETE FROM items WHERE collection = ?", (name,))
+            self._db.execute("DELETE FROM collections WHERE name = ?", (name,))
+        try:
+            os.remove(os.path.join(self.path, f"{name}.f32"))
+        except FileNotFoundError:
+            pass
+
+    def _get_dim(self, name: str) -> Optional[int]:
+        with self._db_lock:
+            row = self._db.execute("SELECT dim FROM collections WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def _set_dim(self, name: str, dim: int) -> None:
+        with self._db_lock, self._db:
+            self._db.execute("UPDATE collections SET dim = ? WHERE name = ?", (dim, name))
+
+    def _rows(self, name: str) -> List[tuple]:
+        with self._db_lock:
+            return self._db.execute(
+                "SELECT row, id, document, metadata FROM items WHERE collection = ? AND alive = 1 ORDER BY row", (name,)
+            ).fetchall()
+
+    def _insert(self, name: str, rows: List[tuple]) -> None:
+        with self._db_lock, self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO items (collection, row, id, document, metadata, alive) VALUES (?, ?, ?, ?, ?, 1)",
+                [(name, *r) for r in rows],
+            )
+
+    def _set_metadata(self, name: str, rows: List[tuple]) -> None:
+        with self._db_lock, self._db:
+            self._db.executemany(
+                "UPDATE items SET metadata = ? WHERE collection = ? AND row = ?", [(m, name, r) for m, r in rows]
+            )
+
+    def _kill(self, name: str, rows: List[int]) -> None:
+        with self._db_lock, self._db:
+            self._db.executemany("UPDATE items SET alive = 0 WHERE collection = ? AND row = ?", [(name, r) for r in rows])
+
+    def _renumber(self, name: str, remap: Dict[int, int]) -> None:
+        with self._db_lock, self._db:
+            self._db.execute("DELETE FROM items WHERE collection = ? AND alive = 0", (name,))
+            # Shift out of the way first so new row numbers never clash with old ones
+            self._db.execute("UPDATE items SET row = -row - 1 WHERE collection = ?", (name,))
+            self._db.executemany(
+                "UPDATE items SET row = ? WHERE collection = ? AND row = ?",
+                [(new, name, -old - 1) for old, new in remap.items()],
+            )
@@ -0,0 +1,213 @@
+"""Indexed in-process working memory.
+
+Working memory used to be a plain dict scanned in full on every query: each
+item built a ``datetime`` to check its TTL and lowercased its content for a
+substring match. The store keeps items in ``__slots__`` records with a
+monotonic expiry time and maintains:
+
+- a min-heap of expiry times, so expired items are swept in O(k log n);
+- a priority-ordered index, so results come out already sorted;
+- an inverted token index, so a query only verifies items sharing its words;
+- LRU order for an optional size cap.
+"""
+
+import bisect
+import heapq
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def _tokens(text: str) -> Set[str]:
+    return set(_TOKEN_RE.findall(text.lower()))
+
+
+@dataclass(slots=True)
+class WorkingMemoryItem:
+    """Item stored in volatile working memory."""
+    content: str
+    context: str
+    priority: int = 0
+    timestamp: datetime = field(default_factory=datetime.now)
+    ttl_seconds: int = 3600  # 1 hour default TTL
+    expires_at: float = field(init=False, default=0.0)
+    content_lower: str = field(init=False, default="", repr=False)
+
+    def __post_init__(self):
+        self.expires_at = time.monotonic() + self.ttl_seconds
+        self.content_lower = self.content.lower()
+
+    def is_expired(self, now: Optional[float] = None) -> bool:
+        return (time.monotonic() if now is None else now) > self.expires_at
+
+
+class WorkingMemoryStore:
+    """Thread-safe working memory with TTL sweep, priority order and token index.
+
+    Args:
+        max_items: Evict least recently used items beyond this size (0 = unbounded).
+    """
+
+    def __init__(self, max_items: int = 0):
+        self.max_items = max_items
+        self._items: "OrderedDict[str, WorkingMemoryItem]" = OrderedDict()
+        self._seq: Dict[str, int] = {}
+        self._expiry_heap: List[Tuple[float, int, str]] = []
+        # (-priority, seq, key): ascending order is highest priority first, then insertion order
+        self._by_priority: List[Tuple[int, int, str]] = []
+        self._postings: Dict[str, Set[str]] = {}
+        self._counter = 0
+        self._lock = threading.Lock()
+        self._stats = {"expired": 0, "evicted": 0}
+
+    def put(self, key: str, item: WorkingMemoryItem) -> None:
+        with self._lock:
+            self._sweep(time.monotonic())
+            if key in self._items:
+                self._remove(key)
+            self._counter += 1
+            seq = self._counter
+            self._items[key] = item
+            self._seq[key] = seq
+            heapq.heappush(self._expiry_heap, (item.expires_at, seq, key))
+            bisect.insort(self._by_priority, (-item.priority, seq, key))
+            for token in _tokens(item.content):
+                self._postings.setdefault(token, set()).add(key)
+            while self.max_items and len(self._items) > self.max_items:
+                self._remove(next(iter(self._items)))
+                self._stats["evicted"] += 1
+
+    def get(self, key: str) -> Optional[WorkingMemoryItem]:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            if item.is_expired():
+                self._remove(key)
+                self._stats["expired"] += 1
+                return None
+            self._items.move_to_end(key)
+            return item
+
+    def query(self, query: str = "", min_priority: int = 0) -> List[Tuple[str, WorkingMemoryItem]]:
+        """(key, item) pairs whose content contains ``query`` (case-insensitive), highest priority first."""
+        with self._lock:
+            self._sweep(time.monotonic())
+            needle = query.lower()
+            candidates = self._candidates(needle) if needle else None
+            results = []
+            for neg_priority, _, key in self._by_priority:
+                if -neg_priority < min_priority:
+                    break
+                if candidates is not None and key not in candidates:
+                    continue
+                item = self._items[key]
+                if needle and needle not in item.content_lower:
+                    continue
+                results.append((key, item))
+            return results
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self._seq.clear()
+            self._expiry_heap.clear()
+            self._by_priority.clear()
+            self._postings.clear()
+
+    def sweep(self) -> int:
+        """Drop expired items now; returns how many were removed."""
+        with self._lock:
+            return self._sweep(time.monotonic())
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def values(self) -> List[WorkingMemoryItem]:
+        with self._lock:
+            return list(self._items.values())
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            swept = self._sweep(time.monotonic())
+            return {
+                "total_items": len(self._items) + swept,
+                "expired_items": swept,
+                "active_items": len(self._items),
+                "max_items": self.max_items,
+                "indexed_tokens": len(self._postings),
+                "expired_total": self._stats["expired"],
+                "evicted_total": self._stats["evicted"],
+            }
+
+    def _candidates(self, needle: str) -> Optional[Set[str]]:
+        """Keys that may contain ``needle``; the caller verifies the substring match.
+
+        Tokens bounded by non-word characters on both sides of the needle must
+        occur as whole words, so they are exact posting lookups. Only when the
+        needle has no such token (e.g. a single, possibly partial word) are the
+        posting keys scanned for tokens containing it.
+        Returns None when the query has no word characters (caller falls back to a scan).
+        """
+        whole: Set[str] = set()
+        partial: Set[str] = set()
+        for match in _TOKEN_RE.finditer(needle):
+            if match.start() > 0 and match.end() < len(needle):
+                whole.add(match.group())
+            else:
+                partial.add(match.group())
+        if not whole and not partial:
+            return None
+        candidates: Optional[Set[str]] = None
+        if whole:
+            # Rarest postings first: they narrow the set fastest
+            for postings in sorted((self._postings.get(t, set()) for t in whole), key=len):
+                candidates = set(postings) if candidates is None else candidates & postings
+                if not candidates:
+                    break
+            return candidates
+        for token in sorted(partial, key=len, reverse=True):
+            matched: Set[str] = set()
+            for word, keys in self._postings.items():
+                if token in word:
+                    matched |= keys
+            candidates = matched if candidates is None else candidates & matched
+            if not candidates:
+                break
+        return candidates
+
+    def _sweep(self, now: float) -> int:
+        removed = 0
+        heap = self._expiry_heap
+        while heap and heap[0][0] < now:
+            _, seq, key = heapq.heappop(heap)
+            # Entries for overwritten or deleted keys are stale; skip them
+            if self._seq.get(key) == seq:
+                self._remove(key, pop_heap=False)
+                removed += 1
+        self._stats["expired"] += removed
+        return removed
+
+    def _remove(self, key: str, pop_heap: bool = True) -> None:
+        item = self._items.pop(key)
+        seq = self._seq.pop(key)
+        i = bisect.bisect_left(self._by_priority, (-item.priority, seq, key))
+        if i < len(self._by_priority) and self._by_priority[i][2] == key:
+            del self._by_priority[i]
+        for token in _tokens(item.content):
+            keys = self._postings.get(token)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._postings[token]
+        # The heap entry is left in place and skipped by _sweep (lazy deletion);
+        # compact once stale entries dominate so the heap cannot grow unbounded
+        if pop_heap and len(self._expiry_heap) > 2 * len(self._items) + 64:
+            self._expiry_heap = [e for e in self._expiry_heap if self._seq.get(e[2]) == e[1]]
+            heapq.heapify(self._expiry_heap)
@@ -1,7 +1,12 @@
 
+import hashlib
 import json
 import os
-from typing import Any, Callable, List, Optional, Tuple
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import requests
 from langchain_core.messages import (
@@ -13,11 +18,347 @@ from langchain_core.messages import (
 from langchain_core.outputs import ChatGeneration, ChatResult
 from langchain_core.language_models import BaseChatModel
 
+from providers.transport import get_transport
+
+COPILOT_TOKEN_URL = "https://api.github.com/copilot_internal/v2/token"
+DEFAULT_COPILOT_API = "https://api.githubcopilot.com"
+
+
+def _fetch_copilot_token(api_key: str) -> Dict[str, Any]:
+    """Exchange a GitHub token for a short-lived Copilot session token."""
+    headers = {
+        "Authorization": f"token {api_key}",
+        "Editor-Version": "vscode/1.85.0",
+        "Editor-Plugin-Version": "copilot/1.144.0",
+        "User-Agent": "GithubCopilot/1.144.0",
+    }
+    response = get_transport().get(COPILOT_TOKEN_URL, headers=headers, timeout=30)
+    response.raise_for_status()
+    return response.json()
+
+
+@dataclass
+class _CachedSessionToken:
+    token: str
+    api_endpoint: str
+    expires_at: float
+    fetched_at: float
+    last_used: float = 0.0
+
+
+class CopilotTokenManager:
+    """Process-wide cache for Copilot session tokens.
+
+    Tokens are keyed by the GitHub API key and shared by every CopilotLLM
+    instance and thread. A cached token is served until it gets within
+    ``refresh_margin`` seconds of expiry; a timer refreshes it in the background
+    before that happens, so steady-state LLM calls never hit the token endpoint.
+    Tokens that were not used since the last refresh are left to expire.
+    """
+
+    DEFAULT_REFRESH_MARGIN = 120.0
+    DEFAULT_TTL = 25 * 60  # Used when the response carries no expiry information
+    RETRY_DELAY = 15.0  # Pause before retrying a failed background refresh
+
+    def __init__(
+        self,
+        fetcher: Optional[Callable[[str], Dict[str, Any]]] = None,
+        refresh_margin: Optional[float] = None,
+    ) -> None:
+        self._fetcher = fetcher or _fetch_copilot_token
+        if refresh_margin is None:
+            refresh_margin = float(os.getenv("COPILOT_TOKEN_REFRESH_MARGIN", self.DEFAULT_REFRESH_MARGIN))
+        self.refresh_margin = float(refresh_margin)
+        self._entries: Dict[str, _CachedSessionToken] = {}
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self._timers: Dict[str, threading.Timer] = {}
+        self._lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "refreshes": 0,
+            "background_refreshes": 0,
+            "failures": 0,
+            "invalidations": 0,
+        }
+
+    def get_token(self, api_key: str) -> Tuple[str, str]:
+        """Return ``(session_token, api_endpoint)``, fetching only on a cold or expired cache."""
+        with self._lock:
+            entry = self._entries.get(api_key)
+            now = time.time()
+            if entry and now < entry.expires_at:
+                self._stats["hits"] += 1
+                entry.last_used = now
+                if now >= entry.expires_at - self.refresh_margin and api_key not in self._timers:
+                    # Close to expiry with no refresh pending or in flight: refresh behind the caller.
+                    self._schedule_refresh_locked(api_key, 0.0)
+                return entry.token, entry.api_endpoint
+            self._stats["misses"] += 1
+            key_lock = self._key_locks.setdefault(api_key, threading.Lock())
+
+        # Single-flight: only one thread per key talks to the token endpoint.
+        with key_lock:
+            with self._lock:
+                entry = self._entries.get(api_key)
+                if entry and time.time() < entry.expires_at:
+                    entry.last_used = time.time()
+                    return entry.token, entry.api_endpoint
+            entry = self._refresh(api_key)
+        with self._lock:
+            entry.last_used = time.time()
+        return entry.token, entry.api_endpoint
+
+    def invalidate(self, api_key: Optional[str] = None) -> None:
+        """Drop cached tokens (e.g. after a 401) so the next call fetches a fresh one."""
+        with self._lock:
+            keys = [api_key] if api_key is not None else list(self._entries.keys())
+            for key in keys:
+                if self._entries.pop(key, None) is not None:
+                    self._stats["invalidations"] += 1
+                timer = self._timers.pop(key, None)
+                if timer is not None:
+                    timer.cancel()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Cache counters plus the remaining lifetime of each cached token."""
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._stats)
+            lookups = stats["hits"] + stats["misses"]
+            stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+            now = time.time()
+            stats["cached_tokens"] = len(self._entries)
+            stats["expires_in_seconds"] = [round(e.expires_at - now, 1) for e in self._entries.values()]
+            return stats
+
+    def _refresh(self, api_key: str) -> _CachedSessionToken:
+        try:
+            data = self._fetcher(api_key)
+        except Exception:
+            with self._lock:
+                self._stats["failures"] += 1
+            raise
+
+        token = data.get("token")
+        if not token:
+            with self._lock:
+                self._stats["failures"] += 1
+            raise RuntimeError("Copilot token response missing 'token' field.")
+        api_endpoint = (data.get("endpoints") or {}).get("api") or DEFAULT_COPILOT_API
+
+        now = time.time()
+        expires_at = now + self.DEFAULT_TTL
+        try:
+            if data.get("expires_at"):
+                expires_at = float(data["expires_at"])
+            elif data.get("refresh_in"):
+                expires_at = now + float(data["refresh_in"]) + self.refresh_margin
+        except (TypeError, ValueError):
+            pass
+
+        entry = _CachedSessionToken(token=token, api_endpoint=api_endpoint, expires_at=expires_at, fetched_at=now)
+        with self._lock:
+            self._entries[api_key] = entry
+            self._stats["refreshes"] += 1
+            delay = max(1.0, expires_at - self.refresh_margin - now)
+            self._schedule_refresh_locked(api_key, delay, replace=True)
+        return entry
+
+    def _schedule_refresh_locked(self, api_key: str, delay: float, replace: bool = False) -> None:
+        existing = self._timers.get(api_key)
+        if existing is not None:
+            if not replace:
+                return
+            existing.cancel()
+        timer = threading.Timer(delay, self._background_refresh, args=(api_key,))
+        timer.daemon = True
+        self._timers[api_key] = timer
+        timer.start()
+
+    def _background_refresh(self, api_key: str) -> None:
+        # The timer stays registered while the refresh runs, so callers do not schedule another one
+        with self._lock:
+            entry = self._entries.get(api_key)
+            # Idle tokens are not kept warm forever; the next caller refetches on demand.
+            if entry is None or entry.last_used < entry.fetched_at:
+                self._timers.pop(api_key, None)
+                return
+            key_lock = self._key_locks.setdefault(api_key, threading.Lock())
+        if not key_lock.acquire(blocking=False):
+            with self._lock:
+                self._timers.pop(api_key, None)
+            return  # A foreground refresh is already in flight and reschedules on success
+        try:
+            self._refresh(api_key)
+            with self._lock:
+                self._stats["background_refreshes"] += 1
+        except Exception:
+            # Keep serving the current token and retry later instead of on every call
+            with self._lock:
+                entry = self._entries.get(api_key)
+                remaining = entry.expires_at - time.time() if entry is not None else 0.0
+                if remaining > 0:
+                    self._schedule_refresh_locked(api_key, min(self.RETRY_DELAY, remaining / 2), replace=True)
+                else:
+                    self._timers.pop(api_key, None)
+        finally:
+            key_lock.release()
+
+
+_token_manager: Optional[CopilotTokenManager] = None
+_token_manager_lock = threading.Lock()
+
+
+def get_token_manager() -> CopilotTokenManager:
+    """Get the process-wide Copilot token manager."""
+    global _token_manager
+    if _token_manager is None:
+        with _token_manager_lock:
+            if _token_manager is None:
+                _token_manager = CopilotTokenManager()
+    return _token_manager
+
+
+def fingerprint_tools(tools: Optional[List[Any]]) -> str:
+    """Stable hash of a tool list (names + descriptions); empty string for no tools."""
+    if not tools:
+        return ""
+    payload = json.dumps(_tool_name_descriptions(tools), ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def _tool_name_descriptions(tools: List[Any]) -> List[Tuple[str, str]]:
+    items = []
+    for tool in tools:
+        if isinstance(tool, dict):
+            # MCPToolRegistry.get_all_tool_definitions() returns plain dicts
+            items.append((str(tool.get("name", "tool")), str(tool.get("description", ""))))
+        else:
+            name = getattr(tool, "name", getattr(tool, "__name__", "tool"))
+            items.append((str(name), str(getattr(tool, "description", ""))))
+    return items
+
+
+TOOL_PROTOCOL_INSTRUCTIONS = (
+    "У тебе є наступні інструменти (tools), які виконуються в реальній системі користувача:\n"
+    "{tools_desc}\n\n"
+    "Якщо для відповіді достатньо тексту — дай звичайну відповідь.\n"
+    "Якщо потрібно викликати інструменти, ВІДПОВІДАЙ СТРОГО у форматі JSON:\n"
+    "{{\n"
+    "  \"tool_calls\": [\n"
+    "    {{ \"name\": \"tool_name\", \"args\": {{ ... }} }}\n"
+    "  ],\n"
+    "  \"final_answer\": \"Що сказати користувачу після виконання інструментів (може бути порожнім рядком)\"\n"
+    "}}\n"
+    "Не додавай нічого поза цим JSON (жодного markdown, пояснень чи тексту до/після).\n"
+)
+
+
+class _PayloadStats:
+    """Per-role request body sizes and system-preamble cache effectiveness."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._roles: Dict[str, Dict[str, float]] = {}
+
+    def _role(self, role: str) -> Dict[str, float]:
+        st = self._roles.get(role)
+        if st is None:
+            st = {
+                "requests": 0, "total_bytes": 0, "max_bytes": 0,
+                "preamble_hits": 0, "preamble_misses": 0,
+                "preamble_bytes_reused": 0, "render_ms_total": 0.0,
+            }
+            self._roles[role] = st
+        return st
+
+    def record_request(self, role: str, size: int) -> None:
+        with self._lock:
+            st = self._role(role)
+            st["requests"] += 1
+            st["total_bytes"] += size
+            st["max_bytes"] = max(st["max_bytes"], size)
+
+    def record_preamble(self, role: str, hit: bool, size: int, render_ms: float = 0.0) -> None:
+        with self._lock:
+            st = self._role(role)
+            if hit:
+                st["preamble_hits"] += 1
+                st["preamble_bytes_reused"] += size
+            else:
+                st["preamble_misses"] += 1
+                st["render_ms_total"] += render_ms
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            out: Dict[str, Any] = {}
+            for role, st in self._roles.items():
+                misses = st["preamble_misses"]
+                avg_render_ms = st["render_ms_total"] / misses if misses else 0.0
+                out[role] = {
+                    "requests": st["requests"],
+                    "total_bytes": st["total_bytes"],
+                    "avg_bytes": int(st["total_bytes"] / st["requests"]) if st["requests"] else 0,
+                    "max_bytes": st["max_bytes"],
+                    "preamble_hits": st["preamble_hits"],
+                    "preamble_misses": misses,
+                    "preamble_bytes_reused": st["preamble_bytes_reused"],
+                    "avg_render_ms": round(avg_render_ms, 3),
+                    "est_render_ms_saved": round(avg_render_ms * st["preamble_hits"], 3),
+                }
+            return out
+
+    def reset(self) -> None:
+        with self._lock:
+            self._roles.clear()
+
+
+_payload_stats = _PayloadStats()
+
+_PREAMBLE_CACHE_SIZE = 64
+_preamble_cache: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+_preamble_lock = threading.Lock()
+
+
+def _render_system_preamble(system_prompt: str, tools: Optional[List[Any]], tools_fingerprint: str, role: str = "default") -> str:
+    """System prompt + tool protocol block, memoized per (prompt hash, tool-set fingerprint)."""
+    key = (hashlib.sha1(system_prompt.encode("utf-8")).hexdigest(), tools_fingerprint if tools else "")
+    with _preamble_lock:
+        cached = _preamble_cache.get(key)
+        if cached is not None:
+            _preamble_cache.move_to_end(key)
+    if cached is not None:
+        _payload_stats.record_preamble(role, hit=True, size=len(cached.encode("utf-8")))
+        return cached
+
+    start = time.perf_counter()
+    if tools:
+        tools_desc = "\n".join(f"- {name}: {description}" for name, description in _tool_name_descriptions(tools))
+        rendered = system_prompt + "\n\n" + TOOL_PROTOCOL_INSTRUCTIONS.format(tools_desc=tools_desc)
+    else:
+        rendered = system_prompt
+    render_ms = (time.perf_counter() - start) * 1000
+
+    with _preamble_lock:
+        _preamble_cache[key] = rendered
+        while len(_preamble_cache) > _PREAMBLE_CACHE_SIZE:
+            _preamble_cache.popitem(last=False)
+    _payload_stats.record_preamble(role, hit=False, size=len(rendered.encode("utf-8")), render_ms=render_ms)
+    return rendered
+
+
+def get_payload_stats() -> Dict[str, Any]:
+    """Per-role request payload sizes and system-preamble cache savings."""
+    return _payload_stats.report()
+
+
 class CopilotLLM(BaseChatModel):
     model_name: str = "gpt-4o"
     vision_model_name: str = "gpt-4o"
     api_key: Optional[str] = None
     _tools: Optional[List[Any]] = None
+    _tools_fingerprint: str = ""
+    _role: str = "default"
 
     def __init__(
         self,
@@ -56,6 +397,7 @@ class CopilotLLM(BaseChatModel):
             self._tools = tools
         else:
             self._tools = [tools]
+        self._tools_fingerprint = fingerprint_tools(self._tools)
         return self
     def _invoke_gemini_fallback(self, messages: List[BaseMessage]) -> AIMessage:
         try:
@@ -156,75 +498,42 @@ class CopilotLLM(BaseChatModel):
         except Exception as e:
             return AIMessage(content=f"[LOCAL VISION FAILED] {e}. Prior error: {prior_error}")
 
+    def _internal_text_invoke(self, messages: List[BaseMessage]) -> AIMessage:
+        """Text-only completion for fallback paths (goes through the shared transport)."""
+        result = self._generate(messages)
+        return result.generations[0].message
+
 
 
     def _get_session_token(self) -> Tuple[str, str]:
-        headers = {
-            "Authorization": f"token {self.api_key}",
-            "Editor-Version": "vscode/1.85.0",
-            "Editor-Plugin-Version": "copilot/1.144.0",
-            "User-Agent": "GithubCopilot/1.144.0",
-        }
-        response = requests.get(
-            "https://api.github.com/copilot_internal/v2/token",
-            headers=headers,
-            timeout=30,
-        )
-        response.raise_for_status()
-        data = response.json()
-        token = data.get("token")
-        api_endpoint = data.get("endpoints", {}).get("api") or "https://api.githubcopilot.com"
-        if not token:
-            raise RuntimeError("Copilot token response missing 'token' field.")
-        return token, api_endpoint
+        return get_token_manager().get_token(self.api_key)
 
     def _build_payload(self, messages: List[BaseMessage], stream: Optional[bool] = None) -> dict:
         formatted_messages = []
-        
-        # Extract system prompt if present, or use default
-        system_content = "You are a helpful AI assistant."
-        
-        # Tool instructions (kept for JSON protocol)
-        if self._tools:
-            tools_desc_lines: List[str] = []
-            for tool in self._tools:
-                name = getattr(tool, "name", getattr(tool, "__name__", "tool"))
-                description = getattr(tool, "description", "")
-                tools_desc_lines.append(f"- {name}: {description}")
-            tools_desc = "\n".join(tools_desc_lines)
-            
-            tool_instructions = (
-                "У тебе є наступні інструменти (tools), які виконуються в реальній системі користувача:\n"
-                f"{tools_desc}\n\n"
-                "Якщо для відповіді достатньо тексту — дай звичайну відповідь.\n"
-                "Якщо потрібно викликати інструменти, ВІДПОВІДАЙ СТРОГО у форматі JSON:\n"
-                "{\n"
-                "  \"tool_calls\": [\n"
-                "    { \"name\": \"tool_name\", \"args\": { ... } }\n"
-                "  ],\n"
-                "  \"final_answer\": \"Що сказати користувачу після виконання інструментів (може бути порожнім рядком)\"\n"
-                "}\n"
-                "Не додавай нічого поза цим JSON (жодного markdown, пояснень чи тексту до/після).\n"
-            )
-            # Prepend instructions to system prompt logic later, or handle as system message
-        else:
-            tool_instructions = ""
 
+        # Extract system prompt if present, or use default
+        system_prompt: Optional[str] = None
         for m in messages:
             role = "user"
             if isinstance(m, SystemMessage):
-                role = "system"
-                system_content = m.content + ("\n\n" + tool_instructions if tool_instructions else "")
-                # Only add system message once at the start is safer, but here we just capture it.
-                # We will construct the final list carefully.
-                continue 
+                # The last system message wins; it is rendered once below.
+                system_prompt = m.content
+                continue
             elif isinstance(m, AIMessage):
                 role = "assistant"
             elif isinstance(m, HumanMessage):
                 role = "user"
-            
+
             formatted_messages.append({"role": role, "content": m.content})
 
+        if system_prompt is None:
+            system_content = "You are a helpful AI assistant."
+        else:
+            # System prompt + tool instructions (JSON protocol), memoized per prompt and tool set
+            system_content = _render_system_preamble(
+                system_prompt, self._tools, self._tools_fingerprint, role=self._role
+            )
+
         # Prepend system message
         final_messages = [{"role": "system", "content": system_content}] + formatted_messages
 
@@ -240,6 +549,12 @@ class CopilotLLM(BaseChatModel):
             "stream": stream if stream is not None else False,
         }
 
+    def _encode_payload(self, payload: dict) -> bytes:
+        """Serialize the request body as UTF-8 JSON and record its size for the role."""
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        _payload_stats.record_request(self._role, len(body))
+        return body
+
     def _generate(
         self,
         messages: List[BaseMessage],
@@ -263,10 +578,10 @@ class CopilotLLM(BaseChatModel):
             payload = self._build_payload(messages, stream=stream)
             
             stream_mode = stream if stream is not None else False
-            response = requests.post(
+            response = get_transport().post(
                 f"{api_endpoint}/chat/completions",
                 headers=headers,
-                data=json.dumps(payload),
+                data=self._encode_payload(payload),
                 stream=stream_mode,
                 timeout=90
             )
@@ -330,6 +645,9 @@ class CopilotLLM(BaseChatModel):
             return ChatResult(generations=[ChatGeneration(message=AIMessage(content=content))])
 
         except requests.exceptions.HTTPError as e:
+            if e.response.status_code == 401:
+                # Session token was revoked or expired early; force a refetch on the next call.
+                get_token_manager().invalidate(self.api_key)
             # Check for Vision error (400) and try fallback
             if e.response.status_code == 400:
                 print(f"[COPILOT] 400 Error intercepted. Retrying without Vision header...", flush=True)
@@ -340,10 +658,10 @@ class CopilotLLM(BaseChatModel):
                     if "vision" in payload.get("model", ""):
                          payload["model"] = "gpt-4.1"
                          
-                    response = requests.post(
+                    response = get_transport().post(
                         f"{api_endpoint}/chat/completions",
                         headers=headers,
-                        data=json.dumps(payload),
+                        data=self._encode_payload(payload),
                         stream=stream_mode,
                         timeout=90
                     )
@@ -440,10 +758,10 @@ class CopilotLLM(BaseChatModel):
         }
 
         payload = self._build_payload(messages, stream=True)
-        response = requests.post(
+        response = get_transport().post(
             f"{api_endpoint}/chat/completions",
             headers=headers,
-            data=json.dumps(payload),
+            data=self._encode_payload(payload),
             stream=True,
             timeout=90
         )
@@ -0,0 +1,113 @@
+"""Reusable LLM clients per agent role.
+
+Trinity nodes and vision helpers used to construct a new CopilotLLM (and re-bind
+the full tool list) on every call. The registry builds one bound client per
+(role, model, vision model, tool-set fingerprint) and hands the same instance
+back until the model settings (including COPILOT_MODEL / COPILOT_VISION_MODEL
+defaults) or the tool registry change.
+"""
+
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from providers.copilot import CopilotLLM, fingerprint_tools
+
+
+ClientKey = Tuple[str, str, str, str]
+
+
+class LLMClientRegistry:
+    """Caches bound CopilotLLM clients keyed by role, models and tool set."""
+
+    def __init__(self) -> None:
+        self._clients: Dict[ClientKey, CopilotLLM] = {}
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+        # role -> (tools_version, fingerprint) of the last tool set seen for that role
+        self._fingerprints: Dict[str, Tuple[Any, str]] = {}
+
+    def get(
+        self,
+        role: str,
+        model_name: Optional[str] = None,
+        vision_model_name: Optional[str] = None,
+        tools: Optional[List[Any]] = None,
+        tools_version: Any = None,
+    ) -> CopilotLLM:
+        """Return the client for ``role``, building (and binding tools) only on a miss.
+
+        Unset model names resolve from the environment as CopilotLLM would, so
+        a changed COPILOT_MODEL yields a new client. ``tools_version`` (e.g.
+        MCPToolRegistry.tools_version) lets an unchanged tool set skip
+        fingerprinting. A miss for a role that already has a client replaces
+        it, so stale clients for old models or tool sets do not accumulate.
+        """
+        model_name = model_name or os.getenv("COPILOT_MODEL", "gpt-4o")
+        vision_model_name = vision_model_name or os.getenv("COPILOT_VISION_MODEL", "gpt-4o")
+        key: ClientKey = (role, model_name, vision_model_name, self._fingerprint(role, tools, tools_version))
+        with self._lock:
+            role_stats = self._stats.setdefault(role, {"hits": 0, "constructions": 0, "rebuilds": 0})
+            client = self._clients.get(key)
+            if client is not None:
+                role_stats["hits"] += 1
+                return client
+
+            client = CopilotLLM(model_name=model_name, vision_model_name=vision_model_name)
+            client._role = role
+            if tools:
+                client.bind_tools(list(tools))
+
+            stale = [k for k in self._clients if k[0] == role]
+            for k in stale:
+                del self._clients[k]
+            if stale:
+                role_stats["rebuilds"] += 1
+            role_stats["constructions"] += 1
+            self._clients[key] = client
+            return client
+
+    def _fingerprint(self, role: str, tools: Optional[List[Any]], tools_version: Any) -> str:
+        """Tool-set fingerprint, recomputed only when ``tools_version`` changes (or is not given)."""
+        if tools_version is None:
+            return fingerprint_tools(tools)
+        with self._lock:
+            cached = self._fingerprints.get(role)
+        if cached is not None and cached[0] == tools_version:
+            return cached[1]
+        fingerprint = fingerprint_tools(tools)
+        with self._lock:
+            self._fingerprints[role] = (tools_version, fingerprint)
+        return fingerprint
+
+    def invalidate(self, role: Optional[str] = None) -> None:
+        """Drop cached clients (all, or only those for ``role``)."""
+        with self._lock:
+            for k in [k for k in self._clients if role is None or k[0] == role]:
+                del self._clients[k]
+            for r in [r for r in self._fingerprints if role is None or r == role]:
+                del self._fingerprints[r]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Per-role hit and construction counts."""
+        with self._lock:
+            roles = {role: dict(st) for role, st in self._stats.items()}
+            return {
+                "cached_clients": len(self._clients),
+                "total_constructions": sum(st["constructions"] for st in roles.values()),
+                "roles": roles,
+            }
+
+
+_llm_registry: Optional[LLMClientRegistry] = None
+_llm_registry_lock = threading.Lock()
+
+
+def get_llm_registry() -> LLMClientRegistry:
+    """Get the process-wide LLM client registry."""
+    global _llm_registry
+    if _llm_registry is None:
+        with _llm_registry_lock:
+            if _llm_registry is None:
+                _llm_registry = LLMClientRegistry()
+    return _llm_registry
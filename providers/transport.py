@@ -0,0 +1,279 @@
+"""Shared HTTP transport for LLM providers.
+
+A single pooled ``requests.Session`` is reused by every CopilotLLM instance (and
+the vision helpers built on top of it), so agent turns stop paying for a fresh
+TCP + TLS handshake on every call.
+
+Features:
+- Connection pooling with HTTP keep-alive
+- Configurable per-host pool sizes (LLM_HTTP_POOL_SIZES="host=size,...")
+- Bounded retries with jittered exponential backoff
+- Per-request latency metrics (connect / TTFB / total) aggregated per host
+"""
+
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import NewConnectionError
+
+
+# Connection setup happens synchronously in the calling thread, so the timing
+# hooks below report through a thread-local instead of threading state around.
+_conn_timing = threading.local()
+
+
+class _TimedConnectMixin:
+    def connect(self) -> None:
+        start = time.perf_counter()
+        try:
+            super().connect()  # type: ignore[misc]
+        finally:
+            _conn_timing.connect_ms = getattr(_conn_timing, "connect_ms", 0.0) + (time.perf_counter() - start) * 1000
+            _conn_timing.new_connections = getattr(_conn_timing, "new_connections", 0) + 1
+
+
+class _TimedHTTPConnection(_TimedConnectMixin, HTTPConnection):
+    pass
+
+
+class _TimedHTTPSConnection(_TimedConnectMixin, HTTPSConnection):
+    pass
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class _TimedHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter whose pools report how long new connections take to open."""
+
+    def init_poolmanager(self, *args: Any, **kwargs: Any) -> None:
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _TimedHTTPConnectionPool,
+            "https": _TimedHTTPSConnectionPool,
+        }
+
+
+class _HostStats:
+    """Rolling latency samples and counters for one host."""
+
+    def __init__(self, max_samples: int) -> None:
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.new_connections = 0
+        self.samples: Deque[Tuple[float, float, float]] = deque(maxlen=max_samples)
+
+    def to_dict(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {
+            "requests": self.requests,
+            "errors": self.errors,
+            "retries": self.retries,
+            "new_connections": self.new_connections,
+            "reused_connections": max(0, self.requests - self.new_connections),
+        }
+        if self.samples:
+            n = len(self.samples)
+            totals = sorted(s[2] for s in self.samples)
+            out["avg_connect_ms"] = round(sum(s[0] for s in self.samples) / n, 2)
+            out["avg_ttfb_ms"] = round(sum(s[1] for s in self.samples) / n, 2)
+            out["avg_total_ms"] = round(sum(totals) / n, 2)
+            out["p95_total_ms"] = round(totals[min(n - 1, int(n * 0.95))], 2)
+        return out
+
+
+def _is_connect_failure(error: requests.exceptions.ConnectionError) -> bool:
+    """True when the connection was never established, so the request was not sent."""
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    return isinstance(reason, NewConnectionError)
+
+
+class HttpTransport:
+    """Pooled, keep-alive HTTP client with retries and latency metrics."""
+
+    DEFAULT_POOL_MAXSIZE = 10
+    DEFAULT_MAX_RETRIES = 2
+    DEFAULT_BACKOFF_BASE = 0.5
+    DEFAULT_BACKOFF_CAP = 8.0
+    RETRY_STATUSES = {429, 500, 502, 503, 504}
+    # Statuses that guarantee a non-idempotent request was not processed
+    UNPROCESSED_STATUSES = {429, 503}
+    IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+    def __init__(
+        self,
+        pool_maxsize: Optional[int] = None,
+        pool_sizes: Optional[Dict[str, int]] = None,
+        max_retries: Optional[int] = None,
+        backoff_base: Optional[float] = None,
+        backoff_cap: Optional[float] = None,
+        max_samples: int = 200,
+    ) -> None:
+        self.pool_maxsize = pool_maxsize or int(os.getenv("LLM_HTTP_POOL_MAXSIZE", self.DEFAULT_POOL_MAXSIZE))
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv("LLM_HTTP_RETRIES", self.DEFAULT_MAX_RETRIES))
+        self.backoff_base = backoff_base if backoff_base is not None else float(os.getenv("LLM_HTTP_BACKOFF", self.DEFAULT_BACKOFF_BASE))
+        self.backoff_cap = backoff_cap if backoff_cap is not None else self.DEFAULT_BACKOFF_CAP
+        self.pool_sizes = dict(_parse_pool_sizes(os.getenv("LLM_HTTP_POOL_SIZES", "")))
+        self.pool_sizes.update(pool_sizes or {})
+        self._max_samples = max_samples
+        self._stats: Dict[str, _HostStats] = {}
+        self._lock = threading.Lock()
+
+        self.session = requests.Session()
+        default_adapter = _TimedHTTPAdapter(pool_connections=10, pool_maxsize=self.pool_maxsize, max_retries=0)
+        self.session.mount("https://", default_adapter)
+        self.session.mount("http://", default_adapter)
+        for host, size in self.pool_sizes.items():
+            adapter = _TimedHTTPAdapter(pool_connections=1, pool_maxsize=size, max_retries=0)
+            self.session.mount(f"https://{host}", adapter)
+            self.session.mount(f"http://{host}", adapter)
+
+    def get(self, url: str, **kwargs: Any) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs: Any) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def request(self, method: str, url: str, *, retries: Optional[int] = None, **kwargs: Any) -> requests.Response:
+        """Send a request through the pooled session.
+
+        Connection errors and retryable statuses (429/5xx) are retried up to
+        ``retries`` times with full-jitter backoff. Read timeouts are not retried,
+        since the server may already be working on the request. Non-idempotent
+        methods (POST completions) are only retried when the request cannot have
+        been processed: connect-phase failures and 429/503. The returned
+        response carries ``transport_metrics`` for the final attempt.
+        """
+        host = urlsplit(url).netloc
+        max_retries = self.max_retries if retries is None else retries
+        idempotent = method.upper() in self.IDEMPOTENT_METHODS
+        retry_statuses = self.RETRY_STATUSES if idempotent else self.UNPROCESSED_STATUSES
+        attempt = 0
+        while True:
+            _conn_timing.connect_ms = 0.0
+            _conn_timing.new_connections = 0
+            start = time.perf_counter()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except requests.exceptions.ConnectionError as e:
+                self._record(host, error=True)
+                # A reset after the body was sent may still produce (and bill) a completion
+                if attempt >= max_retries or not (idempotent or _is_connect_failure(e)):
+                    raise
+                attempt += 1
+                self._record_retry(host)
+                time.sleep(self._backoff(attempt))
+                continue
+            except Exception:
+                self._record(host, error=True)
+                raise
+
+            total_ms = (time.perf_counter() - start) * 1000
+            metrics = {
+                "host": host,
+                "status": response.status_code,
+                "attempt": attempt + 1,
+                "new_connection": bool(_conn_timing.new_connections),
+                "connect_ms": round(_conn_timing.connect_ms, 2),
+                "ttfb_ms": round(response.elapsed.total_seconds() * 1000, 2),
+                "total_ms": round(total_ms, 2),
+            }
+            response.transport_metrics = metrics  # type: ignore[attr-defined]
+            self._record(host, metrics=metrics)
+
+            if response.status_code in retry_statuses and attempt < max_retries:
+                attempt += 1
+                self._record_retry(host)
+                delay = self._backoff(attempt)
+                retry_after = response.headers.get("Retry-After")
+                if retry_after:
+                    try:
+                        delay = min(self.backoff_cap, max(delay, float(retry_after)))
+                    except ValueError:
+                        pass
+                response.close()
+                time.sleep(delay)
+                continue
+            return response
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Per-host request counters and latency aggregates."""
+        with self._lock:
+            return {
+                "pool_maxsize": self.pool_maxsize,
+                "pool_sizes": dict(self.pool_sizes),
+                "max_retries": self.max_retries,
+                "hosts": {host: st.to_dict() for host, st in self._stats.items()},
+            }
+
+    def close(self) -> None:
+        self.session.close()
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * (2 ** (attempt - 1))))
+
+    def _host_stats(self, host: str) -> _HostStats:
+        st = self._stats.get(host)
+        if st is None:
+            st = _HostStats(self._max_samples)
+            self._stats[host] = st
+        return st
+
+    def _record(self, host: str, metrics: Optional[Dict[str, Any]] = None, error: bool = False) -> None:
+        with self._lock:
+            st = self._host_stats(host)
+            st.requests += 1
+            if error:
+                st.errors += 1
+                return
+            if metrics:
+                if metrics["new_connection"]:
+                    st.new_connections += 1
+                st.samples.append((metrics["connect_ms"], metrics["ttfb_ms"], metrics["total_ms"]))
+
+    def _record_retry(self, host: str) -> None:
+        with self._lock:
+            self._host_stats(host).retries += 1
+
+
+def _parse_pool_sizes(spec: str) -> Dict[str, int]:
+    sizes: Dict[str, int] = {}
+    for part in (spec or "").split(","):
+        host, _, size = part.strip().partition("=")
+        if not host or not size:
+            continue
+        try:
+            sizes[host.strip()] = max(1, int(size))
+        except ValueError:
+            continue
+    return sizes
+
+
+_transport: Optional[HttpTransport] = None
+_transport_lock = threading.Lock()
+
+
+def get_transport() -> HttpTransport:
+    """Get the process-wide HTTP transport shared by all LLM providers."""
+    global _transport
+    if _transport is None:
+        with _transport_lock:
+            if _transport is None:
+                _transport = HttpTransport()
+    return _transport
@@ -0,0 +1,141 @@
+"""Stress memory writes from many threads and verify nothing is lost.
+
+Each thread writes unique episodic / knowledge_base memories (plus a share of
+exact duplicates) through HierarchicalMemory into a throwaway store, then the
+script checks the collection counts against the number of distinct contents.
+
+By default a cheap hashing embedder replaces the ONNX model so the run
+measures the write path rather than embedding cost (and works offline).
+
+Usage:
+    python scripts/benchmark_memory_writes.py --threads 8 --writes 1000 --dup-ratio 0.1
+    python scripts/benchmark_memory_writes.py --sync          # MEMORY_WRITE_BEHIND=0
+    python scripts/benchmark_memory_writes.py --real-embeddings
+"""
+
+import argparse
+import hashlib
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class HashEmbedding:
+    """Bag-of-words hashed into a small dense vector (no model download)."""
+
+    def __init__(self, dim: int = 64):
+        self.dim = dim
+
+    def __call__(self, input):
+        vectors = []
+        for text in input:
+            vec = [0.0] * self.dim
+            for word in text.lower().split():
+                vec[int(hashlib.md5(word.encode("utf-8")).hexdigest(), 16) % self.dim] += 1.0
+            vectors.append(vec)
+        return vectors
+
+    @staticmethod
+    def name():
+        return "hash_benchmark"
+
+    def get_config(self):
+        return {"dim": self.dim}
+
+    @staticmethod
+    def build_from_config(config):
+        return HashEmbedding(config.get("dim", 64))
+
+    def is_legacy(self):
+        return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--writes", type=int, default=1000, help="writes per thread")
+    parser.add_argument("--dup-ratio", type=float, default=0.1, help="share of writes repeating earlier content")
+    parser.add_argument("--sync", action="store_true", help="disable the write-behind buffer")
+    parser.add_argument("--real-embeddings", action="store_true", help="keep Chroma's default embedder")
+    args = parser.parse_args()
+
+    if args.sync:
+        os.environ["MEMORY_WRITE_BEHIND"] = "0"
+
+    from core.memory import HierarchicalMemory  # noqa: E402
+
+    store = tempfile.mkdtemp(prefix="memory_bench_")
+    try:
+        memory = HierarchicalMemory(persist_path=store)
+        if not args.real_embeddings:
+            embed = HashEmbedding()
+            for name in ("episodic_memory", "knowledge_base"):
+                memory.client.delete_collection(name)
+                setattr(memory, name, memory.client.get_or_create_collection(name, embedding_function=embed))
+
+        errors = []
+        distinct = {"episodic": set(), "knowledge": set()}
+        distinct_lock = threading.Lock()
+        dup_every = int(1 / args.dup_ratio) if args.dup_ratio > 0 else 0
+
+        def worker(tid):
+            seen_episodic, seen_knowledge = set(), set()
+            for i in range(args.writes):
+                # Same parity as i, so the repeat lands in the same collection
+                n = i - 2 if dup_every and i >= 2 and i % dup_every == 0 else i
+                if i % 2:
+                    content = f"thread {tid} opened document {n} in editor"
+                    res = memory.add_episodic_memory(content, "tool_execution")
+                    seen_episodic.add(content)
+                else:
+                    content = f"thread {tid} learned fact number {n}"
+                    res = memory.add_memory("knowledge_base", content, {"thread": tid})
+                    seen_knowledge.add(content)
+                if res.get("status") != "success":
+                    errors.append(res)
+            with distinct_lock:
+                distinct["episodic"] |= seen_episodic
+                distinct["knowledge"] |= seen_knowledge
+
+        threads = [threading.Thread(target=worker, args=(t,)) for t in range(args.threads)]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        enqueue_s = time.perf_counter() - start
+        memory.flush_writes()
+        total_s = time.perf_counter() - start
+
+        total = args.threads * args.writes
+        stored_episodic = memory.episodic_memory.count()
+        stored_knowledge = memory.knowledge_base.count()
+        expected_episodic, expected_knowledge = len(distinct["episodic"]), len(distinct["knowledge"])
+
+        print(f"{total} writes from {args.threads} threads ({'sync' if args.sync else 'write-behind'})")
+        print(f"  caller time : {enqueue_s * 1000:9.1f} ms  ({total / enqueue_s:9.0f} writes/s)")
+        print(f"  until stored: {total_s * 1000:9.1f} ms  ({total / total_s:9.0f} writes/s)")
+        print(f"  episodic    : {stored_episodic} stored / {expected_episodic} distinct")
+        print(f"  knowledge   : {stored_knowledge} stored / {expected_knowledge} distinct")
+        print(f"  errors      : {len(errors)}")
+        if memory._writes is not None:
+            print(f"  buffer      : {memory._writes.get_stats()}")
+        memory.close()
+
+        lost = (expected_episodic - stored_episodic) + (expected_knowledge - stored_knowledge)
+        if lost or errors:
+            print(f"FAIL: {lost} memories lost, {len(errors)} errors")
+            return 1
+        print("OK: no memories lost")
+        return 0
+    finally:
+        shutil.rmtree(store, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+"""Compare the Chroma and NumPy memory backends on insert, query and open time.
+
+Vectors are random 384-d (the MiniLM dimension) and passed in directly, so
+the numbers measure the stores rather than the embedding model.
+
+Usage:
+    python scripts/benchmark_vector_backends.py --sizes 1000 10000 50000 --queries 200
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.vector_store import NumpyVectorClient  # noqa: E402
+
+
+def _client(backend, path):
+    if backend == "numpy":
+        return NumpyVectorClient(path)
+    import chromadb
+
+    return chromadb.PersistentClient(path=path)
+
+
+def _bench(backend, size, queries, batch, dim):
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(size, dim)).astype(np.float32)
+    probes = vectors[rng.choice(size, size=queries)] + rng.normal(scale=0.05, size=(queries, dim)).astype(np.float32)
+    path = tempfile.mkdtemp(prefix=f"vec_{backend}_")
+    try:
+        col = _client(backend, path).get_or_create_collection("bench", embedding_function=None)
+        start = time.perf_counter()
+        for i in range(0, size, batch):
+            ids = [str(n) for n in range(i, min(i + batch, size))]
+            col.upsert(
+                ids=ids,
+                embeddings=vectors[i:i + len(ids)].tolist() if backend == "chroma" else vectors[i:i + len(ids)],
+                documents=[f"doc {n}" for n in ids],
+                metadatas=[{"n": int(n) % 10} for n in ids],
+            )
+        insert_s = time.perf_counter() - start
+
+        latencies = []
+        for q in probes:
+            t = time.perf_counter()
+            col.query(query_embeddings=[q.tolist()], n_results=5)
+            latencies.append((time.perf_counter() - t) * 1000)
+        latencies.sort()
+
+        start = time.perf_counter()
+        _client(backend, path).get_or_create_collection("bench", embedding_function=None).count()
+        open_ms = (time.perf_counter() - start) * 1000
+        return {
+            "insert_per_s": size / insert_s,
+            "p50_ms": latencies[len(latencies) // 2],
+            "p95_ms": latencies[int(len(latencies) * 0.95) - 1],
+            "open_ms": open_ms,
+        }
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--batch", type=int, default=256, help="vectors per insert call")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--backends", nargs="+", default=["chroma", "numpy"])
+    args = parser.parse_args()
+
+    print(f"{'backend':<8} {'rows':>7} {'insert/s':>10} {'query p50':>10} {'query p95':>10} {'open':>9}")
+    for size in args.sizes:
+        for backend in args.backends:
+            try:
+                r = _bench(backend, size, args.queries, args.batch, args.dim)
+            except ImportError as e:
+                print(f"{backend:<8} {size:>7} skipped: {e}")
+                continue
+            print(
+                f"{backend:<8} {size:>7} {r['insert_per_s']:>10.0f} {r['p50_ms']:>8.2f}ms "
+                f"{r['p95_ms']:>8.2f}ms {r['open_ms']:>7.1f}ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,5 @@
 import os
-from typing import Any, List, Optional
+from typing import Any, List, Optional, Set
 
 
 class ChromaStore:
@@ -12,25 +12,35 @@ class ChromaStore:
             return True
         try:
             from langchain_chroma import Chroma
-            from langchain_huggingface import HuggingFaceEmbeddings
+            from core.embeddings import get_embedding_service
 
             os.makedirs(self.persist_dir, exist_ok=True)
-            embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
+            # Shared with core.memory: one model instance and one vector cache per process
+            embeddings = get_embedding_service().as_langchain()
             self._store = Chroma(persist_directory=self.persist_dir, embedding_function=embeddings)
             return True
         except Exception:
             self._store = None
             return False
 
-    def add_texts(self, texts: List[str], metadatas: Optional[List[dict]] = None) -> bool:
+    def add_texts(self, texts: List[str], metadatas: Optional[List[dict]] = None, ids: Optional[List[str]] = None) -> bool:
         if not self._ensure():
             return False
         try:
-            self._store.add_texts(texts=texts, metadatas=metadatas)
+            self._store.add_texts(texts=texts, metadatas=metadatas, ids=ids)
             return True
         except Exception:
             return False
 
+    def existing_ids(self, ids: List[str]) -> Set[str]:
+        """Subset of ``ids`` already stored (metadata lookup only, nothing is embedded)."""
+        if not ids or not self._ensure():
+            return set()
+        try:
+            return set(self._store.get(ids=ids, include=[]).get("ids") or [])
+        except Exception:
+            return set()
+
     def similarity_search(self, query: str, k: int = 5) -> List[Any]:
         if not self._ensure():
             return []
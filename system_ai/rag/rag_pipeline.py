@@ -1,18 +1,196 @@
+"""Retrieval pipeline over the long-term Chroma store.
+
+Ingestion batches documents into one ``add_texts`` call, splits long texts
+into overlapping chunks on line boundaries and skips chunks whose content
+hash is already stored (the hash is the document id, so a repeat is caught
+before anything is embedded). ``ingest_async`` hands documents to a
+background worker so callers such as the monitor summary service never wait
+for the embedding model. Use ``get_rag_pipeline`` to share one pipeline (and
+one Chroma client) per persist directory.
+"""
+
+import hashlib
 import os
-from typing import Any, Dict, List, Optional
+import queue
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
 
 from system_ai.memory.chroma_store import ChromaStore
 
 
+def chunk_text(text: str, max_chars: int = 1000, overlap: int = 100) -> List[str]:
+    """Split ``text`` into chunks of at most ``max_chars``.
+
+    Chunks end on line boundaries where possible and repeat up to ``overlap``
+    characters of trailing lines so a fact split across chunks stays retrievable.
+    """
+    text = (text or "").strip()
+    if len(text) <= max_chars:
+        return [text] if text else []
+
+    chunks: List[str] = []
+    lines: List[str] = []
+    size = 0
+
+    def emit() -> None:
+        nonlocal lines, size
+        chunks.append("".join(lines).strip())
+        carry: List[str] = []
+        carried = 0
+        for line in reversed(lines):
+            if carried + len(line) > overlap:
+                break
+            carry.insert(0, line)
+            carried += len(line)
+        lines, size = carry, carried
+
+    for line in text.splitlines(keepends=True):
+        while len(line) > max_chars:
+            if lines:
+                emit()
+                lines, size = [], 0
+            chunks.append(line[:max_chars].strip())
+            line = line[max_chars - overlap:]
+        if size + len(line) > max_chars and lines:
+            emit()
+        lines.append(line)
+        size += len(line)
+    if "".join(lines).strip():
+        chunks.append("".join(lines).strip())
+    return [c for c in chunks if c]
+
+
+def _content_hash(text: str) -> str:
+    return hashlib.sha1(" ".join(text.split()).encode("utf-8")).hexdigest()
+
+
+def _clean_metadata(metadata: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Chroma metadata values must be scalars: join lists, stringify the rest."""
+    clean: Dict[str, Any] = {}
+    for k, v in (metadata or {}).items():
+        if v is None:
+            continue
+        if isinstance(v, (str, int, float, bool)):
+            clean[k] = v
+        elif isinstance(v, (list, tuple, set)):
+            clean[k] = ",".join(str(x) for x in v)
+        else:
+            clean[k] = str(v)
+    return clean
+
+
 class RagPipeline:
-    def __init__(self, persist_dir: str = "~/.system_cli/chroma") -> None:
+    """Ingests and retrieves documents in the long-term vector store.
+
+    Args:
+        persist_dir: Chroma directory.
+        chunk_chars: Maximum characters per stored chunk (RAG_CHUNK_CHARS).
+        chunk_overlap: Characters repeated between chunks (RAG_CHUNK_OVERLAP).
+        batch_size: Documents the async worker ingests per call (RAG_INGEST_BATCH).
+    """
+
+    def __init__(
+        self,
+        persist_dir: str = "~/.system_cli/chroma",
+        chunk_chars: Optional[int] = None,
+        chunk_overlap: Optional[int] = None,
+        batch_size: Optional[int] = None,
+    ) -> None:
         self.store = ChromaStore(persist_dir=persist_dir)
         self.enabled = os.environ.get("SYSTEM_RAG_ENABLED", "0").lower() in {"1", "true", "yes", "on"}
+        self.chunk_chars = max(100, chunk_chars or int(os.getenv("RAG_CHUNK_CHARS", "1000")))
+        self.chunk_overlap = min(self.chunk_chars // 2, chunk_overlap if chunk_overlap is not None else int(os.getenv("RAG_CHUNK_OVERLAP", "100")))
+        self.batch_size = max(1, batch_size or int(os.getenv("RAG_INGEST_BATCH", "16")))
+
+        self._queue: "queue.Queue[Tuple[str, Dict[str, Any]]]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._stats = {
+            "documents": 0,
+            "chunks": 0,
+            "stored": 0,
+            "deduplicated": 0,
+            "batches": 0,
+            "failed_batches": 0,
+            "queued": 0,
+            "ingest_ms": 0.0,
+        }
 
     def ingest_text(self, text: str, metadata: Optional[Dict[str, Any]] = None) -> bool:
         if not self.enabled:
             return False
-        return self.store.add_texts([text], metadatas=[metadata or {}])
+        return self.ingest_many([text], [metadata or {}]) is not None
+
+    def ingest_many(self, texts: List[str], metadatas: Optional[List[Dict[str, Any]]] = None) -> Optional[int]:
+        """Chunk, deduplicate and store ``texts`` in one batch.
+
+        Returns the number of new chunks stored (0 when all were duplicates),
+        or None when the pipeline is disabled or the store rejected the batch.
+        """
+        if not self.enabled:
+            return None
+        metadatas = metadatas or [{} for _ in texts]
+        started = time.perf_counter()
+
+        ids: List[str] = []
+        chunks: List[str] = []
+        chunk_metas: List[Dict[str, Any]] = []
+        seen = set()
+        total = 0
+        for text, metadata in zip(texts, metadatas):
+            parts = chunk_text(text, self.chunk_chars, self.chunk_overlap)
+            base = _clean_metadata(metadata)
+            total += len(parts)
+            for i, part in enumerate(parts):
+                digest = _content_hash(part)
+                if digest in seen:
+                    continue
+                seen.add(digest)
+                ids.append(digest)
+                chunks.append(part)
+                chunk_metas.append({**base, "content_hash": digest, "chunk_index": i, "chunk_count": len(parts)})
+
+        existing = self.store.existing_ids(ids)
+        new = [n for n, digest in enumerate(ids) if digest not in existing]
+        ok = True
+        if new:
+            ok = self.store.add_texts(
+                [chunks[n] for n in new],
+                metadatas=[chunk_metas[n] for n in new],
+                ids=[ids[n] for n in new],
+            )
+
+        with self._lock:
+            self._stats["documents"] += len(texts)
+            self._stats["chunks"] += total
+            self._stats["deduplicated"] += total - len(new)
+            self._stats["batches"] += 1
+            self._stats["ingest_ms"] += (time.perf_counter() - started) * 1000
+            if ok:
+                self._stats["stored"] += len(new)
+            else:
+                self._stats["failed_batches"] += 1
+        return len(new) if ok else None
+
+    def ingest_async(self, text: str, metadata: Optional[Dict[str, Any]] = None) -> bool:
+        """Queue ``text`` for background ingestion; returns False when RAG is disabled."""
+        if not self.enabled:
+            return False
+        self._ensure_worker()
+        with self._lock:
+            self._stats["queued"] += 1
+        self._queue.put((text, metadata or {}))
+        return True
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until queued documents are ingested; returns False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
 
     def retrieve(self, query: str, k: int = 5) -> List[Dict[str, Any]]:
         if not self.enabled:
@@ -25,3 +203,51 @@ class RagPipeline:
             except Exception:
                 continue
         return out
+
+    def get_stats(self) -> Dict[str, Any]:
+        from core.embeddings import get_embedding_service
+
+        with self._lock:
+            ingestion = dict(self._stats)
+        ingestion["ingest_ms"] = round(ingestion["ingest_ms"], 2)
+        ingestion["queue_depth"] = self._queue.unfinished_tasks
+        return {"enabled": self.enabled, "ingestion": ingestion, "embeddings": get_embedding_service().get_stats()}
+
+    def _ensure_worker(self) -> None:
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._drain, name="rag-ingest", daemon=True)
+                self._worker.start()
+
+    def _drain(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self.ingest_many([t for t, _ in batch], [m for _, m in batch])
+            except Exception:
+                with self._lock:
+                    self._stats["failed_batches"] += 1
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+
+_pipelines: Dict[str, RagPipeline] = {}
+_pipelines_lock = threading.Lock()
+
+
+def get_rag_pipeline(persist_dir: str = "~/.system_cli/chroma") -> RagPipeline:
+    """Get the process-wide pipeline for ``persist_dir``."""
+    key = os.path.abspath(os.path.expanduser(persist_dir))
+    with _pipelines_lock:
+        pipeline = _pipelines.get(key)
+        if pipeline is None:
+            pipeline = _pipelines[key] = RagPipeline(persist_dir=persist_dir)
+        return pipeline
@@ -113,12 +113,12 @@ def analyze_with_copilot(image_path: str = None, prompt: str = "Describe the use
         image_path = res.get("path")
         
     try:
-        from providers.copilot import CopilotLLM
+        from providers.llm_registry import get_llm_registry
         from langchain_core.messages import HumanMessage
         
-        # Initialize specialized Vision LLM
+        # Shared Vision LLM client (reused across calls)
         # We assume CopilotLLM handles the image_url payload format for its API
-        llm = CopilotLLM(vision_model_name="gpt-4.1") 
+        llm = get_llm_registry().get("vision", vision_model_name="gpt-4.1")
         
         # Encode image
         b64 = load_image_png_b64(image_path)
@@ -300,11 +300,11 @@ def compare_images(path1: str, path2: str, prompt: str = None) -> Dict[str, Any]
         return {"status": "error", "error": f"Image not found: {path2}"}
     
     try:
-        from providers.copilot import CopilotLLM
+        from providers.llm_registry import get_llm_registry
         from langchain_core.messages import HumanMessage
         
-        # Initialize Vision LLM
-        llm = CopilotLLM(vision_model_name="gpt-4.1")
+        # Shared Vision LLM client (reused across calls)
+        llm = get_llm_registry().get("vision", vision_model_name="gpt-4.1")
         
         # Encode both images
         b64_1 = load_image_png_b64(path1)
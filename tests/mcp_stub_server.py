@@ -0,0 +1,57 @@
+"""Minimal stdio MCP server for tests (newline-delimited JSON-RPC, no SDK needed).
+
+Usage: python mcp_stub_server.py [--hang]
+  --hang  never answer `initialize` (simulates a wedged server)
+"""
+
+import json
+import sys
+
+TOOLS = [
+    {
+        "name": "echo",
+        "description": "Echo text back",
+        "inputSchema": {"type": "object", "properties": {"text": {"type": "string"}}},
+    },
+]
+
+
+def _send(message):
+    sys.stdout.write(json.dumps(message) + "\n")
+    sys.stdout.flush()
+
+
+def main():
+    hang = "--hang" in sys.argv
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        message = json.loads(line)
+        msg_id = message.get("id")
+        method = message.get("method")
+        if msg_id is None:
+            continue  # notification
+        if method == "initialize":
+            if hang:
+                continue
+            result = {
+                "protocolVersion": message["params"].get("protocolVersion", "2024-11-05"),
+                "capabilities": {"tools": {}},
+                "serverInfo": {"name": "stub", "version": "1.0"},
+            }
+        elif method == "tools/list":
+            result = {"tools": TOOLS}
+        elif method == "tools/call":
+            text = (message["params"].get("arguments") or {}).get("text", "")
+            result = {"content": [{"type": "text", "text": text}], "isError": False}
+        elif method == "ping":
+            result = {}
+        else:
+            _send({"jsonrpc": "2.0", "id": msg_id, "error": {"code": -32601, "message": f"Unknown method {method}"}})
+            continue
+        _send({"jsonrpc": "2.0", "id": msg_id, "result": result})
+
+
+if __name__ == "__main__":
+    main()
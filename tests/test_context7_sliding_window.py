@@ -104,6 +104,23 @@ class TestContext7SlidingWindow:
         assert len(metrics.truncations) > 0, "Should have recorded truncations"
         assert "structure" in metrics.truncations
 
+    def test_budgets_are_enforced_in_tokens(self):
+        """Verify dense Cyrillic content is cut to the token budget, not a char ratio."""
+        self.context7.prepare_with_window(
+            messages=[],
+            original_task="Відкрий браузер",
+            rag_context="знайдено " * 2000,
+            project_structure="",
+            meta_config={},
+            max_tokens=1000
+        )
+
+        metrics = self.context7.get_last_metrics()
+        assert "rag_context" in metrics.truncations
+        assert metrics.actual_tokens <= 1000
+        assert metrics.actual_tokens > metrics.estimated_tokens
+        assert metrics.to_dict()["tokenizer"] == self.context7.tokens.name
+
     def test_metrics_history_limit(self):
         """Verify metrics history is limited to 100 entries."""
         self.context7.clear_metrics_history()
@@ -122,6 +139,52 @@ class TestContext7SlidingWindow:
         assert stats["metrics_history_size"] <= 100
 
 
+class TestContext7Incremental:
+    """Tests for incremental context assembly across steps."""
+
+    def _prepare(self, context7, messages, rag="RAG hit"):
+        return context7.prepare_with_window(
+            messages=messages,
+            original_task="Open the browser",
+            rag_context=rag,
+            project_structure="src/\n  main.py",
+            meta_config={"strategy": "linear"}
+        )
+
+    def test_incremental_output_matches_fresh_assembly(self):
+        incremental = Context7(verbose=False)
+        messages = []
+        for i in range(25):
+            messages.append(MockMessage(f"Step: {i} Result: ok" if i % 3 else f"chatter {i}"))
+            result = self._prepare(incremental, messages)
+            assert result == self._prepare(Context7(verbose=False), list(messages))
+
+    def test_unchanged_sections_are_reused(self):
+        context7 = Context7(verbose=False)
+        messages = [MockMessage("[VOICE] Step 1 done")]
+        self._prepare(context7, messages)
+
+        messages.append(MockMessage("[VOICE] Step 2 done"))
+        self._prepare(context7, messages)
+
+        metrics = context7.get_last_metrics()
+        assert metrics.sections_reused == 4  # only recent_steps re-rendered
+        stats = context7.stats()["incremental"]
+        assert stats["section_hits"] == 4 and stats["section_misses"] == 6
+        assert stats["hit_ratio"] == 0.4
+        assert stats["window_entries"] == 2
+        assert stats["last_prep_ms"] is not None
+
+    def test_rewritten_history_rebuilds_window(self):
+        context7 = Context7(verbose=False)
+        self._prepare(context7, [MockMessage("[VOICE] old step")])
+
+        result = self._prepare(context7, [MockMessage("[VOICE] new step")])
+
+        assert "new step" in result and "old step" not in result
+        assert context7.stats()["incremental"]["window_entries"] == 1
+
+
 class TestContextMetrics:
     """Tests for ContextMetrics dataclass."""
 
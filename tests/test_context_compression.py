@@ -0,0 +1,99 @@
+"""Tests for relevance-aware Context7 compression."""
+
+import hashlib
+
+from core.context7 import Context7
+from core.context_compression import ContextCompressor
+from core.token_counter import CachedTokenCounter, HeuristicTokenCounter
+
+
+def _word(i):
+    # Distinct text per chunk (chunks differing only in numbers collapse as repeats)
+    return hashlib.md5(str(i).encode()).hexdigest()
+
+
+def _compressor():
+    return ContextCompressor(CachedTokenCounter(HeuristicTokenCounter()))
+
+
+def test_relevant_chunks_survive_in_original_order():
+    chunks = [f"note {_word(i)}: terminal color theme settings" for i in range(20)]
+    chunks[5] = "safari needs accessibility permission for automation"
+    chunks[15] = "safari private window shortcut is shift cmd n"
+
+    result = _compressor().compress(chunks, "open safari window", budget=40)
+
+    assert result.text.index("accessibility") < result.text.index("private window")
+    assert "omitted" in result.text
+    assert result.dropped_scores == sorted(result.dropped_scores, reverse=True)
+    assert len(result.dropped_scores) + result.kept == 20
+
+
+def test_repeated_tool_output_is_collapsed():
+    chunks = [f"Step {i}: click_button Result: element not found" for i in range(6)] + ["Step 7: done"]
+
+    result = _compressor().compress(chunks, "", budget=1000, collapse_repeats=True)
+
+    assert result.collapsed == 5
+    assert "Step 5: click_button Result: element not found [repeated 6x]" in result.text
+    assert "Step 0" not in result.text
+
+
+def test_distinct_numbered_paths_are_not_collapsed():
+    chunks = ["tests/test_1.py", "tests/test_2.py", "tests/test_3.py"]
+
+    for collapse in (False, True):
+        result = _compressor().compress(chunks, "fix test_1", budget=1000, collapse_repeats=collapse)
+
+        assert result.text == "\n".join(chunks)
+        assert result.collapsed == 0
+
+
+def test_recency_prior_prefers_latest_without_query_match():
+    chunks = [f"entry {_word(i)} " + "x" * 40 for i in range(10)]
+
+    result = _compressor().compress(chunks, "", budget=30, prior="recency")
+
+    assert chunks[9] in result.text and chunks[0] not in result.text
+
+
+def test_oversized_single_chunk_is_cut_to_budget():
+    counter = CachedTokenCounter(HeuristicTokenCounter())
+
+    result = ContextCompressor(counter).compress(["y" * 4000], "", budget=100)
+
+    assert counter.count(result.text) <= 100
+    assert result.text.endswith("[truncated]...")
+
+
+def test_context7_reports_dropped_chunks_for_rag():
+    context7 = Context7(verbose=False)
+    rag = "\n\n".join(
+        ["[SUCCESS] safari opens faster via spotlight"] + [f"[SUCCESS] unrelated memory {_word(i)} " + "z" * 200 for i in range(60)]
+    )
+
+    result = context7.prepare_with_window(
+        messages=[],
+        original_task="open safari",
+        rag_context=rag,
+        project_structure="",
+        meta_config={},
+        max_tokens=2000
+    )
+
+    metrics = context7.get_last_metrics()
+    assert "safari opens faster via spotlight" in result
+    assert metrics.dropped_chunks["rag_context"] > 0
+    assert metrics.dropped_scores["rag_context"] and len(metrics.dropped_scores["rag_context"]) <= 10
+    assert metrics.truncations["rag_context"] > 0
+    assert metrics.actual_tokens <= 2000
+
+
+def test_prepare_compresses_structure_against_last_message():
+    context7 = Context7(verbose=False)
+    structure = "\n".join([f"src/module_{_word(i)}/helpers.py" for i in range(3000)] + ["src/browser/safari_launcher.py"])
+
+    result = context7.prepare("", structure, {}, last_msg="fix safari_launcher")
+
+    assert "safari_launcher.py" in result
+    assert context7.get_last_metrics().dropped_chunks["structure"] > 0
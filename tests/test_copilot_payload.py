@@ -0,0 +1,80 @@
+"""Tests for CopilotLLM payload building: preamble memoization and size stats."""
+
+import json
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+import providers.copilot as copilot
+from providers.copilot import CopilotLLM, get_payload_stats
+
+
+@pytest.fixture(autouse=True)
+def _clean_state(monkeypatch):
+    monkeypatch.setenv("COPILOT_API_KEY", "test-key")
+    copilot._preamble_cache.clear()
+    copilot._payload_stats.reset()
+    yield
+    copilot._preamble_cache.clear()
+    copilot._payload_stats.reset()
+
+
+TOOLS = [{"name": "read_file", "description": "Прочитати файл"}, {"name": "list_files", "description": "List"}]
+
+
+def _llm(role="tetyana", tools=TOOLS):
+    llm = CopilotLLM(model_name="gpt-4.1")
+    llm._role = role
+    if tools:
+        llm.bind_tools(tools)
+    return llm
+
+
+class TestPayloadPreamble:
+
+    def test_tool_block_lists_dict_tools(self):
+        payload = _llm()._build_payload([SystemMessage(content="sys"), HumanMessage(content="hi")])
+
+        system = payload["messages"][0]
+        assert system["role"] == "system"
+        assert system["content"].startswith("sys\n\n")
+        assert "- read_file: Прочитати файл" in system["content"]
+        assert '"tool_calls"' in system["content"]
+        assert [m["role"] for m in payload["messages"]] == ["system", "user"]
+
+    def test_preamble_is_rendered_once_per_prompt_and_tool_set(self):
+        llm = _llm()
+        first = llm._build_payload([SystemMessage(content="sys"), HumanMessage(content="a")])
+        second = llm._build_payload([SystemMessage(content="sys"), AIMessage(content="b"), HumanMessage(content="c")])
+
+        assert first["messages"][0]["content"] is second["messages"][0]["content"]
+        stats = get_payload_stats()["tetyana"]
+        assert stats["preamble_misses"] == 1
+        assert stats["preamble_hits"] == 1
+        assert stats["preamble_bytes_reused"] > 0
+
+    def test_tool_set_change_rerenders(self):
+        _llm(tools=TOOLS)._build_payload([SystemMessage(content="sys")])
+        payload = _llm(tools=TOOLS[:1])._build_payload([SystemMessage(content="sys")])
+
+        assert "list_files" not in payload["messages"][0]["content"]
+        assert get_payload_stats()["tetyana"]["preamble_misses"] == 2
+
+    def test_no_system_message_uses_default_prompt(self):
+        payload = _llm(role="atlas", tools=None)._build_payload([HumanMessage(content="hi")])
+
+        assert payload["messages"][0]["content"] == "You are a helpful AI assistant."
+
+
+def test_encoded_payload_is_utf8_and_counted_per_role():
+    llm = _llm()
+    payload = llm._build_payload([SystemMessage(content="sys"), HumanMessage(content="привіт")])
+
+    body = llm._encode_payload(payload)
+
+    assert "привіт".encode("utf-8") in body
+    assert json.loads(body.decode("utf-8")) == payload
+    assert len(body) < len(json.dumps(payload).encode("utf-8"))
+    stats = get_payload_stats()["tetyana"]
+    assert stats["requests"] == 1
+    assert stats["max_bytes"] == len(body)
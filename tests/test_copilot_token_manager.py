@@ -0,0 +1,117 @@
+"""Tests for the shared Copilot session-token cache."""
+
+import threading
+import time
+
+import pytest
+
+from providers.copilot import CopilotTokenManager
+
+
+class CountingFetcher:
+    """Fake token endpoint that counts calls."""
+
+    def __init__(self, ttl: float = 3600, delay: float = 0.0):
+        self.calls = 0
+        self.ttl = ttl
+        self.delay = delay
+        self._lock = threading.Lock()
+
+    def __call__(self, api_key):
+        if self.delay:
+            time.sleep(self.delay)
+        with self._lock:
+            self.calls += 1
+            n = self.calls
+        return {
+            "token": f"tok-{api_key}-{n}",
+            "expires_at": time.time() + self.ttl,
+            "endpoints": {"api": "https://example.test"},
+        }
+
+
+class TestCopilotTokenManager:
+
+    def test_second_call_is_cache_hit(self):
+        fetcher = CountingFetcher()
+        mgr = CopilotTokenManager(fetcher=fetcher, refresh_margin=60)
+
+        first = mgr.get_token("key")
+        second = mgr.get_token("key")
+
+        assert first == second == ("tok-key-1", "https://example.test")
+        assert fetcher.calls == 1
+        stats = mgr.get_stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["refreshes"] == 1
+
+    def test_concurrent_cold_start_fetches_once(self):
+        fetcher = CountingFetcher(delay=0.05)
+        mgr = CopilotTokenManager(fetcher=fetcher, refresh_margin=60)
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(mgr.get_token("key"))) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert fetcher.calls == 1
+        assert len(set(results)) == 1
+
+    def test_near_expiry_token_is_refreshed_in_background(self):
+        fetcher = CountingFetcher(ttl=2.0)
+        mgr = CopilotTokenManager(fetcher=fetcher, refresh_margin=1.9)
+
+        token, _ = mgr.get_token("key")
+        assert token == "tok-key-1"
+        # The cached token is served immediately while a refresh runs behind the caller.
+        token, _ = mgr.get_token("key")
+        assert token == "tok-key-1"
+
+        deadline = time.time() + 3
+        while time.time() < deadline and mgr.get_stats()["background_refreshes"] == 0:
+            time.sleep(0.02)
+        assert mgr.get_stats()["background_refreshes"] >= 1
+        assert mgr.get_token("key")[0] != "tok-key-1"
+        mgr.invalidate()
+
+    def test_failed_background_refresh_is_not_retried_per_call(self):
+        fetcher = CountingFetcher(ttl=60)
+        mgr = CopilotTokenManager(fetcher=fetcher, refresh_margin=59.5)
+        mgr.get_token("key")
+
+        def failing(api_key):
+            fetcher.calls += 1
+            raise ConnectionError("token endpoint down")
+
+        mgr._fetcher = failing
+        deadline = time.time() + 3
+        while time.time() < deadline and mgr.get_stats()["failures"] == 0:
+            time.sleep(0.02)
+        for _ in range(50):
+            assert mgr.get_token("key")[0] == "tok-key-1"
+        time.sleep(0.1)
+
+        assert mgr.get_stats()["failures"] == 1
+        assert fetcher.calls == 2
+        mgr.invalidate()
+
+    def test_invalidate_forces_refetch(self):
+        fetcher = CountingFetcher()
+        mgr = CopilotTokenManager(fetcher=fetcher, refresh_margin=60)
+
+        mgr.get_token("key")
+        mgr.invalidate("key")
+        token, _ = mgr.get_token("key")
+
+        assert token == "tok-key-2"
+        assert mgr.get_stats()["invalidations"] == 1
+
+    def test_missing_token_field_raises_and_counts_failure(self):
+        mgr = CopilotTokenManager(fetcher=lambda key: {"endpoints": {}}, refresh_margin=60)
+
+        with pytest.raises(RuntimeError):
+            mgr.get_token("key")
+        assert mgr.get_stats()["failures"] == 1
@@ -0,0 +1,74 @@
+"""Tests for the shared embedding service."""
+
+import time
+
+from core.embeddings import ChromaEmbeddingFunction, EmbeddingService
+
+
+class CountingBackend:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts):
+        self.calls.append(list(texts))
+        return [[float(len(t)), float(sum(map(ord, t)) % 97)] for t in texts]
+
+
+def test_cache_hits_skip_the_backend():
+    backend = CountingBackend()
+    svc = EmbeddingService(backend=backend, cache_size=16, ttl_seconds=0)
+
+    first = svc.embed_query("open Safari")
+    second = svc.embed_query("  open   Safari ")
+
+    assert first == second
+    assert len(backend.calls) == 1
+    stats = svc.get_stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+
+
+def test_misses_are_embedded_in_one_batch_in_order():
+    backend = CountingBackend()
+    svc = EmbeddingService(backend=backend, cache_size=16, ttl_seconds=0)
+    svc.embed(["b"])
+
+    vectors = svc.embed(["a", "b", "c", "a"])
+
+    assert backend.calls == [["b"], ["a", "c"]]
+    assert vectors[0] == vectors[3] == backend(["a"])[0]
+    assert vectors[1] == backend(["b"])[0]
+    assert svc.get_stats()["avg_batch"] == 1.5
+
+
+def test_lru_eviction_and_ttl_expiry():
+    backend = CountingBackend()
+    svc = EmbeddingService(backend=backend, cache_size=2, ttl_seconds=0)
+    svc.embed(["a", "b"])
+    svc.embed(["a"])
+    svc.embed(["c"])  # evicts "b", the least recently used
+    svc.embed(["a", "b"])
+    assert backend.calls[-1] == ["b"]
+    assert svc.get_stats()["evictions"] >= 1
+
+    svc = EmbeddingService(backend=backend, cache_size=8, ttl_seconds=0.05)
+    svc.embed(["x"])
+    time.sleep(0.06)
+    svc.embed(["x"])
+    assert svc.get_stats()["expired"] == 1
+
+
+def test_chroma_adapter_uses_the_service(tmp_path):
+    import chromadb
+
+    backend = CountingBackend()
+    ef = ChromaEmbeddingFunction(EmbeddingService(backend=backend, ttl_seconds=0))
+    client = chromadb.PersistentClient(path=str(tmp_path))
+    col = client.get_or_create_collection("knowledge", embedding_function=ef)
+    col.add(documents=["alpha", "beta"], ids=["1", "2"])
+    col.query(query_texts=["alpha"], n_results=1)
+    col.query(query_texts=["alpha"], n_results=1)
+
+    assert backend.calls == [["alpha", "beta"]]
+    # Reopening with the adapter does not conflict with the persisted config
+    client.get_or_create_collection("knowledge", embedding_function=ef)
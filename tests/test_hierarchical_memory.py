@@ -186,3 +186,259 @@ class TestBackwardCompatibility:
         assert memory.strategies is not None
         assert memory.user_habits is not None
         assert memory.knowledge_base is not None
+
+
+class TestMemoryIds:
+    """Tests for deterministic memory ids."""
+
+    def test_same_content_same_id(self):
+        from core.memory import make_memory_id
+
+        assert make_memory_id("knowledge_base", "fact") == make_memory_id("knowledge_base", "fact")
+
+    def test_scope_and_content_change_id(self):
+        from core.memory import make_memory_id
+
+        base = make_memory_id("episodic", "Opened Chrome", "session_1", "tool_execution")
+        assert base != make_memory_id("episodic", "Opened Chrome", "session_2", "tool_execution")
+        assert base != make_memory_id("episodic", "Opened Safari", "session_1", "tool_execution")
+        # Scope parts are delimited, so shifting text between them is a different id
+        assert make_memory_id("x", "c", "ab", "") != make_memory_id("x", "c", "a", "b")
+
+
+def _use_offline_embeddings(monkeypatch):
+    """Bag-of-words embedder so tests do not download the ONNX model."""
+    import hashlib
+
+    import core.embeddings as embeddings
+
+    def bag_of_words(texts):
+        vectors = []
+        for text in texts:
+            vec = [0.0] * 32
+            for word in text.lower().split():
+                vec[int(hashlib.md5(word.encode()).hexdigest(), 16) % 32] += 1.0
+            vectors.append(vec)
+        return vectors
+
+    monkeypatch.setattr(embeddings, "_embedding_service", embeddings.EmbeddingService(backend=bag_of_words))
+
+
+class TestParallelRetrieval:
+    """Tests for concurrent multi-layer retrieval."""
+
+    @pytest.fixture
+    def memory(self, tmp_path, monkeypatch):
+        _use_offline_embeddings(monkeypatch)
+        return HierarchicalMemory(persist_path=str(tmp_path / "parallel_memory"))
+
+    def test_merged_results_are_reranked_across_layers(self, memory):
+        memory.add_episodic_memory("opened safari browser window", "tool_execution")
+        memory.add_semantic_memory("safari browser needs accessibility permission", "rule")
+        memory.add_memory("knowledge_base", "terminal colors are configurable")
+
+        results = memory.get_relevant_context("safari browser", max_results_per_layer=2, top_k=3)
+
+        assert set(results["timings"]) == {"working", "episodic", "semantic", "legacy"}
+        assert results["timed_out"] == []
+        scores = [item["score"] for item in results["merged"]]
+        assert scores == sorted(scores, reverse=True)
+        assert "safari" in results["merged"][0]["content"]
+        assert {item["layer"] for item in results["merged"]} >= {"episodic", "semantic"}
+
+    def test_slow_layer_returns_partial_results(self, memory, monkeypatch):
+        import time as _time
+
+        memory.add_episodic_memory("opened safari browser window", "tool_execution")
+        memory.flush_writes()
+
+        def slow_semantic(*args, **kwargs):
+            _time.sleep(0.5)
+            return [{"content": "late", "metadata": {}}]
+
+        monkeypatch.setattr(memory, "query_semantic_memory", slow_semantic)
+
+        started = _time.perf_counter()
+        results = memory.get_relevant_context("safari", layer_timeout=0.1)
+
+        assert _time.perf_counter() - started < 0.4
+        assert results["timed_out"] == ["semantic"]
+        assert results["timings"]["semantic"] is None
+        assert results["semantic"] == []
+        assert results["episodic"]
+
+    def test_sequential_mode_matches_layers(self, memory):
+        memory.add_episodic_memory("opened safari browser window", "tool_execution")
+
+        results = memory.get_relevant_context("safari", parallel=False)
+
+        assert results["episodic"][0]["content"] == "opened safari browser window"
+        assert results["timed_out"] == []
+
+
+class TestFilteredQuery:
+    """Tests for server-side filters and hybrid ranking."""
+
+    @pytest.fixture(params=["chroma", "numpy"])
+    def memory(self, request, tmp_path, monkeypatch):
+        _use_offline_embeddings(monkeypatch)
+        return AtlasMemory(persist_path=str(tmp_path / "filtered_memory"), backend=request.param)
+
+    def test_build_where_combines_clauses(self):
+        from core.memory import build_where
+
+        assert build_where() is None
+        assert build_where({"status": "success"}) == {"status": "success"}
+        assert build_where({"status": "success", "type": "rule"}, min_confidence=0.5) == {
+            "$and": [{"status": "success"}, {"type": "rule"}, {"confidence": {"$gte": 0.5}}]
+        }
+
+    def test_min_confidence_and_status_are_filtered_in_store(self, memory):
+        memory.add_memory("knowledge_base", "open safari with spotlight", {"status": "success", "confidence": 0.9})
+        memory.add_memory("knowledge_base", "open safari from the dock", {"status": "success", "confidence": 0.2})
+        memory.add_memory("knowledge_base", "open safari via applescript", {"status": "failed", "confidence": 0.5})
+        memory.add_memory("knowledge_base", "open safari by voice", {"status": "pending", "confidence": 1.0})
+
+        results = memory.query_memory(
+            "knowledge_base",
+            "open safari",
+            n_results=5,
+            where={"status": {"$in": ["success", "failed"]}},
+            min_confidence=0.3,
+        )
+
+        assert sorted(r["content"] for r in results) == ["open safari via applescript", "open safari with spotlight"]
+
+    def test_experience_keeps_low_confidence_failures_and_legacy_entries(self, memory, tmp_path):
+        from core.memory import query_experience
+
+        memory.add_memory("knowledge_base", "open safari with spotlight", {"status": "success", "confidence": 0.9})
+        memory.add_memory("knowledge_base", "open safari from the dock", {"status": "success", "confidence": 0.3})
+        memory.add_memory("knowledge_base", "open safari via applescript", {"status": "failed", "confidence": 0.1})
+        memory.add_memory("knowledge_base", "open safari by voice", {"status": "pending", "confidence": 1.0})
+        # Written before add_memory stored status/confidence defaults
+        memory._store("knowledge_base", "legacy-1", "open safari from launchpad", {"kind": "legacy"})
+        memory.flush_writes()
+        marker = tmp_path / "filtered_memory" / ".knowledge_base_defaults_v1"
+        marker.unlink()
+
+        # Reopening the store backfills the legacy entry once
+        assert memory._backfill_defaults(str(tmp_path / "filtered_memory"), "knowledge_base") == 1
+        assert marker.exists()
+        assert memory._backfill_defaults(str(tmp_path / "filtered_memory"), "knowledge_base") == 0
+
+        results = query_experience(memory, "open safari", n_results=5)
+
+        assert sorted(r["content"] for r in results) == [
+            "open safari from launchpad", "open safari via applescript", "open safari with spotlight"
+        ]
+
+    def test_defaults_make_unlabelled_memories_filterable(self, memory):
+        memory.add_memory("knowledge_base", "plain note about safari")
+
+        results = memory.query_memory("knowledge_base", "safari", where={"status": "success"}, min_confidence=0.99)
+
+        assert results[0]["metadata"]["confidence"] == 1.0
+
+    def test_hybrid_ranks_keyword_matches_first(self, memory):
+        for text in ["terminal colors", "terminal fonts", "terminal tabs", "kill process by pid", "terminal themes"]:
+            memory.add_memory("knowledge_base", text)
+
+        results = memory.query_memory("knowledge_base", "pid", n_results=2, hybrid=True)
+
+        assert len(results) == 2
+        assert results[0]["content"] == "kill process by pid"
+        assert results[0]["score"] >= results[1]["score"]
+
+
+class TestLazyMemory:
+    """Tests for the background-initialized memory proxy."""
+
+    def test_first_use_waits_for_warmup_and_delegates(self):
+        import threading
+
+        from core.memory import LazyMemory
+
+        release = threading.Event()
+
+        class Slow:
+            def query_memory(self, category, query, n_results=3):
+                return [category, query]
+
+        def factory():
+            release.wait(2)
+            return Slow()
+
+        proxy = LazyMemory(factory)
+        assert not proxy.ready
+        threading.Timer(0.05, release.set).start()
+
+        assert proxy.query_memory("knowledge_base", "q") == ["knowledge_base", "q"]
+        assert proxy.ready
+        assert proxy.metrics["blocked_calls"] == 1
+        assert proxy.metrics["warm_on_first_use"] is False
+        assert proxy.metrics["init_ms"] >= 40
+
+    def test_warm_proxy_does_not_block_and_errors_propagate(self):
+        from core.memory import LazyMemory
+
+        proxy = LazyMemory(lambda: "instance")
+        assert proxy.get(timeout=2) == "instance"
+        assert proxy.metrics["warm_on_first_use"] is True
+        assert proxy.metrics["blocked_calls"] == 0
+
+        def broken():
+            raise RuntimeError("store locked")
+
+        failing = LazyMemory(broken)
+        with pytest.raises(RuntimeError, match="store locked"):
+            failing.get(timeout=2)
+
+    def test_concurrent_get_memory_builds_one_instance(self, monkeypatch):
+        import threading
+
+        import core.memory as memory_module
+
+        created = []
+
+        def slow_create():
+            time.sleep(0.05)
+            created.append(object())
+            return created[-1]
+
+        monkeypatch.setattr(memory_module, "_memory_instance", None)
+        monkeypatch.setattr(memory_module, "_create_memory", slow_create)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(memory_module.get_memory())) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert len(created) == 1
+        assert all(r is created[0] for r in results)
+
+    def test_chroma_failure_falls_back_to_separate_numpy_store(self, monkeypatch, tmp_path, capsys):
+        import core.memory as memory_module
+
+        opened = []
+
+        class FakeMemory:
+            def __init__(self, persist_path, backend=None):
+                if backend is None:
+                    raise RuntimeError("chroma broken")
+                opened.append((persist_path, backend))
+
+            def close(self):
+                pass
+
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.delenv("MEMORY_BACKEND", raising=False)
+        monkeypatch.setattr(memory_module, "HierarchicalMemory", FakeMemory)
+        monkeypatch.setattr(memory_module.atexit, "register", lambda fn: None)
+
+        memory = memory_module._create_memory()
+
+        assert isinstance(memory, FakeMemory)
+        assert opened == [(str(tmp_path / ".atlas_memory" / "numpy_fallback"), "numpy")]
+        assert "chroma broken" in capsys.readouterr().out
@@ -0,0 +1,85 @@
+"""Tests for the per-role LLM client registry."""
+
+import pytest
+
+from providers.llm_registry import LLMClientRegistry, fingerprint_tools
+
+
+@pytest.fixture(autouse=True)
+def _copilot_key(monkeypatch):
+    monkeypatch.setenv("COPILOT_API_KEY", "test-key")
+
+
+TOOLS = [{"name": "read_file", "description": "Read file"}, {"name": "list_files", "description": "List"}]
+
+
+class TestLLMClientRegistry:
+
+    def test_same_role_and_tools_reuses_client(self):
+        reg = LLMClientRegistry()
+        a = reg.get("tetyana", model_name="gpt-4o", tools=TOOLS)
+        b = reg.get("tetyana", model_name="gpt-4o", tools=list(TOOLS))
+
+        assert a is b
+        assert a._tools == TOOLS
+        stats = reg.get_stats()["roles"]["tetyana"]
+        assert stats["constructions"] == 1
+        assert stats["hits"] == 1
+
+    def test_tool_change_rebuilds_and_drops_stale_client(self):
+        reg = LLMClientRegistry()
+        a = reg.get("tetyana", model_name="gpt-4o", tools=TOOLS)
+        b = reg.get("tetyana", model_name="gpt-4o", tools=TOOLS + [{"name": "x", "description": "y"}])
+
+        assert a is not b
+        stats = reg.get_stats()
+        assert stats["cached_clients"] == 1
+        assert stats["roles"]["tetyana"]["rebuilds"] == 1
+
+    def test_model_change_rebuilds(self):
+        reg = LLMClientRegistry()
+        a = reg.get("atlas", model_name="gpt-4.1")
+        b = reg.get("atlas", model_name="gpt-4o")
+
+        assert a is not b
+        assert b.model_name == "gpt-4o"
+
+    def test_default_model_follows_environment(self, monkeypatch):
+        reg = LLMClientRegistry()
+        monkeypatch.setenv("COPILOT_MODEL", "gpt-4.1")
+        a = reg.get("atlas")
+        monkeypatch.setenv("COPILOT_MODEL", "gpt-4o")
+        b = reg.get("atlas")
+
+        assert a is not b
+        assert b.model_name == "gpt-4o"
+        assert reg.get("atlas") is b
+
+    def test_unchanged_tools_version_skips_fingerprinting(self, monkeypatch):
+        import providers.llm_registry as llm_registry
+
+        calls = []
+        real = llm_registry.fingerprint_tools
+        monkeypatch.setattr(llm_registry, "fingerprint_tools", lambda tools: calls.append(1) or real(tools))
+        reg = LLMClientRegistry()
+        a = reg.get("tetyana", model_name="gpt-4o", tools=TOOLS, tools_version=(1, 0))
+        b = reg.get("tetyana", model_name="gpt-4o", tools=TOOLS, tools_version=(1, 0))
+        c = reg.get("tetyana", model_name="gpt-4o", tools=TOOLS + [{"name": "x"}], tools_version=(2, 0))
+
+        assert a is b
+        assert c is not a
+        assert len(calls) == 2
+
+    def test_roles_are_independent(self):
+        reg = LLMClientRegistry()
+        a = reg.get("atlas", model_name="gpt-4.1")
+        g = reg.get("grisha", model_name="gpt-4.1")
+
+        assert a is not g
+        assert reg.get_stats()["total_constructions"] == 2
+
+
+def test_fingerprint_is_order_sensitive_and_stable():
+    assert fingerprint_tools(TOOLS) == fingerprint_tools([dict(t) for t in TOOLS])
+    assert fingerprint_tools(TOOLS) != fingerprint_tools(list(reversed(TOOLS)))
+    assert fingerprint_tools(None) == ""
@@ -0,0 +1,138 @@
+"""Tests for the pooled LLM HTTP transport against a local stub server."""
+
+import json
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from providers.transport import HttpTransport, _parse_pool_sizes
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    fail_first = 0
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        self.rfile.read(length)
+        server = self.server
+        with server.lock:
+            server.hits += 1
+            should_fail = server.hits <= server.fail_first
+        if server.reset_after_body:
+            # Drop the connection after reading the request, before any response
+            self.close_connection = True
+            return
+        if should_fail:
+            body = b"busy"
+            self.send_response(503)
+        else:
+            body = json.dumps({"choices": [{"message": {"content": "ok"}}]}).encode()
+            self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+    server.lock = threading.Lock()
+    server.hits = 0
+    server.fail_first = 0
+    server.reset_after_body = False
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _url(server):
+    host, port = server.server_address
+    return f"http://{host}:{port}/chat/completions"
+
+
+class TestHttpTransport:
+
+    def test_keep_alive_reuses_single_connection(self, stub_server):
+        transport = HttpTransport(max_retries=0)
+        for _ in range(5):
+            resp = transport.post(_url(stub_server), data="{}", timeout=5)
+            assert resp.status_code == 200
+
+        host_stats = next(iter(transport.get_stats()["hosts"].values()))
+        assert host_stats["requests"] == 5
+        assert host_stats["new_connections"] == 1
+        assert host_stats["reused_connections"] == 4
+        transport.close()
+
+    def test_response_carries_latency_metrics(self, stub_server):
+        transport = HttpTransport(max_retries=0)
+        resp = transport.post(_url(stub_server), data="{}", timeout=5)
+
+        metrics = resp.transport_metrics
+        assert metrics["new_connection"] is True
+        assert metrics["connect_ms"] >= 0
+        assert metrics["total_ms"] >= metrics["ttfb_ms"] >= 0
+        transport.close()
+
+    def test_retryable_status_is_retried_with_backoff(self, stub_server):
+        stub_server.fail_first = 2
+        transport = HttpTransport(max_retries=2, backoff_base=0.01)
+
+        resp = transport.post(_url(stub_server), data="{}", timeout=5)
+
+        assert resp.status_code == 200
+        assert resp.transport_metrics["attempt"] == 3
+        host_stats = next(iter(transport.get_stats()["hosts"].values()))
+        assert host_stats["retries"] == 2
+        transport.close()
+
+    def test_retries_are_bounded(self, stub_server):
+        stub_server.fail_first = 10
+        transport = HttpTransport(max_retries=1, backoff_base=0.01)
+
+        resp = transport.post(_url(stub_server), data="{}", timeout=5)
+
+        assert resp.status_code == 503
+        assert stub_server.hits == 2
+        transport.close()
+
+
+    def test_post_is_not_retried_after_request_was_sent(self, stub_server):
+        stub_server.reset_after_body = True
+        transport = HttpTransport(max_retries=2, backoff_base=0.01)
+
+        with pytest.raises(requests.exceptions.ConnectionError):
+            transport.post(_url(stub_server), data="{}", timeout=5)
+
+        assert stub_server.hits == 1
+        transport.close()
+
+    def test_post_is_retried_when_connection_is_refused(self):
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        transport = HttpTransport(max_retries=2, backoff_base=0.01)
+
+        with pytest.raises(requests.exceptions.ConnectionError):
+            transport.post(f"http://127.0.0.1:{port}/chat/completions", data="{}", timeout=5)
+
+        host_stats = next(iter(transport.get_stats()["hosts"].values()))
+        assert host_stats["retries"] == 2
+        transport.close()
+
+
+def test_parse_pool_sizes():
+    assert _parse_pool_sizes("api.githubcopilot.com=20, api.github.com=2,bad,x=y") == {
+        "api.githubcopilot.com": 20,
+        "api.github.com": 2,
+    }
@@ -0,0 +1,120 @@
+"""Tests for the background MCP provider pool against a local stdio stub server."""
+
+import os
+import sys
+import time
+
+import pytest
+
+from core.mcp_pool import ExternalMCPProvider, MCPProviderPool, ProviderUnavailable
+
+STUB = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mcp_stub_server.py")
+
+
+class _FlakyProvider:
+    """In-process provider whose pings can be switched to fail."""
+
+    def __init__(self, name="flaky"):
+        self.name = name
+        self._tools = {"noop": type("T", (), {"description": "No-op"})()}
+        self.healthy = True
+        self.connects = 0
+        self.closed = 0
+
+    def connect(self, timeout=30):
+        if not self.healthy:
+            raise ConnectionError("server down")
+        self.connects += 1
+
+    def ping(self, timeout=5):
+        if not self.healthy:
+            raise ConnectionError("ping timeout")
+        return 1.0
+
+    def close(self, timeout=5):
+        self.closed += 1
+
+    def execute(self, tool_name, args, timeout=60):
+        return {"tool": tool_name, "status": "success"}
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+class TestMCPProviderPool:
+
+    def test_stub_server_connects_in_background_and_serves_calls(self):
+        pool = MCPProviderPool(health_interval=0.1, connect_timeout=10)
+        pool.add(ExternalMCPProvider("stub", sys.executable, [STUB]))
+        pool.start()
+        try:
+            assert pool.wait_until_settled(15)
+            assert pool.tool_snapshot() == {"stub": [("echo", "Echo text back")]}
+            assert pool.version == 1
+
+            res = pool.execute("stub", "echo", {"text": "hi"})
+            assert res["status"] == "success"
+            assert res["output"] == "hi"
+
+            assert _wait_for(lambda: pool.get_stats()["providers"]["stub"]["pings"] >= 1)
+            assert pool.get_stats()["providers"]["stub"]["last_ping_ms"] is not None
+        finally:
+            pool.stop()
+
+    def test_hanging_server_never_blocks_snapshot(self):
+        pool = MCPProviderPool(connect_timeout=0.5, backoff_base=30)
+        pool.add(ExternalMCPProvider("wedged", sys.executable, [STUB, "--hang"]))
+        pool.start()
+        try:
+            start = time.perf_counter()
+            assert pool.tool_snapshot() == {}
+            assert pool.unavailable() == {"wedged": "connecting"}
+            assert time.perf_counter() - start < 0.1
+
+            assert pool.wait_until_settled(10)
+            stats = pool.get_stats()["providers"]["wedged"]
+            assert stats["status"] == "offline"
+            assert stats["retry_in_s"] > 20
+            with pytest.raises(ProviderUnavailable):
+                pool.execute("wedged", "echo", {})
+            assert pool.get_stats()["providers"]["wedged"]["rejected_calls"] == 1
+        finally:
+            pool.stop()
+
+    def test_missing_command_goes_offline_with_backoff(self):
+        pool = MCPProviderPool(backoff_base=30)
+        pool.add(ExternalMCPProvider("missing", "definitely-not-an-mcp-server-binary", []))
+        pool.start()
+        try:
+            assert pool.wait_until_settled(10)
+            reason = pool.unavailable()["missing"]
+            assert "retry in" in reason
+        finally:
+            pool.stop()
+
+    def test_failed_pings_open_circuit_then_recover(self):
+        provider = _FlakyProvider()
+        pool = MCPProviderPool(health_interval=0.05, backoff_base=0.1, backoff_cap=0.2, failure_threshold=2)
+        pool.add(provider)
+        pool.start()
+        try:
+            assert _wait_for(lambda: pool.is_available("flaky"))
+            online_version = pool.version
+
+            provider.healthy = False
+            assert _wait_for(lambda: not pool.is_available("flaky"))
+            assert pool.tool_snapshot() == {}
+            assert pool.version > online_version
+            assert provider.closed >= 1
+
+            provider.healthy = True
+            assert _wait_for(lambda: pool.is_available("flaky"))
+            assert provider.connects == 2
+        finally:
+            pool.stop(close_providers=False)
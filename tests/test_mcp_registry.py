@@ -25,3 +25,87 @@ def test_mcp_registry_execute_returns_json_for_known_tool():
     out = r.execute("find_image_on_screen", {"template_path": "", "tolerance": 0.9})
     payload = json.loads(out)
     assert payload["status"] == "error"
+
+
+def test_mcp_registry_binder_keeps_tool_calling_conventions():
+    from core.mcp import MCPToolRegistry
+
+    r = MCPToolRegistry()
+    r.register_tool("t_filtered", lambda path, allow=False: {"path": path, "allow": allow}, "")
+    r.register_tool("t_args", lambda args: {"keys": sorted(args)}, "")
+    r.register_tool("t_kwargs", lambda args=None, **kw: {"args": args, "kw": kw}, "")
+
+    assert json.loads(r.execute("t_filtered", {"path": "/a", "junk": 1})) == {"path": "/a", "allow": True}
+    assert json.loads(r.execute("t_args", {"a": 1, "b": 2})) == {"keys": ["a", "b"]}
+    out = json.loads(r.execute("t_kwargs", {"args": "x", "c": 3}))
+    assert out["args"] == {"args": "x", "c": 3}
+    assert out["kw"] == {"c": 3}
+
+
+def test_mcp_registry_results_are_compact_and_spill_when_oversized(tmp_path, monkeypatch):
+    from core.mcp import MCPToolRegistry
+
+    monkeypatch.setenv("MCP_RESULT_MAX_CHARS", "200")
+    monkeypatch.setenv("MCP_SPILL_DIR", str(tmp_path))
+    r = MCPToolRegistry()
+    r.register_tool("t_small", lambda: {"status": "success", "n": 1}, "")
+    r.register_tool("t_big", lambda: {"status": "success", "data": "x" * 1000}, "")
+
+    assert r.execute("t_small", {}) == '{"status": "success", "n": 1}'
+
+    ref = json.loads(r.execute("t_big", {}))
+    assert ref["truncated"] is True
+    with open(ref["full_output_path"], encoding="utf-8") as f:
+        assert json.loads(f.read())["data"] == "x" * 1000
+    assert r.get_stats()["serialization"]["spilled"] == 1
+
+
+def test_mcp_registry_spilled_error_keeps_status_marker(tmp_path, monkeypatch):
+    from core.mcp import MCPToolRegistry
+
+    monkeypatch.setenv("MCP_RESULT_MAX_CHARS", "200")
+    monkeypatch.setenv("MCP_SPILL_DIR", str(tmp_path))
+    r = MCPToolRegistry()
+    r.register_tool("t_big_error", lambda: {"status": "error", "error": "e" * 1000}, "")
+
+    out = r.execute("t_big_error", {})
+
+    assert json.loads(out)["truncated"] is True
+    assert '"status": "error"' in out
+
+
+def test_mcp_registry_stats_track_latency_and_errors():
+    from core.mcp import MCPToolRegistry
+
+    def boom():
+        raise RuntimeError("nope")
+
+    r = MCPToolRegistry()
+    r.register_tool("t_ok", lambda: {"status": "success"}, "")
+    r.register_tool("t_boom", boom, "")
+    for _ in range(3):
+        r.execute("t_ok", {})
+    assert r.execute("t_boom", {}).startswith("Error executing 't_boom'")
+
+    tools = r.get_stats()["tools"]
+    assert tools["t_ok"]["calls"] == 3 and tools["t_ok"]["errors"] == 0
+    assert tools["t_boom"]["errors"] == 1
+    assert tools["t_ok"]["p95_ms"] >= tools["t_ok"]["p50_ms"] > 0
+
+
+def test_mcp_registry_starts_external_providers_on_first_use():
+    from core.mcp import MCPToolRegistry
+
+    r = MCPToolRegistry()
+    assert r._provider_pool.providers == {}
+    assert r._provider_pool._thread is None
+
+    started = []
+    r._register_external_mcp = lambda: started.append(1)
+    r.register_tool("t_local", lambda: {"status": "success"}, "")
+    r.execute("t_local", {})
+    assert started == []
+    assert r.execute("t_missing", {}).startswith("Error: Tool")
+    r.list_tools()
+    r.get_all_tool_definitions()
+    assert started == [1]
@@ -0,0 +1,68 @@
+"""Tests for episodic → semantic memory compaction."""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from core.memory import HierarchicalMemory
+from core.memory_compaction import MemoryCompactor
+
+
+@pytest.fixture
+def memory(tmp_path, monkeypatch):
+    import hashlib
+
+    import core.embeddings as embeddings
+
+    def bag_of_words(texts):
+        vectors = []
+        for text in texts:
+            vec = [0.0] * 64
+            for word in text.lower().split():
+                vec[int(hashlib.md5(word.encode()).hexdigest(), 16) % 64] += 1.0
+            vectors.append(vec)
+        return vectors
+
+    # Offline embedder so the test does not download the ONNX model
+    monkeypatch.setattr(embeddings, "_embedding_service", embeddings.EmbeddingService(backend=bag_of_words))
+    return HierarchicalMemory(persist_path=str(tmp_path / "compaction_memory"))
+
+
+def _seed(memory):
+    for i in range(4):
+        memory.add_episodic_memory(f"opened safari browser window {i}", "tool_execution", outcome="success" if i else "failed")
+    memory.add_episodic_memory("wrote quarterly report in pages", "tool_execution")
+    old = (datetime.now() - timedelta(days=90)).isoformat()
+    memory.add_episodic_memory("ancient terminal session", "tool_execution", metadata={"timestamp": old})
+
+
+def test_near_duplicates_become_one_semantic_summary(memory):
+    _seed(memory)
+
+    report = MemoryCompactor(memory, similarity_threshold=0.7, retention_days=30, skip_session=None).run()
+
+    assert report["scanned"] == 6
+    assert report["pruned"] == 1
+    assert report["clusters"] == 1 and report["merged_entries"] == 4
+    assert report["before"]["episodic"] == 6 and report["after"]["episodic"] == 1
+    assert report["after"]["semantic"] == report["before"]["semantic"] + 1
+
+    summary = memory.semantic_memory.get(include=["documents", "metadatas"])
+    assert "Observed 4 times" in summary["documents"][0]
+    meta = summary["metadatas"][0]
+    assert meta["source"] == "compaction" and meta["cluster_size"] == 4
+    assert 0 < meta["confidence"] < 1
+    assert meta["success_rate"] == 0.75
+
+
+def test_dry_run_and_live_session_leave_memory_untouched(memory):
+    _seed(memory)
+
+    report = memory.compact_episodic_memory(dry_run=True, similarity_threshold=0.7, skip_session=None)
+    assert report["clusters"] == 1 and report["preview"]
+    assert memory.episodic_memory.count() == 6
+
+    # Default: entries of the running session are never compacted
+    report = MemoryCompactor(memory, similarity_threshold=0.7).run()
+    assert report["merged_entries"] == 0 and report["pruned"] == 0
+    assert memory.episodic_memory.count() == 6
@@ -0,0 +1,145 @@
+"""Tests for the write-behind memory buffer."""
+
+import threading
+import time
+
+import pytest
+
+from core.memory_writer import MemoryWriteBuffer
+
+
+class FakeCollection:
+    def __init__(self, fail_times=0):
+        self.docs = {}
+        self.upsert_calls = 0
+        self.fail_times = fail_times
+        self.lock = threading.Lock()
+
+    def upsert(self, documents, metadatas, ids):
+        with self.lock:
+            self.upsert_calls += 1
+            if self.fail_times:
+                self.fail_times -= 1
+                raise RuntimeError("embedding backend down")
+            assert len(set(ids)) == len(ids)
+            for doc, meta, mid in zip(documents, metadatas, ids):
+                self.docs[mid] = (doc, meta)
+
+
+@pytest.fixture
+def collections():
+    return {"episodic_memory": FakeCollection(), "knowledge_base": FakeCollection()}
+
+
+def _buffer(collections, tmp_path, **kwargs):
+    kwargs.setdefault("flush_interval", 60)
+    return MemoryWriteBuffer(collections.get, journal_path=str(tmp_path / "journal.jsonl"), **kwargs)
+
+
+def test_flush_writes_one_upsert_per_collection(collections, tmp_path):
+    buf = _buffer(collections, tmp_path)
+    for i in range(5):
+        buf.enqueue("episodic_memory", f"e{i}", f"doc {i}", {"i": i})
+    buf.enqueue("knowledge_base", "k0", "fact", {})
+
+    assert buf.pending_count() == 6
+    assert buf.flush() == 6
+
+    assert collections["episodic_memory"].upsert_calls == 1
+    assert len(collections["episodic_memory"].docs) == 5
+    assert collections["knowledge_base"].upsert_calls == 1
+    stats = buf.get_stats()
+    assert stats["queue_depth"] == 0 and stats["flushed"] == 6 and stats["max_queue_depth"] == 6
+    assert not (tmp_path / "journal.jsonl").exists()
+
+
+def test_repeated_ids_in_a_batch_keep_the_last_write(collections, tmp_path):
+    buf = _buffer(collections, tmp_path)
+    buf.enqueue("knowledge_base", "k0", "fact", {"v": 1})
+    buf.enqueue("knowledge_base", "k0", "fact", {"v": 2})
+
+    assert buf.flush() == 1
+    assert collections["knowledge_base"].docs["k0"] == ("fact", {"v": 2})
+    assert buf.get_stats()["deduplicated"] == 1
+
+
+def test_flush_single_collection_leaves_others_queued(collections, tmp_path):
+    buf = _buffer(collections, tmp_path)
+    buf.enqueue("episodic_memory", "e0", "doc", {})
+    buf.enqueue("knowledge_base", "k0", "fact", {})
+
+    assert buf.flush("knowledge_base") == 1
+    assert buf.pending_count("episodic_memory") == 1
+    assert buf.pending_count("knowledge_base") == 0
+
+
+def test_background_flush_on_batch_size(collections, tmp_path):
+    buf = _buffer(collections, tmp_path, batch_size=4)
+    for i in range(4):
+        buf.enqueue("episodic_memory", f"e{i}", "doc", {})
+
+    deadline = time.time() + 2
+    while buf.pending_count() and time.time() < deadline:
+        time.sleep(0.01)
+    assert len(collections["episodic_memory"].docs) == 4
+    buf.close()
+
+
+def test_journal_is_replayed_after_crash(collections, tmp_path):
+    crashed = _buffer(collections, tmp_path)
+    crashed.enqueue("episodic_memory", "e0", "doc 0", {"n": 1})
+    crashed.enqueue("episodic_memory", "e1", "doc 1", {"n": 2})
+    # Simulate a torn write at the moment of the crash
+    with open(tmp_path / "journal.jsonl", "a", encoding="utf-8") as f:
+        f.write('{"collection": "episodic_mem')
+
+    restarted = _buffer(collections, tmp_path)
+    assert restarted.flush() == 2
+    assert collections["episodic_memory"].docs["e1"] == ("doc 1", {"n": 2})
+    assert restarted.get_stats()["replayed"] == 2
+
+
+def test_failed_batches_are_retried_then_dropped(tmp_path):
+    flaky = {"episodic_memory": FakeCollection(fail_times=1)}
+    buf = _buffer(flaky, tmp_path, max_retries=2)
+    buf.enqueue("episodic_memory", "e0", "doc", {})
+
+    assert buf.flush() == 0
+    assert buf.pending_count() == 1
+    assert (tmp_path / "journal.jsonl").exists()
+    assert buf.flush() == 1
+
+    down = {"episodic_memory": FakeCollection(fail_times=10)}
+    buf = _buffer(down, tmp_path, max_retries=2)
+    buf.enqueue("episodic_memory", "e0", "doc", {})
+    buf.flush()
+    buf.flush()
+    stats = buf.get_stats()
+    assert stats["dropped"] == 1 and stats["queue_depth"] == 0
+    assert "embedding backend down" in stats["last_error"]
+
+
+def test_journal_io_does_not_hold_the_queue_lock(collections, tmp_path, monkeypatch):
+    buf = _buffer(collections, tmp_path)
+    in_journal = threading.Event()
+    release = threading.Event()
+    real_append = buf._append_journal
+
+    def slow_append(entries):
+        in_journal.set()
+        release.wait(5)
+        real_append(entries)
+
+    monkeypatch.setattr(buf, "_append_journal", slow_append)
+    producer = threading.Thread(target=buf.enqueue, args=("knowledge_base", "k0", "fact", {}))
+    producer.start()
+    assert in_journal.wait(5)
+
+    started = time.perf_counter()
+    stats = buf.get_stats()
+    assert time.perf_counter() - started < 0.5
+    assert stats["queue_depth"] == 0 and stats["last_error"] is None
+
+    release.set()
+    producer.join(5)
+    assert buf.pending_count() == 1
@@ -0,0 +1,140 @@
+"""Tests for the append-only Trinity message store."""
+
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from langchain_core.messages import AIMessage, HumanMessage  # noqa: E402
+
+from core import message_store  # noqa: E402
+from core.message_store import BlobStore, MessageLog, load_content, merge_messages  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def _blob_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(message_store, "_blob_store", BlobStore(str(tmp_path / "blobs")))
+
+
+def test_deltas_are_appended_to_a_new_log():
+    log = merge_messages([], [HumanMessage(content="open safari")])
+    update = [AIMessage(content="step 1")]
+    merged = merge_messages(log, update)
+    again = merge_messages(log, update)
+
+    assert merged is not log and isinstance(merged, MessageLog)
+    assert [m.content for m in log] == ["open safari"]
+    assert [m.content for m in merged] == [m.content for m in again] == ["open safari", "step 1"]
+    assert merged[0] is log[0]
+
+
+def test_full_history_return_is_reduced_to_new_tail():
+    log = merge_messages([], [HumanMessage(content="task"), AIMessage(content="a")])
+
+    log = merge_messages(log, list(log) + [AIMessage(content="b")])
+
+    assert [m.content for m in log] == ["task", "a", "b"]
+    assert log.get_stats()["prefix_returns"] == 1
+
+
+def test_large_tool_output_is_spilled_to_blob(monkeypatch):
+    monkeypatch.setenv("TRINITY_MESSAGE_SPILL_CHARS", "1000")
+    output = "".join(f"line {i}\n" for i in range(5000))
+
+    log = merge_messages([], [HumanMessage(content="task"), AIMessage(content=output)])
+
+    stored = log[-1]
+    assert len(stored.content) < 1200 and "stored in blob" in stored.content
+    assert stored.content.startswith("line 0") and stored.content.rstrip().endswith("line 4999")
+    assert load_content(stored) == output
+    assert load_content(log[0]) == "task"
+    assert log.get_stats()["spilled"] == 1
+
+
+def test_blob_store_is_content_addressed(tmp_path):
+    store = BlobStore(str(tmp_path))
+
+    digest = store.put("payload")
+
+    assert store.put("payload") == digest
+    assert store.get(digest) == "payload"
+    assert store.get("0" * 64) is None
+
+
+def test_prune_removes_expired_then_oldest_blobs(tmp_path):
+    import os
+    import time
+
+    store = BlobStore(str(tmp_path))
+    old, mid, new = store.put("a" * 100), store.put("b" * 100), store.put("c" * 100)
+    now = time.time()
+    os.utime(store.path(old), (now - 10 * 86400, now - 10 * 86400))
+    os.utime(store.path(mid), (now - 3600, now - 3600))
+
+    assert store.prune(max_age_seconds=7 * 86400) == 1
+    assert store.get(old) is None and store.get(mid) is not None
+
+    assert store.prune(max_bytes=150) == 1
+    assert store.get(mid) is None and store.get(new) == "c" * 100
+
+
+def test_old_turns_are_compacted_keeping_the_task(monkeypatch):
+    monkeypatch.setenv("TRINITY_MESSAGE_WINDOW", "5")
+    log = merge_messages([], [HumanMessage(content="task")])
+    for i in range(10):
+        log = merge_messages(log, [AIMessage(content=f"turn {i}")])
+
+    assert len(log) == 5
+    assert log[0].content == "task" and log[-1].content == "turn 9"
+    assert log.pending_compacted() == [f"AIMessage: turn {i}" for i in range(6)]
+    folded = log.compacted_total
+
+    log = merge_messages(log, [AIMessage(content="turn 10")])
+
+    assert log.pending_compacted(folded) == ["AIMessage: turn 6"]
+    assert log.get_stats()["compacted"] == 7
+
+
+def test_graph_write_is_applied_once():
+    langgraph = pytest.importorskip("langgraph.graph")
+    from typing import Annotated, List, TypedDict
+
+    class State(TypedDict):
+        messages: Annotated[List, merge_messages]
+        step: int
+
+    def node(state):
+        return {"messages": [AIMessage(content=f"step {state['step']}")], "step": state["step"] + 1}
+
+    graph = langgraph.StateGraph(State)
+    graph.add_node("node", node)
+    graph.set_entry_point("node")
+    graph.add_conditional_edges("node", lambda s: langgraph.END if s["step"] >= 3 else "node")
+
+    out = graph.compile().invoke({"messages": [HumanMessage(content="task")], "step": 0})
+
+    assert [m.content for m in out["messages"]] == ["task", "step 0", "step 1", "step 2"]
+
+
+def test_checkpointed_history_keeps_each_snapshot():
+    langgraph = pytest.importorskip("langgraph.graph")
+    from langgraph.checkpoint.memory import MemorySaver
+    from typing import Annotated, TypedDict
+
+    class State(TypedDict):
+        messages: Annotated[MessageLog, merge_messages]
+        step: int
+
+    def node(state):
+        return {"messages": [AIMessage(content=f"step {state['step']}")], "step": state["step"] + 1}
+
+    graph = langgraph.StateGraph(State)
+    graph.add_node("node", node)
+    graph.set_entry_point("node")
+    graph.add_conditional_edges("node", lambda s: langgraph.END if s["step"] >= 3 else "node")
+    app = graph.compile(checkpointer=MemorySaver())
+    config = {"configurable": {"thread_id": "t"}}
+
+    app.invoke({"messages": [HumanMessage(content="task")], "step": 0}, config)
+
+    lengths = sorted(len(snap.values.get("messages", [])) for snap in app.get_state_history(config))
+    assert lengths[-4:] == [1, 2, 3, 4]
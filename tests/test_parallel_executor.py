@@ -1,6 +1,8 @@
 """Tests for Parallel Tool Executor."""
 
+import asyncio
 import pytest
+import threading
 import time
 from core.parallel_executor import (
     ParallelToolExecutor,
@@ -79,9 +81,7 @@ class TestDependencyAnalyzer:
         graph = analyzer.analyze(steps)
         
         # These should be independent
-        deps = graph.get_dependencies(2)
-        # Actually our default is to assume sequential, so this will have dependency
-        # This is by design for safety
+        assert not graph.get_dependencies(2)
 
     def test_file_dependency_detection(self):
         """Test file-based dependency detection."""
@@ -94,6 +94,112 @@ class TestDependencyAnalyzer:
         graph = analyzer.analyze(steps)
         assert 1 in graph.get_dependencies(2)
 
+    def test_reads_on_different_paths_are_independent(self):
+        """Read-only tools on different paths can run concurrently."""
+        analyzer = DependencyAnalyzer()
+        steps = [
+            {"id": 1, "tool": "read_file", "args": {"path": "/tmp/a.txt"}},
+            {"id": 2, "tool": "read_file", "args": {"path": "/tmp/b.txt"}},
+            {"id": 3, "tool": "get_system_stats", "args": {}},
+            {"id": 4, "tool": "list_processes", "args": {}},
+        ]
+        
+        graph = analyzer.analyze(steps)
+        
+        assert all(not graph.get_dependencies(i) for i in (2, 3, 4))
+
+    def test_read_after_unknown_tool_stays_sequential(self):
+        """Unknown tools keep the safe sequential default."""
+        analyzer = DependencyAnalyzer()
+        steps = [
+            {"id": 1, "tool": "run_shell", "args": {"command": "touch /tmp/a.txt"}},
+            {"id": 2, "tool": "read_file", "args": {"path": "/tmp/a.txt"}},
+        ]
+        
+        graph = analyzer.analyze(steps)
+        assert 1 in graph.get_dependencies(2)
+
+
+    def test_writes_conflict_only_on_shared_resources(self):
+        """Writes to different files run side by side; listing the parent waits."""
+        analyzer = DependencyAnalyzer()
+        steps = [
+            {"id": 1, "tool": "write_file", "args": {"path": "/tmp/x/a.txt"}},
+            {"id": 2, "tool": "write_file", "args": {"path": "/tmp/x/b.txt"}},
+            {"id": 3, "tool": "list_files", "args": {"path": "/tmp/x"}},
+            {"id": 4, "tool": "read_file", "args": {"path": "/tmp/y.txt"}},
+        ]
+        
+        graph = analyzer.analyze(steps)
+        
+        assert not graph.get_dependencies(2)
+        assert graph.get_dependencies(3) == {1, 2}
+        assert not graph.get_dependencies(4)
+
+    def test_unknown_tool_is_a_barrier(self):
+        """Steps around a tool without declared effects are ordered against it."""
+        analyzer = DependencyAnalyzer()
+        steps = [
+            {"id": 1, "tool": "get_clipboard", "args": {}},
+            {"id": 2, "tool": "get_system_stats", "args": {}},
+            {"id": 3, "tool": "mystery_tool", "args": {}},
+            {"id": 4, "tool": "list_processes", "args": {}},
+        ]
+        
+        graph = analyzer.analyze(steps)
+        
+        assert graph.get_dependencies(3) == {1, 2}
+        assert graph.get_dependencies(4) == {3}
+
+    @pytest.mark.parametrize("writer, args, reader", [
+        ("open_app", {"name": "Safari"}, "take_screenshot"),
+        ("browser_open_url", {"url": "https://example.com"}, "take_screenshot"),
+        ("activate_app", {"name": "Finder"}, "capture_screen"),
+        ("browser_navigate", {"url": "https://example.com"}, "ocr_region"),
+    ])
+    def test_screen_readers_wait_for_screen_changes(self, writer, args, reader):
+        """Screenshots and OCR see the screen after app/browser actions."""
+        analyzer = DependencyAnalyzer()
+        steps = [
+            {"id": 1, "tool": writer, "args": args},
+            {"id": 2, "tool": reader, "args": {}},
+        ]
+
+        graph = analyzer.analyze(steps)
+        assert graph.get_dependencies(2) == {1}
+
+    def test_screenshot_with_activation_writes_focus(self):
+        """A screenshot that activates an app orders against focus readers."""
+        analyzer = DependencyAnalyzer()
+        steps = [
+            {"id": 1, "tool": "take_screenshot", "args": {}},
+            {"id": 2, "tool": "get_open_windows", "args": {}},
+            {"id": 3, "tool": "capture_screen", "args": {"app_name": "Notes"}},
+            {"id": 4, "tool": "type_text", "args": {"text": "hi"}},
+        ]
+
+        graph = analyzer.analyze(steps)
+
+        assert not graph.get_dependencies(2)
+        assert graph.get_dependencies(3) == {1, 2}
+        assert graph.get_dependencies(4) == {3}
+
+    def test_large_plan_is_linear_and_parallel(self):
+        """Hundreds of steps analyze quickly and expose the parallelism factor."""
+        analyzer = DependencyAnalyzer()
+        steps = []
+        for i in range(2000):
+            steps.append({"tool": "write_file", "args": {"path": f"/tmp/plan/f{i % 50}.txt"}})
+        
+        start = time.perf_counter()
+        analyzer.analyze(steps)
+        elapsed = time.perf_counter() - start
+        
+        assert elapsed < 1.0
+        assert analyzer.last_stats["steps"] == 2000
+        assert analyzer.last_stats["depth"] == 40
+        assert analyzer.last_stats["parallelism_factor"] == 50.0
+
 
 class TestParallelToolExecutor:
     """Tests for ParallelToolExecutor."""
@@ -133,6 +239,23 @@ class TestParallelToolExecutor:
         assert len(results) == 3
         assert all(r.status == StepStatus.COMPLETED for r in results)
 
+    def test_independent_reads_overlap(self):
+        """Independent read-only steps run concurrently and keep their order."""
+        executor = ParallelToolExecutor(self.simple_executor, max_workers=4)
+        steps = [
+            {"id": 1, "tool": "read_file", "args": {"path": "/tmp/a.txt"}},
+            {"id": 2, "tool": "read_file", "args": {"path": "/tmp/b.txt"}},
+            {"id": 3, "tool": "get_system_stats", "args": {}},
+            {"id": 4, "tool": "list_processes", "args": {}},
+        ]
+        
+        start = time.perf_counter()
+        results = executor.execute_parallel(steps, stop_on_error=False)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        
+        assert [r.step_id for r in results] == [1, 2, 3, 4]
+        assert elapsed_ms < sum(r.duration_ms for r in results)
+
     def test_stop_on_error(self):
         """Test stopping on error."""
         executor = ParallelToolExecutor(self.failing_executor)
@@ -174,6 +297,256 @@ class TestParallelToolExecutor:
         assert stats["avg_duration_ms"] > 0
 
 
+class _FixedAnalyzer:
+    """Analyzer stub that returns a prebuilt dependency graph."""
+
+    def __init__(self, edges):
+        self.graph = DependencyGraph()
+        for step_id, depends_on in edges:
+            self.graph.add_dependency(step_id, depends_on)
+
+    def analyze(self, steps):
+        return self.graph
+
+
+class TestDagScheduling:
+    """Tests for the DAG scheduler in ParallelToolExecutor."""
+
+    @staticmethod
+    def sleepy_executor(step):
+        time.sleep(step.get("sleep", 0.02))
+        if step.get("fail"):
+            raise Exception("boom")
+        return step.get("id")
+
+    def test_successor_starts_before_slow_sibling_finishes(self):
+        """A ready step does not wait for an unrelated slow step."""
+        executor = ParallelToolExecutor(self.sleepy_executor, max_workers=4)
+        executor.analyzer = _FixedAnalyzer([(3, 2)])
+        steps = [
+            {"id": 1, "tool": "test", "sleep": 0.3},
+            {"id": 2, "tool": "test", "sleep": 0.02},
+            {"id": 3, "tool": "test", "sleep": 0.02},
+        ]
+
+        results = executor.execute_parallel(steps)
+
+        assert all(r.status == StepStatus.COMPLETED for r in results)
+        assert results[2].completed_at < results[0].completed_at
+
+    def test_priority_orders_ready_steps(self):
+        """Higher priority steps start first when workers are scarce."""
+        started = []
+        executor = ParallelToolExecutor(lambda step: started.append(step["id"]), max_workers=1)
+        executor.analyzer = _FixedAnalyzer([])
+        steps = [
+            {"id": 1, "tool": "test"},
+            {"id": 2, "tool": "test", "priority": 5},
+            {"id": 3, "tool": "test", "priority": 1},
+        ]
+
+        executor.execute_parallel(steps)
+
+        assert started == [2, 3, 1]
+
+    def test_gui_group_runs_one_at_a_time(self):
+        """GUI tools share a single slot even with free workers."""
+        lock = threading.Lock()
+        active = {"now": 0, "max": 0}
+
+        def gui_executor(step):
+            with lock:
+                active["now"] += 1
+                active["max"] = max(active["max"], active["now"])
+            time.sleep(0.03)
+            with lock:
+                active["now"] -= 1
+
+        executor = ParallelToolExecutor(gui_executor, max_workers=4)
+        executor.analyzer = _FixedAnalyzer([])
+        steps = [{"id": i, "tool": tool} for i, tool in enumerate(["click", "type_text", "press_key"], start=1)]
+
+        executor.execute_parallel(steps)
+
+        assert active["max"] == 1
+
+    def test_failure_cancels_only_dependents(self):
+        """Dependents of a failed step are skipped; independent steps still run."""
+        executor = ParallelToolExecutor(self.sleepy_executor, max_workers=4)
+        executor.analyzer = _FixedAnalyzer([(2, 1), (3, 2)])
+        steps = [
+            {"id": 1, "tool": "test", "fail": True},
+            {"id": 2, "tool": "test"},
+            {"id": 3, "tool": "test"},
+            {"id": 4, "tool": "test"},
+        ]
+
+        results = executor.execute_parallel(steps, stop_on_error=False)
+
+        assert [r.status for r in results] == [
+            StepStatus.FAILED, StepStatus.SKIPPED, StepStatus.SKIPPED, StepStatus.COMPLETED
+        ]
+        assert "step 1" in results[2].error
+
+    def test_critical_path_report(self):
+        """The report follows the longest dependency chain."""
+        executor = ParallelToolExecutor(self.sleepy_executor, max_workers=4)
+        executor.analyzer = _FixedAnalyzer([(2, 1), (4, 3)])
+        steps = [
+            {"id": 1, "tool": "test", "sleep": 0.1},
+            {"id": 2, "tool": "test", "sleep": 0.1},
+            {"id": 3, "tool": "test", "sleep": 0.02},
+            {"id": 4, "tool": "test", "sleep": 0.02},
+        ]
+
+        executor.execute_parallel(steps)
+        report = executor.get_critical_path()
+
+        assert report["steps"] == [1, 2]
+        assert report["duration_ms"] >= 200
+        assert report["parallelism"] > 1
+
+
+class TestAsyncExecution:
+    """Tests for the native asyncio path."""
+
+    @staticmethod
+    def _reads(n):
+        return [{"id": i, "tool": "read_file", "args": {"path": f"/tmp/async_{i}.txt"}} for i in range(1, n + 1)]
+
+    def test_coroutine_executor_runs_on_the_loop(self):
+        """Async tools are awaited directly, beyond the thread-pool width."""
+        threads = set()
+
+        async def async_executor(step):
+            threads.add(threading.get_ident())
+            await asyncio.sleep(0.05)
+            return step["id"]
+
+        executor = ParallelToolExecutor(async_executor, max_workers=2)
+
+        async def main():
+            start = time.perf_counter()
+            results = await executor.execute_parallel_async(self._reads(10))
+            return results, time.perf_counter() - start, threading.get_ident()
+
+        results, elapsed, loop_thread = asyncio.run(main())
+
+        assert [r.result for r in results] == list(range(1, 11))
+        assert threads == {loop_thread}
+        assert elapsed < 0.25
+
+    def test_sync_executor_uses_bounded_pool(self):
+        """Sync tools run off the loop, at most max_workers at a time."""
+        lock = threading.Lock()
+        active = {"now": 0, "max": 0}
+
+        def sync_executor(step):
+            with lock:
+                active["now"] += 1
+                active["max"] = max(active["max"], active["now"])
+            time.sleep(0.02)
+            with lock:
+                active["now"] -= 1
+            return step["id"]
+
+        executor = ParallelToolExecutor(sync_executor, max_workers=3)
+        results = asyncio.run(executor.execute_parallel_async(self._reads(9)))
+
+        assert [r.step_id for r in results] == list(range(1, 10))
+        assert all(r.status == StepStatus.COMPLETED for r in results)
+        assert active["max"] == 3
+
+    def test_mixed_dispatcher_with_run_sync(self):
+        """An async dispatcher can offload blocking tools to the pool."""
+        def blocking(step_id):
+            time.sleep(0.02)
+            return f"sync-{step_id}"
+
+        async def dispatcher(step):
+            if step["id"] % 2:
+                return await executor.run_sync(blocking, step["id"])
+            await asyncio.sleep(0.02)
+            return f"async-{step['id']}"
+
+        executor = ParallelToolExecutor(dispatcher, max_workers=2)
+        results = asyncio.run(executor.execute_parallel_async(self._reads(4)))
+
+        assert [r.result for r in results] == ["sync-1", "async-2", "sync-3", "async-4"]
+
+    def test_tool_timeout_cancels_step(self):
+        """A step over its timeout fails; its dependents are skipped."""
+        cancelled = []
+
+        async def slow_executor(step):
+            try:
+                await asyncio.sleep(1.0 if step["tool"] == "get_clipboard" else 0.01)
+            except asyncio.CancelledError:
+                cancelled.append(step["id"])
+                raise
+            return step["id"]
+
+        executor = ParallelToolExecutor(slow_executor, tool_timeouts={"get_clipboard": 0.05})
+        steps = [
+            {"id": 1, "tool": "get_clipboard", "args": {}},
+            {"id": 2, "tool": "set_clipboard", "args": {"text": "x"}},
+            {"id": 3, "tool": "get_system_stats", "args": {}},
+        ]
+        results = asyncio.run(executor.execute_parallel_async(steps, stop_on_error=False))
+
+        assert results[0].status == StepStatus.FAILED
+        assert "Timed out" in results[0].error
+        assert cancelled == [1]
+        assert results[1].status == StepStatus.SKIPPED
+        assert results[2].status == StepStatus.COMPLETED
+
+    def test_cancelling_the_run_cancels_in_flight_steps(self):
+        """Cancelling execute_parallel_async propagates to running coroutines."""
+        cancelled = []
+
+        async def hanging(step):
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(step["id"])
+                raise
+
+        executor = ParallelToolExecutor(hanging)
+
+        async def main():
+            task = asyncio.ensure_future(executor.execute_parallel_async(self._reads(3)))
+            await asyncio.sleep(0.05)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(main())
+        assert sorted(cancelled) == [1, 2, 3]
+
+    def test_sync_entry_point_accepts_async_executor(self):
+        """execute_parallel drives an async executor on its own loop."""
+        async def async_executor(step):
+            await asyncio.sleep(0)
+            return step["id"] * 10
+
+        results = ParallelToolExecutor(async_executor).execute_parallel(self._reads(3))
+
+        assert [r.result for r in results] == [10, 20, 30]
+
+    def test_sync_entry_point_inside_running_loop(self):
+        """execute_parallel still works when the caller already runs an event loop."""
+        async def async_executor(step):
+            await asyncio.sleep(0)
+            return step["id"] * 10
+
+        async def main():
+            return ParallelToolExecutor(async_executor).execute_parallel(self._reads(3))
+
+        results = asyncio.run(main())
+
+        assert [r.result for r in results] == [10, 20, 30]
+
+
 class TestStepResult:
     """Tests for StepResult."""
 
@@ -0,0 +1,109 @@
+"""Tests for stable agent prompt prefixes and the prompt response cache."""
+
+import pytest
+
+from core.prompt_cache import PromptResponseCache, with_volatile_suffix
+
+pytest.importorskip("langchain_core")
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage  # noqa: E402
+
+
+class CountingLLM:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return AIMessage(content=f"plan {self.calls}")
+
+
+def _messages(task="open safari", system="You are Atlas."):
+    return [SystemMessage(content=system), HumanMessage(content=task)]
+
+
+def test_exact_repeat_is_served_from_cache():
+    cache = PromptResponseCache(agents=["atlas"], ttl_seconds=0)
+    llm = CountingLLM()
+
+    first, info1 = cache.invoke("atlas", _messages(), llm, model="gpt-4.1")
+    second, info2 = cache.invoke("atlas", _messages(), llm, model="gpt-4.1")
+    third, _ = cache.invoke("atlas", _messages(task="open finder"), llm, model="gpt-4.1")
+
+    assert first is second and third.content == "plan 2"
+    assert llm.calls == 2
+    assert not info1["cache_hit"] and info2["cache_hit"]
+    stats = cache.get_stats()["agents"]["atlas"]
+    assert stats["cache_hits"] == 1 and stats["cache_misses"] == 2
+    assert stats["prefix_repeats"] == 2 and stats["prefix_chars"] == len("You are Atlas.")
+
+
+def test_model_change_and_uncached_agents_call_the_llm():
+    cache = PromptResponseCache(agents=["atlas"], ttl_seconds=0)
+    llm = CountingLLM()
+
+    cache.invoke("atlas", _messages(), llm, model="gpt-4.1")
+    cache.invoke("atlas", _messages(), llm, model="gpt-4o")
+    cache.invoke("tetyana", _messages(), llm)
+    _, info = cache.invoke("tetyana", _messages(), llm)
+
+    assert llm.calls == 4
+    assert not info["cache_hit"] and info["prefix_repeat"]
+
+
+def test_expired_and_empty_responses_are_not_reused():
+    cache = PromptResponseCache(agents=["atlas"], ttl_seconds=0.01)
+    llm = CountingLLM()
+    cache.invoke("atlas", _messages(), llm)
+
+    import time
+    time.sleep(0.02)
+    cache.invoke("atlas", _messages(), llm)
+    cache.invoke("atlas", _messages(task="empty"), lambda: AIMessage(content=""))
+    _, info = cache.invoke("atlas", _messages(task="empty"), lambda: AIMessage(content=""))
+
+    assert llm.calls == 2
+    assert not info["cache_hit"]
+
+
+def test_failed_call_is_retried_not_replayed():
+    cache = PromptResponseCache(agents=["atlas"], ttl_seconds=0)
+    responses = iter([
+        AIMessage(content="[COPILOT ERROR] HTTP 503: upstream unavailable"),
+        AIMessage(content="[COPILOT] No response from model."),
+        AIMessage(content="plan ok"),
+    ])
+    calls = []
+
+    def call():
+        calls.append(1)
+        return next(responses)
+
+    first, _ = cache.invoke("atlas", _messages(), call)
+    second, _ = cache.invoke("atlas", _messages(), call)
+    third, _ = cache.invoke("atlas", _messages(), call)
+    fourth, info = cache.invoke("atlas", _messages(), call)
+
+    assert first.content.startswith("[COPILOT ERROR]") and second.content.startswith("[COPILOT]")
+    assert third.content == "plan ok" and fourth is third
+    assert len(calls) == 3 and info["cache_hit"]
+
+
+def test_volatile_suffix_goes_after_content():
+    assert with_volatile_suffix("Task", vision_context="") == "Task"
+    assert with_volatile_suffix("Task", vision_context=" window open ") == "Task\n\nVISION CONTEXT:\nwindow open"
+
+
+def test_agent_system_prompts_do_not_depend_on_volatile_inputs():
+    from core.agents.atlas import get_atlas_plan_prompt
+    from core.agents.grisha import get_grisha_prompt
+    from core.agents.tetyana import get_tetyana_prompt
+
+    for build in (
+        lambda v: get_atlas_plan_prompt("goal", tools_desc="tools", vision_context=v, forbidden_actions=v),
+        lambda v: get_tetyana_prompt("goal", tools_desc="tools", vision_context=v),
+        lambda v: get_grisha_prompt("goal", tools_desc="tools", vision_context=v),
+    ):
+        quiet, busy = build("").format_messages(), build("safari window focused").format_messages()
+        assert quiet[0].content == busy[0].content
+        assert busy[-1].content.endswith("safari window focused")
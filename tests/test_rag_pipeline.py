@@ -0,0 +1,81 @@
+"""Tests for batched RAG ingestion."""
+
+import pytest
+
+from system_ai.rag import rag_pipeline
+from system_ai.rag.rag_pipeline import RagPipeline, chunk_text, get_rag_pipeline
+
+
+class FakeStore:
+    def __init__(self):
+        self.docs = {}
+        self.calls = []
+
+    def add_texts(self, texts, metadatas=None, ids=None):
+        self.calls.append(list(ids))
+        for doc_id, text, meta in zip(ids, texts, metadatas):
+            self.docs[doc_id] = (text, meta)
+        return True
+
+    def existing_ids(self, ids):
+        return {i for i in ids if i in self.docs}
+
+
+@pytest.fixture
+def pipeline(monkeypatch, tmp_path):
+    monkeypatch.setenv("SYSTEM_RAG_ENABLED", "1")
+    rp = RagPipeline(persist_dir=str(tmp_path), chunk_chars=120, chunk_overlap=30)
+    rp.store = FakeStore()
+    return rp
+
+
+def test_chunk_text_respects_limit_and_overlaps():
+    text = "\n".join(f"line {i:02d} " + "x" * 20 for i in range(20))
+
+    chunks = chunk_text(text, max_chars=120, overlap=30)
+
+    assert len(chunks) > 1
+    assert all(len(c) <= 120 for c in chunks)
+    assert chunks[0].splitlines()[-1] == chunks[1].splitlines()[0]
+    assert chunk_text("short") == ["short"]
+    assert chunk_text("  ") == []
+
+
+def test_ingest_many_batches_chunks_and_skips_duplicates(pipeline):
+    long_text = "\n".join(f"event {i} " + "y" * 30 for i in range(10))
+
+    stored = pipeline.ingest_many(["alpha", long_text, "alpha"], [{"targets": ["a", "b"]}, {}, {}])
+    again = pipeline.ingest_many(["  alpha "])
+
+    assert len(pipeline.store.calls) == 1
+    assert stored == len(pipeline.store.docs) > 2
+    assert again == 0
+    stats = pipeline.get_stats()["ingestion"]
+    assert stats["deduplicated"] == 2
+    meta = next(m for t, m in pipeline.store.docs.values() if t == "alpha")
+    assert meta["targets"] == "a,b"
+    assert meta["chunk_count"] == 1
+
+
+def test_ingest_async_runs_in_background(pipeline):
+    assert pipeline.ingest_async("first summary", {"kind": "periodic"})
+    assert pipeline.ingest_async("second summary")
+
+    assert pipeline.flush(timeout=2)
+    assert sorted(t for t, _ in pipeline.store.docs.values()) == ["first summary", "second summary"]
+    assert pipeline.get_stats()["ingestion"]["queue_depth"] == 0
+
+
+def test_disabled_pipeline_ingests_nothing(monkeypatch, tmp_path):
+    monkeypatch.setenv("SYSTEM_RAG_ENABLED", "0")
+    rp = RagPipeline(persist_dir=str(tmp_path))
+
+    assert rp.ingest_many(["text"]) is None
+    assert rp.ingest_async("text") is False
+
+
+def test_get_rag_pipeline_is_shared_per_directory(monkeypatch, tmp_path):
+    monkeypatch.setattr(rag_pipeline, "_pipelines", {})
+
+    assert get_rag_pipeline(str(tmp_path)) is get_rag_pipeline(str(tmp_path) + "/")
+    assert get_rag_pipeline(str(tmp_path)) is not get_rag_pipeline(str(tmp_path / "other"))
@@ -0,0 +1,80 @@
+"""Tests for Context7 token counting."""
+
+import pytest
+
+from core.token_counter import (
+    BPETokenCounter,
+    CachedTokenCounter,
+    HeuristicTokenCounter,
+    load_token_counter,
+)
+
+
+class CountingCounter:
+    name = "counting"
+
+    def __init__(self):
+        self.calls = 0
+
+    def count(self, text):
+        self.calls += 1
+        return len(text.split())
+
+
+def test_heuristic_counts_cyrillic_denser_than_ascii():
+    counter = HeuristicTokenCounter()
+
+    assert counter.count("") == 0
+    assert counter.count("a" * 400) == 100
+    assert counter.count("я" * 400) == 200
+
+
+def test_cache_memoizes_by_content():
+    inner = CountingCounter()
+    counter = CachedTokenCounter(inner, max_entries=4)
+    text = "відкрий браузер і знайди погоду " * 4
+
+    assert counter.count(text) == counter.count(text) == 20
+    assert inner.calls == 1
+    stats = counter.get_stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1
+    assert stats["tokenizer"] == "counting"
+
+
+def test_truncate_keeps_head_or_tail_within_budget():
+    counter = CachedTokenCounter(HeuristicTokenCounter())
+    text = "".join(f"line {i}\n" for i in range(200))
+
+    head = counter.truncate(text, 50)
+    tail = counter.truncate(text, 50, keep="tail")
+
+    assert counter.count(head) <= 50 and text.startswith(head)
+    assert counter.count(tail) <= 50 and text.endswith(tail)
+    assert counter.truncate(text, 10_000) == text
+    assert counter.truncate(text, 0) == ""
+
+
+def test_bpe_counter_loads_local_tokenizer_json(tmp_path):
+    tokenizers = pytest.importorskip("tokenizers")
+    from tokenizers import models, pre_tokenizers, trainers
+
+    tokenizer = tokenizers.Tokenizer(models.BPE(unk_token="[UNK]"))
+    tokenizer.pre_tokenizer = pre_tokenizers.Whitespace()
+    tokenizer.train_from_iterator(
+        ["open the browser", "відкрий браузер"] * 50,
+        trainers.BpeTrainer(vocab_size=200, special_tokens=["[UNK]"]),
+    )
+    path = tmp_path / "tokenizer.json"
+    tokenizer.save(str(path))
+
+    counter = load_token_counter(str(path))
+
+    assert isinstance(counter.counter, BPETokenCounter)
+    assert counter.name == "bpe:tokenizer.json"
+    assert counter.count("open the browser") == 3
+
+
+def test_unloadable_tokenizer_falls_back_to_heuristic(tmp_path):
+    counter = load_token_counter(str(tmp_path / "missing.json"))
+
+    assert counter.name == "heuristic"
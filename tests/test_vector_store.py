@@ -0,0 +1,128 @@
+"""Tests for the in-process NumPy/SQLite vector backend."""
+
+import sqlite3
+
+import numpy as np
+import pytest
+
+from core.vector_store import NumpyCollection, NumpyVectorClient, resolve_backend
+
+
+def onehot(texts):
+    """Embed 'vN ...' as the N-th basis vector (slightly blurred)."""
+    out = []
+    for t in texts:
+        vec = np.full(8, 0.01, dtype=np.float32)
+        vec[int(t.split()[0][1:]) % 8] = 1.0
+        out.append(vec)
+    return out
+
+
+@pytest.fixture
+def collection(tmp_path):
+    return NumpyVectorClient(str(tmp_path)).get_or_create_collection("knowledge", embedding_function=onehot)
+
+
+def test_query_returns_nearest_with_cosine_distance(collection):
+    collection.add(ids=["a", "b", "c"], documents=["v1 alpha", "v2 beta", "v3 gamma"],
+                   metadatas=[{"n": 1}, {"n": 2}, {"n": 3}])
+
+    res = collection.query(query_texts=["v2 query"], n_results=2)
+
+    assert res["ids"][0][0] == "b"
+    assert res["documents"][0][0] == "v2 beta"
+    assert res["metadatas"][0][0] == {"n": 2}
+    assert res["distances"][0][0] < 0.01 < res["distances"][0][1]
+    assert collection.count() == 3
+
+
+def test_upsert_replaces_and_add_ignores_existing(collection):
+    collection.add(ids=["a"], documents=["v1 old"], metadatas=[{"v": 1}])
+    collection.add(ids=["a"], documents=["v1 ignored"], metadatas=[{"v": 0}])
+    collection.upsert(ids=["a"], documents=["v4 new"], metadatas=[{"v": 2}])
+
+    assert collection.count() == 1
+    assert collection.get(ids=["a"])["documents"] == ["v4 new"]
+    assert collection.query(query_texts=["v4"], n_results=1)["metadatas"][0] == [{"v": 2}]
+
+
+def test_where_filters_query_get_and_delete(collection):
+    collection.add(ids=["a", "b", "c"], documents=["v1 a", "v1 b", "v1 c"],
+                   metadatas=[{"session_id": "s1", "confidence": 0.9},
+                              {"session_id": "s2", "confidence": 0.5},
+                              {"session_id": "s1", "confidence": 0.2}])
+
+    res = collection.query(query_texts=["v1"], n_results=5, where={"confidence": {"$gte": 0.5}})
+    assert sorted(res["ids"][0]) == ["a", "b"]
+    both = {"$and": [{"session_id": "s1"}, {"confidence": {"$lt": 0.5}}]}
+    assert collection.get(where=both)["ids"] == ["c"]
+
+    collection.delete(where={"session_id": "s1"})
+    assert collection.get()["ids"] == ["b"]
+
+
+def test_store_survives_reopen(tmp_path):
+    col = NumpyVectorClient(str(tmp_path)).get_or_create_collection("episodic_memory", embedding_function=onehot)
+    col.add(ids=["a", "b"], documents=["v1 a", "v5 b"], metadatas=[{}, {"k": "x"}])
+    col.delete(ids=["a"])
+
+    reopened = NumpyVectorClient(str(tmp_path)).get_or_create_collection("episodic_memory", embedding_function=onehot)
+
+    assert reopened.count() == 1
+    assert reopened.query(query_texts=["v5"], n_results=1)["metadatas"][0] == [{"k": "x"}]
+    emb = reopened.get(include=["embeddings"])["embeddings"]
+    assert emb.shape == (1, 8)
+
+
+def test_failed_metadata_insert_leaves_later_rows_aligned(tmp_path, monkeypatch):
+    client = NumpyVectorClient(str(tmp_path))
+    col = client.get_or_create_collection("knowledge", embedding_function=onehot)
+    col.add(ids=["a"], documents=["v1 a"])
+
+    real_insert = client._insert
+
+    def locked(name, rows):
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(client, "_insert", locked)
+    with pytest.raises(sqlite3.OperationalError):
+        col.add(ids=["b"], documents=["v2 b"])
+    monkeypatch.setattr(client, "_insert", real_insert)
+    col.add(ids=["c"], documents=["v3 c"])
+
+    res = col.query(query_embeddings=[[0, 0, 0, 1, 0, 0, 0, 0]], n_results=1)
+    assert res["ids"][0] == ["c"] and res["distances"][0][0] < 0.01
+    assert col.count() == 2
+
+    reopened = NumpyVectorClient(str(tmp_path)).get_or_create_collection("knowledge", embedding_function=onehot)
+    res = reopened.query(query_texts=["v3"], n_results=1)
+    assert res["ids"][0] == ["c"] and res["distances"][0][0] < 0.01
+    assert reopened.get(ids=["b"])["ids"] == []
+
+
+def test_ivf_index_and_compaction(tmp_path, monkeypatch):
+    monkeypatch.setattr(NumpyCollection, "IVF_MIN_ROWS", 200)
+    rng = np.random.default_rng(1)
+    vectors = rng.normal(size=(1500, 16)).astype(np.float32)
+    col = NumpyVectorClient(str(tmp_path)).get_or_create_collection("big")
+    col.add(ids=[str(i) for i in range(1500)], embeddings=vectors, documents=[f"d{i}" for i in range(1500)])
+    assert col._ivf is None  # trained on first query, not on insert
+
+    col.nprobe = 10 ** 6  # probing every list is exact
+    assert col.query(query_embeddings=[vectors[7]], n_results=1)["ids"][0] == ["7"]
+    assert col._ivf is not None  # probing every list is exact
+    assert col.query(query_embeddings=[vectors[42]], n_results=1)["ids"][0] == ["42"]
+
+    col.delete(ids=[str(i) for i in range(1000)])
+    assert col._rows == 500  # dead rows outnumbered live ones: matrix rewritten
+    assert col.query(query_embeddings=[vectors[1200]], n_results=1, where={})["ids"][0] == ["1200"]
+    reopened = NumpyVectorClient(str(tmp_path)).get_or_create_collection("big")
+    assert reopened.get(ids=["1200"])["documents"] == ["d1200"]
+
+
+def test_resolve_backend(monkeypatch):
+    monkeypatch.setenv("MEMORY_BACKEND", "numpy")
+    assert resolve_backend() == "numpy"
+    assert resolve_backend("chroma") == "chroma"
+    with pytest.raises(ValueError):
+        resolve_backend("faiss")
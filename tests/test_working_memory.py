@@ -0,0 +1,87 @@
+"""Tests for the indexed working memory store."""
+
+import time
+
+from core.working_memory import WorkingMemoryItem, WorkingMemoryStore
+
+
+def _item(content, priority=0, ttl=3600):
+    return WorkingMemoryItem(content=content, context="", priority=priority, ttl_seconds=ttl)
+
+
+def test_query_matches_substrings_in_priority_order():
+    store = WorkingMemoryStore()
+    store.put("a", _item("Hello world", priority=1))
+    store.put("b", _item("Say hello to Safari", priority=7))
+    store.put("c", _item("Unrelated note", priority=9))
+
+    assert [k for k, _ in store.query("hello")] == ["b", "a"]
+    # Partial words still match, as with a plain substring search
+    assert [k for k, _ in store.query("ell")] == ["b", "a"]
+    assert [k for k, _ in store.query("o wor")] == ["a"]
+    assert [k for k, _ in store.query("", min_priority=5)] == ["c", "b"]
+    assert store.query("!!") == []
+
+
+def test_whole_word_tokens_use_exact_postings():
+    class CountingPostings(dict):
+        scans = 0
+
+        def items(self):
+            CountingPostings.scans += 1
+            return super().items()
+
+    store = WorkingMemoryStore()
+    store._postings = CountingPostings()
+    store.put("a", _item("open safari window now"))
+    store.put("b", _item("close safari tab"))
+
+    assert [k for k, _ in store.query("fari window n")] == ["a"]
+    assert [k for k, _ in store.query("open safari tab")] == []
+    assert CountingPostings.scans == 0
+    # A lone (possibly partial) word still falls back to scanning the vocabulary
+    assert sorted(k for k, _ in store.query("afar")) == ["a", "b"]
+    assert CountingPostings.scans == 1
+
+
+def test_overwrite_reindexes_item():
+    store = WorkingMemoryStore()
+    store.put("a", _item("old text", priority=1))
+    store.put("a", _item("new text", priority=5))
+
+    assert store.query("old") == []
+    assert [(k, i.priority) for k, i in store.query("new")] == [("a", 5)]
+    assert len(store) == 1
+
+
+def test_expired_items_are_swept():
+    store = WorkingMemoryStore()
+    store.put("short", _item("short lived", ttl=0))
+    store.put("long", _item("long lived"))
+    time.sleep(0.01)
+
+    assert store.get("short") is None
+    assert [k for k, _ in store.query("lived")] == ["long"]
+    stats = store.get_stats()
+    assert stats["active_items"] == 1 and stats["expired_total"] == 1
+
+
+def test_lru_cap_evicts_least_recently_used():
+    store = WorkingMemoryStore(max_items=2)
+    store.put("a", _item("a"))
+    store.put("b", _item("b"))
+    store.get("a")
+    store.put("c", _item("c"))
+
+    assert store.get("b") is None
+    assert store.get("a") is not None
+    assert store.get_stats()["evicted_total"] == 1
+
+
+def test_stale_heap_entries_are_compacted():
+    store = WorkingMemoryStore()
+    for i in range(500):
+        store.put("same", _item(f"version {i}"))
+
+    assert len(store._expiry_heap) < 200
+    assert [i.content for _, i in store.query("version")] == ["version 499"]
@@ -262,17 +262,26 @@ class MonitorSummaryService:
     last_flush_ts: int = 0
 
     def _ingest(self, text: str, metadata: Dict[str, Any]) -> bool:
-        """Ingest summary into RAG pipeline."""
+        """Queue summary for ingestion by the shared RAG pipeline (does not wait for embedding)."""
         try:
             from tui.agents import load_env
             load_env()
-            from system_ai.rag.rag_pipeline import RagPipeline
+            from system_ai.rag.rag_pipeline import get_rag_pipeline
 
-            rp = RagPipeline(persist_dir="~/.system_cli/chroma")
-            return bool(rp.ingest_text(text, metadata=metadata))
+            rp = get_rag_pipeline(persist_dir="~/.system_cli/chroma")
+            return bool(rp.ingest_async(text, metadata=metadata))
         except Exception:
             return False
 
+    def _drain_ingest(self, timeout: float = 30.0) -> None:
+        """Wait for queued summaries so the final ones are not lost when the process exits."""
+        try:
+            from system_ai.rag.rag_pipeline import get_rag_pipeline
+
+            get_rag_pipeline(persist_dir="~/.system_cli/chroma").flush(timeout=timeout)
+        except Exception:
+            pass
+
     def _flush(self, *, kind: str, targets: List[str], source: str) -> None:
         """Flush pending events to summary."""
         batch = monitor_db_read_since_id(self.db_path, self.last_id, limit=5000)
@@ -398,6 +407,7 @@ class MonitorSummaryService:
             except Exception:
                 pass
 
+        self._drain_ingest()
         self.running = False
 
     def start(self) -> None: